@@ -3,10 +3,21 @@ PACOTE ALGORITHMS: Contém os algoritmos de busca e ordenação
 """
 from .busca import busca_sequencial, busca_binaria_por_data
 from .ordenacao import merge_sort_por_quantidade, quick_sort_por_validade
+from .previsao_demanda import PrevisaoDemanda
+from .otimizacao_compras import otimizar_compras
+from .cache_pd import CacheResultadosPD
+from .corrida_pd import correr_solvers
+from .ordenacao_externa import ordenar_externo, ordenar_livro_em_disco
 
 __all__ = [
     'busca_sequencial', 
     'busca_binaria_por_data',
     'merge_sort_por_quantidade', 
-    'quick_sort_por_validade'
+    'quick_sort_por_validade',
+    'PrevisaoDemanda',
+    'otimizar_compras',
+    'CacheResultadosPD',
+    'correr_solvers',
+    'ordenar_externo',
+    'ordenar_livro_em_disco'
 ]
\ No newline at end of file
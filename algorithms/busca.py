@@ -36,7 +36,9 @@ def busca_binaria_por_data(registros: List[RegistroConsumo], data_alvo: datetime
         return None
         
     # Primeiro ordenamos os registros por data (do mais antigo para o mais recente)
-    registros_ordenados = sorted(registros, key=lambda x: x.data)
+    # (pelo dia ordinal: comparar inteiros, sem criar datas)
+    registros_ordenados = sorted(registros, key=lambda x: x.dia)
+    dia_alvo = data_alvo.toordinal()
     
     # Configuramos onde começar e terminar a busca
     esquerda, direita = 0, len(registros_ordenados) - 1
@@ -46,9 +48,9 @@ def busca_binaria_por_data(registros: List[RegistroConsumo], data_alvo: datetime
         meio = (esquerda + direita) // 2  # Pega o registro do meio
         registro_meio = registros_ordenados[meio]  # Registro do meio
         
-        if registro_meio.data == data_alvo:  # Achou a data certa!
+        if registro_meio.dia == dia_alvo:  # Achou a data certa!
             return registro_meio
-        elif registro_meio.data < data_alvo:  # Data do meio é mais antiga
+        elif registro_meio.dia < dia_alvo:  # Data do meio é mais antiga
             esquerda = meio + 1  # Procura na metade direita (datas mais recentes)
         else:  # Data do meio é mais recente
             direita = meio - 1  # Procura na metade esquerda (datas mais antigas)
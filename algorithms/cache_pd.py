@@ -0,0 +1,142 @@
+# algorithms/cache_pd.py
+import os
+import pickle
+import sys
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from algorithms.pd_consumo import _normalizar_estoques
+
+# Memória padrão do cache: 8 MiB de chaves + resultados
+MEMORIA_PADRAO = 8 * 1024 * 1024
+
+
+def _tamanho_entrada(chave: Tuple, valor) -> int:
+    """Estimativa (em bytes) do que uma entrada ocupa: tuplas, inteiros e o resultado"""
+    solver, estoques = chave
+    return (sys.getsizeof(chave) + sys.getsizeof(solver) + sys.getsizeof(estoques)
+            + sum(sys.getsizeof(q) for q in estoques) + sys.getsizeof(valor))
+
+
+class CacheResultadosPD:
+    """
+    CACHE DE RESULTADOS DA PD: Lembra respostas de calcular_consumo_otimo entre chamadas
+
+    FUNCIONA COMO: Um caderno de respostas. Antes de resolver a PD, olhamos se
+    a mesma pergunta já foi respondida; se sim, devolvemos na hora.
+
+    CHAVE CANÔNICA: (solver, estoques normalizados pelo bloco). Como os três
+    solvers só enxergam o vetor normalizado, estoques diferentes que viram o
+    mesmo vetor (ou blocos diferentes com o mesmo resultado) compartilham a resposta.
+
+    - memoria_maxima: limite em bytes; ao passar, sai a entrada usada há mais tempo (LRU)
+    - caminho: arquivo opcional para guardar o cache em disco entre execuções
+    """
+
+    def __init__(self, memoria_maxima: int = MEMORIA_PADRAO, caminho: Optional[str] = None):
+        if memoria_maxima <= 0:
+            raise ValueError("memoria_maxima deve ser positiva")
+        self.memoria_maxima = memoria_maxima
+        self.caminho = caminho
+        self._entradas: "OrderedDict[Tuple, int]" = OrderedDict()
+        self._tamanhos: Dict[Tuple, int] = {}
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.removidas = 0
+        if caminho and os.path.exists(caminho):
+            self.carregar()
+
+    @staticmethod
+    def chave(estoques: List[int], bloco: int, solver: str) -> Tuple[str, Tuple[int, ...]]:
+        """Chave canônica de uma chamada"""
+        return solver, _normalizar_estoques(estoques, bloco)
+
+    def obter(self, chave: Tuple) -> Optional[int]:
+        """Resultado guardado (ou None), contando acerto/falha"""
+        if chave in self._entradas:
+            self._entradas.move_to_end(chave)  # vira a mais recente
+            self.acertos += 1
+            return self._entradas[chave]
+        self.falhas += 1
+        return None
+
+    def guardar(self, chave: Tuple, valor: int):
+        """Guarda um resultado e remove as entradas mais antigas se passar do limite"""
+        if chave in self._entradas:
+            self.bytes_usados -= self._tamanhos[chave]
+        tamanho = _tamanho_entrada(chave, valor)
+        self._entradas[chave] = valor
+        self._entradas.move_to_end(chave)
+        self._tamanhos[chave] = tamanho
+        self.bytes_usados += tamanho
+
+        while self.bytes_usados > self.memoria_maxima and len(self._entradas) > 1:
+            antiga, _ = self._entradas.popitem(last=False)
+            self.bytes_usados -= self._tamanhos.pop(antiga)
+            self.removidas += 1
+        if self.bytes_usados > self.memoria_maxima:
+            # Uma única entrada maior que o limite não fica no cache
+            self._entradas.clear()
+            self._tamanhos.clear()
+            self.bytes_usados = 0
+            self.removidas += 1
+
+    def obter_ou_calcular(self, estoques: List[int], bloco: int, solver: str,
+                        calcular: Callable[[], int]) -> int:
+        """Devolve o resultado do cache ou chama `calcular()` e guarda a resposta"""
+        chave = self.chave(estoques, bloco, solver)
+        valor = self.obter(chave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(chave, valor)
+        return valor
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Acertos, falhas, taxa de acerto, entradas, bytes usados e remoções"""
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            'entradas': len(self._entradas),
+            'bytes': self.bytes_usados,
+            'removidas': self.removidas,
+        }
+
+    def limpar(self):
+        """Esvazia o cache (as estatísticas continuam)"""
+        self._entradas.clear()
+        self._tamanhos.clear()
+        self.bytes_usados = 0
+
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._entradas
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    # ------------------------------------------------------------------
+    # Persistência em disco
+    # ------------------------------------------------------------------
+    def salvar(self):
+        """Grava o cache no arquivo `caminho` (troca atômica: nunca deixa arquivo pela metade)"""
+        if not self.caminho:
+            raise ValueError("Cache sem caminho de arquivo configurado")
+        pasta = os.path.dirname(os.path.abspath(self.caminho))
+        descritor, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                pickle.dump(list(self._entradas.items()), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def carregar(self):
+        """Lê as entradas do arquivo (respeitando o limite de memória)"""
+        with open(self.caminho, 'rb') as arquivo:
+            entradas = pickle.load(arquivo)
+        for chave, valor in entradas:
+            self.guardar(chave, valor)
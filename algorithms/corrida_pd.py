@@ -0,0 +1,145 @@
+# algorithms/corrida_pd.py
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+from typing import Dict, Iterable, Optional, Union
+
+from algorithms.pd_consumo import (_normalizar_estoques, consumo_otimo_rec,
+                                   consumo_otimo_memo, consumo_otimo_iterativo)
+
+SOLVERS = {
+    'recursiva': consumo_otimo_rec,
+    'memorizacao': consumo_otimo_memo,
+    'iterativa': consumo_otimo_iterativo,
+}
+
+# Tempo máximo (segundos de relógio) de cada versão antes de ser cancelada
+ORCAMENTO_PADRAO = {
+    'recursiva': 2.0,
+    'memorizacao': 10.0,
+    'iterativa': 30.0,
+}
+
+
+def _executar_solver(nome: str, estoques, bloco: int, conexao):
+    """Roda uma versão da PD no processo filho e devolve (situação, valor, duração)"""
+    inicio = time.perf_counter()
+    try:
+        valor = SOLVERS[nome](estoques, bloco=bloco)
+        conexao.send(('ok', valor, time.perf_counter() - inicio))
+    except BaseException as erro:  # RecursionError, MemoryError...: vira resultado "erro"
+        conexao.send(('erro', repr(erro), time.perf_counter() - inicio))
+    finally:
+        conexao.close()
+
+
+def _encerrar(processo):
+    """Cancela um processo filho e recolhe o que sobrou dele"""
+    processo.terminate()
+    processo.join(timeout=1)
+
+
+def _verificar(valor, normalizados) -> bool:
+    """Resultado válido: inteiro entre 0 e o estoque normalizado total"""
+    return isinstance(valor, int) and 0 <= valor <= sum(normalizados)
+
+
+def correr_solvers(estoques, bloco: int = 1,
+                   solvers: Iterable[str] = ('recursiva', 'memorizacao', 'iterativa'),
+                   orcamento: Union[float, Dict[str, float], None] = None,
+                   esperar_todos: bool = True,
+                   conhecidos: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    CORRIDA DE SOLVERS: roda as versões da PD AO MESMO TEMPO, cada uma num processo.
+
+    - orcamento: segundos por versão (número para todas ou dicionário por versão);
+      quem passa do tempo é cancelado (o processo é encerrado), então nenhuma
+      versão lenta trava o sistema
+    - esperar_todos: False devolve assim que o PRIMEIRO resultado verificado
+      chega e cancela as demais; True espera todas (dentro do orçamento) para a
+      verificação de consistência
+    - conhecidos: resultados já sabidos (ex.: do cache), que não precisam rodar
+
+    Retorna {'resultado', 'vencedor', 'resultados', 'tempos', 'situacao'}:
+    situação de cada versão é 'ok', 'cache', 'tempo_esgotado', 'cancelado',
+    'erro' ou 'invalido'; tempos em segundos.
+    """
+    solvers = list(solvers)
+    for nome in solvers:
+        if nome not in SOLVERS:
+            raise ValueError(f"Solver desconhecido: {nome} (use {', '.join(SOLVERS)})")
+    if orcamento is None:
+        orcamento = ORCAMENTO_PADRAO
+    limites = {nome: orcamento.get(nome, ORCAMENTO_PADRAO[nome]) if isinstance(orcamento, dict)
+               else float(orcamento) for nome in solvers}
+
+    normalizados = _normalizar_estoques(estoques, bloco)
+    corrida = {'resultado': None, 'vencedor': None,
+               'resultados': {nome: None for nome in solvers},
+               'tempos': {}, 'situacao': {}}
+
+    def concluir(nome: str, situacao: str, valor, duracao: float):
+        corrida['situacao'][nome] = situacao
+        corrida['tempos'][nome] = duracao
+        if situacao in ('ok', 'cache'):
+            corrida['resultados'][nome] = valor
+            if corrida['vencedor'] is None:
+                corrida['vencedor'], corrida['resultado'] = nome, valor
+
+    for nome, valor in (conhecidos or {}).items():
+        if nome in solvers and _verificar(valor, normalizados):
+            concluir(nome, 'cache', valor, 0.0)
+    a_rodar = [nome for nome in solvers if nome not in corrida['situacao']]
+    if not a_rodar or (corrida['vencedor'] is not None and not esperar_todos):
+        for nome in a_rodar:
+            concluir(nome, 'cancelado', None, 0.0)
+        return corrida
+
+    contexto = multiprocessing.get_context()
+    pendentes = {}  # conexão -> (nome, processo, início)
+    try:
+        for nome in a_rodar:
+            receptor, emissor = contexto.Pipe(duplex=False)
+            processo = contexto.Process(target=_executar_solver, args=(nome, list(estoques), bloco, emissor),
+                                        daemon=True)
+            processo.start()
+            emissor.close()  # só o filho escreve; sem isso o EOF nunca chega
+            pendentes[receptor] = (nome, processo, time.perf_counter())
+
+        while pendentes:
+            agora = time.perf_counter()
+            for conexao, (nome, processo, inicio) in list(pendentes.items()):
+                if agora - inicio >= limites[nome]:
+                    _encerrar(processo)
+                    conexao.close()
+                    concluir(nome, 'tempo_esgotado', None, agora - inicio)
+                    del pendentes[conexao]
+            if not pendentes:
+                break
+
+            prazo = min(inicio + limites[nome] for nome, _, inicio in pendentes.values()) - agora
+            for conexao in wait(list(pendentes), timeout=max(0.0, prazo)):
+                nome, processo, inicio = pendentes.pop(conexao)
+                try:
+                    situacao, valor, duracao = conexao.recv()
+                except EOFError:  # processo morreu sem responder
+                    situacao, valor, duracao = 'erro', None, time.perf_counter() - inicio
+                conexao.close()
+                processo.join(timeout=1)
+                if situacao == 'ok' and not _verificar(valor, normalizados):
+                    situacao = 'invalido'
+                concluir(nome, situacao, valor if situacao == 'ok' else None, duracao)
+
+            if corrida['vencedor'] is not None and not esperar_todos:
+                agora = time.perf_counter()
+                for conexao, (nome, processo, inicio) in pendentes.items():
+                    _encerrar(processo)
+                    conexao.close()
+                    concluir(nome, 'cancelado', None, agora - inicio)
+                pendentes.clear()
+    finally:
+        for conexao, (_, processo, _) in pendentes.items():
+            _encerrar(processo)
+            conexao.close()
+
+    return corrida
@@ -0,0 +1,209 @@
+"""
+ORDENAÇÃO EXTERNA: ordena históricos maiores que a RAM com memória fixa.
+
+1. Corridas: lê o livro em pedaços que cabem no orçamento, ordena cada pedaço
+   na memória (NumPy) e grava em um arquivo temporário.
+2. Intercalação: uma versão em k vias do _merge de algorithms/ordenacao.py.
+   Cada corrida tem um buffer; um heap guarda a última chave de cada buffer.
+   O buffer que termina com a MENOR chave define até onde é seguro escrever:
+   tudo o que é <= essa chave, em todos os buffers, sai de uma vez (em lote,
+   vetorizado) e só aquele buffer é recarregado. Se houver corridas demais
+   para o orçamento, elas são intercaladas em mais de uma passada.
+
+As linhas são ordenadas por (chave, linha original), então o resultado é
+estável: empates saem na ordem do livro. A memória usada depende só de
+`memoria_maxima`, nunca do número de registros.
+"""
+import heapq
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from models.datas import dias_validade
+from structures.livro_razao import LivroRazao
+
+MEMORIA_PADRAO = 256 * 2 ** 20   # orçamento padrão: 256 MiB
+BUFFER_MINIMO = 4096              # linhas por corrida na intercalação (abaixo disso: mais passadas)
+CHAVES = ('quantidade', 'validade')
+
+# Uma linha do livro pronta para ordenar: chave + linha original + colunas
+TIPO_LINHA = np.dtype([('chave', np.int64), ('linha', np.int64)] +
+                      [(nome, tipo) for nome, tipo in LivroRazao.COLUNAS.items()])
+
+
+def _ate(buffer: np.ndarray, chave: int, linha: int) -> int:
+    """Quantas linhas do buffer (ordenado por chave, linha) são <= (chave, linha)"""
+    chaves = buffer['chave']
+    a = int(np.searchsorted(chaves, chave, 'left'))
+    b = int(np.searchsorted(chaves, chave, 'right'))
+    return a + int(np.searchsorted(buffer['linha'][a:b], linha, 'right'))
+
+
+def _intercalar(corridas: List, linhas_por_buffer: int) -> Iterator[np.ndarray]:
+    """
+    K-WAY MERGE em lotes: generaliza o _merge (duas listas) para k corridas ordenadas.
+    Produz blocos ordenados por (chave, linha).
+    """
+    posicoes = [0] * len(corridas)
+    buffers: List[Optional[np.ndarray]] = [None] * len(corridas)
+    heap = []
+
+    def recarregar(i: int):
+        inicio = posicoes[i]
+        fim = min(len(corridas[i]), inicio + linhas_por_buffer)
+        posicoes[i] = fim
+        if fim > inicio:
+            buffers[i] = np.asarray(corridas[i][inicio:fim])
+            ultimo = buffers[i][-1]
+            heapq.heappush(heap, (int(ultimo['chave']), int(ultimo['linha']), i))
+        else:
+            buffers[i] = None
+
+    for i in range(len(corridas)):
+        recarregar(i)
+
+    while heap:
+        chave, linha, menor = heapq.heappop(heap)
+        # Tudo <= (chave, linha) em qualquer buffer já pode sair: as corridas são ordenadas
+        partes = []
+        for i, buffer in enumerate(buffers):
+            if buffer is None:
+                continue
+            corte = len(buffer) if i == menor else _ate(buffer, chave, linha)
+            if corte:
+                partes.append(buffer[:corte])
+                buffers[i] = buffer[corte:]
+        lote = np.concatenate(partes) if len(partes) > 1 else partes[0]
+        if len(partes) > 1:
+            lote = lote[np.lexsort((lote['linha'], lote['chave']))]
+        yield lote
+        recarregar(menor)
+
+
+def _gravar_corrida(pasta: str, numero: int, linhas: np.ndarray) -> str:
+    caminho = os.path.join(pasta, f'corrida_{numero:06d}.bin')
+    linhas.tofile(caminho)
+    return caminho
+
+
+class _Corrida:
+    """Corrida gravada em disco: lê só a fatia pedida (sem mapear o arquivo inteiro)"""
+
+    def __init__(self, caminho: str, tipo: np.dtype):
+        self.caminho = caminho
+        self.tipo = tipo
+        self._tamanho = os.path.getsize(caminho) // tipo.itemsize
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def __getitem__(self, fatia: slice) -> np.ndarray:
+        inicio, fim, _ = fatia.indices(self._tamanho)
+        return np.fromfile(self.caminho, dtype=self.tipo, count=max(0, fim - inicio),
+                           offset=inicio * self.tipo.itemsize)
+
+
+def ordenar_externo(blocos: Iterable[np.ndarray], memoria_maxima: int = MEMORIA_PADRAO,
+                    pasta: Optional[str] = None, estatisticas: Optional[Dict] = None) -> Iterator[np.ndarray]:
+    """
+    ORDENAÇÃO EXTERNA genérica: recebe blocos de um array estruturado com os campos
+    'chave' e 'linha' e devolve blocos ordenados por (chave, linha).
+    - memoria_maxima: bytes de RAM para corridas e buffers (os arquivos vão para `pasta`)
+    - estatisticas: dicionário opcional preenchido com 'corridas' e 'passadas'
+    """
+    estatisticas = estatisticas if estatisticas is not None else {}
+    with tempfile.TemporaryDirectory(prefix='ordenacao_', dir=pasta) as temporaria:
+        tipo, caminhos, pendentes, acumuladas = None, [], [], 0
+
+        def fechar_corrida():
+            nonlocal pendentes, acumuladas
+            linhas = np.concatenate(pendentes) if len(pendentes) > 1 else pendentes[0]
+            linhas = linhas[np.lexsort((linhas['linha'], linhas['chave']))]
+            caminhos.append(_gravar_corrida(temporaria, len(caminhos), linhas))
+            pendentes, acumuladas = [], 0
+
+        # 1) Corridas: pedaço + cópia ordenada + índices (~3.2x o pedaço) + bloco de entrada
+        for bloco in blocos:
+            if tipo is None:
+                tipo = bloco.dtype
+                linhas_por_corrida = max(BUFFER_MINIMO, memoria_maxima // (4 * tipo.itemsize))
+            inicio = 0
+            while inicio < len(bloco):
+                parte = bloco[inicio:inicio + linhas_por_corrida - acumuladas]
+                pendentes.append(np.array(parte))
+                acumuladas += len(parte)
+                inicio += len(parte)
+                if acumuladas == linhas_por_corrida:
+                    fechar_corrida()
+        if pendentes:
+            fechar_corrida()
+        estatisticas['corridas'] = len(caminhos)
+        estatisticas['passadas'] = 0
+        if not caminhos:
+            return
+
+        # 2) Intercalação: buffers de pelo menos BUFFER_MINIMO linhas; se não couberem
+        #    todos, intercala grupos de corridas em corridas maiores (mais uma passada)
+        por_buffer = memoria_maxima // (4 * tipo.itemsize)
+        max_vias = max(2, por_buffer // BUFFER_MINIMO)
+        while len(caminhos) > max_vias:
+            estatisticas['passadas'] += 1
+            novos = []
+            for g in range(0, len(caminhos), max_vias):
+                grupo = caminhos[g:g + max_vias]
+                destino = os.path.join(temporaria, f'passada_{estatisticas["passadas"]}_{g:06d}.bin')
+                with open(destino, 'wb') as arquivo:
+                    corridas = [_Corrida(c, tipo) for c in grupo]
+                    for lote in _intercalar(corridas, max(BUFFER_MINIMO, por_buffer // len(grupo))):
+                        lote.tofile(arquivo)
+                for c in grupo:
+                    os.remove(c)
+                novos.append(destino)
+            caminhos = novos
+
+        estatisticas['passadas'] += 1
+        corridas = [_Corrida(c, tipo) for c in caminhos]
+        yield from _intercalar(corridas, max(BUFFER_MINIMO, por_buffer // len(corridas)))
+
+
+def blocos_do_livro(livro: LivroRazao, insumos: List, por: str = 'quantidade',
+                    tamanho_bloco: int = 1 << 20) -> Iterator[np.ndarray]:
+    """
+    Linhas do livro em blocos de TIPO_LINHA, com a chave pedida:
+    'quantidade' (consumida) ou 'validade' (dia de validade do insumo).
+    Funciona com colunas mapeadas de um snapshot: só um bloco por vez vai para a RAM.
+    """
+    if por not in CHAVES:
+        raise ValueError(f"Chave de ordenação desconhecida: {por} (use {', '.join(CHAVES)})")
+    validades = dias_validade(insumos) if por == 'validade' else None
+    colunas = livro.colunas()
+    for inicio in range(0, len(livro), tamanho_bloco):
+        fim = min(len(livro), inicio + tamanho_bloco)
+        bloco = np.empty(fim - inicio, dtype=TIPO_LINHA)
+        for nome in LivroRazao.COLUNAS:
+            bloco[nome] = colunas[nome][inicio:fim]
+        bloco['linha'] = np.arange(inicio, fim)
+        bloco['chave'] = bloco['quantidade'] if validades is None else validades[bloco['insumo']]
+        yield bloco
+
+
+def ordenar_livro_em_disco(livro: LivroRazao, insumos: List, destino: str, por: str = 'quantidade',
+                           memoria_maxima: int = MEMORIA_PADRAO, pasta: Optional[str] = None) -> Dict:
+    """
+    Ordena o livro inteiro por 'quantidade' ou 'validade' e grava o resultado em
+    `destino` (.npy de TIPO_LINHA; abra com np.load(destino, mmap_mode='r')).
+    Retorna {'linhas', 'corridas', 'passadas'}.
+    """
+    tamanho_bloco = max(BUFFER_MINIMO, memoria_maxima // (6 * TIPO_LINHA.itemsize))
+    estatisticas: Dict = {}
+    escritas = 0
+    with open(destino, 'wb') as arquivo:
+        np.lib.format.write_array_header_1_0(arquivo, {
+            'descr': np.lib.format.dtype_to_descr(TIPO_LINHA), 'fortran_order': False, 'shape': (len(livro),)})
+        for lote in ordenar_externo(blocos_do_livro(livro, insumos, por, tamanho_bloco),
+                                    memoria_maxima, pasta, estatisticas):
+            lote.tofile(arquivo)
+            escritas += len(lote)
+    return {'linhas': escritas, **estatisticas}
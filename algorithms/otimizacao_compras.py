@@ -0,0 +1,158 @@
+# algorithms/otimizacao_compras.py
+import math
+from functools import reduce
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.insumo import Insumo
+
+# Limite padrão de células do vetor de PD (orçamento / escala).
+# Acima disso o otimizador entra no modo aproximado.
+MAX_CELULAS_PADRAO = 50_000
+
+
+def _necessidades(insumos: List[Insumo], demanda_diaria: Sequence[float], horizonte: int,
+                vida_util: Optional[Sequence[int]]) -> List[int]:
+    """
+    Quantas unidades de cada insumo conseguimos USAR no horizonte.
+    Comprar além disso é desperdício: ou sobra no estoque ou vence antes do uso.
+    """
+    necessidades = []
+    for i, insumo in enumerate(insumos):
+        dias = horizonte if vida_util is None else min(horizonte, max(0, int(vida_util[i])))
+        demanda = max(0.0, float(demanda_diaria[i])) * dias
+        necessidades.append(max(0, math.ceil(demanda) - max(0, insumo.quantidade)))
+    return necessidades
+
+
+def _dividir_em_grupos(item: int, quantidade_max: int) -> List[Tuple[int, int]]:
+    """
+    DIVISÃO BINÁRIA: transforma "comprar de 0 a m unidades" em pacotes 1, 2, 4, ..., resto.
+    Qualquer quantidade entre 0 e m é soma de um subconjunto dos pacotes,
+    então a mochila limitada vira uma mochila 0/1 com O(log m) itens.
+    """
+    grupos = []
+    k = 1
+    while quantidade_max > 0:
+        tamanho = min(k, quantidade_max)
+        grupos.append((item, tamanho))
+        quantidade_max -= tamanho
+        k *= 2
+    return grupos
+
+
+def _pd_mochila(pesos: np.ndarray, valores: np.ndarray, capacidade: int) -> np.ndarray:
+    """
+    PD DA MOCHILA 0/1 com UM vetor rolante de tamanho capacidade + 1.
+    dp[w] = melhor valor usando no máximo w unidades de orçamento.
+    """
+    dp = np.zeros(capacidade + 1)
+    for peso, valor in zip(pesos.tolist(), valores.tolist()):
+        if peso > capacidade:
+            continue
+        # O lado direito é calculado a partir do vetor antigo antes da atribuição (0/1)
+        dp[peso:] = np.maximum(dp[peso:], dp[:capacidade + 1 - peso] + valor)
+    return dp
+
+
+def _reconstruir(pesos: np.ndarray, valores: np.ndarray, capacidade: int) -> List[int]:
+    """
+    Descobre QUAIS pacotes foram escolhidos sem guardar a tabela inteira (Hirschberg):
+    divide os pacotes ao meio, roda a PD de cada metade e acha a melhor divisão do orçamento.
+    Memória O(capacidade). São O(log pacotes) níveis de recursão e cada nível percorre de
+    novo todos os pacotes: as células da PD somam ~2× uma passada (as metades repartem o
+    orçamento), mas o custo fixo por pacote se repete em cada nível, então o tempo fica
+    entre ~2× e ~log2(pacotes)× o de uma única passada.
+    """
+    if len(pesos) == 0 or capacidade <= 0:
+        return []
+    if len(pesos) == 1:
+        return [0] if pesos[0] <= capacidade and valores[0] > 0 else []
+
+    meio = len(pesos) // 2
+    esquerda = _pd_mochila(pesos[:meio], valores[:meio], capacidade)
+    direita = _pd_mochila(pesos[meio:], valores[meio:], capacidade)
+    divisao = int(np.argmax(esquerda + direita[::-1]))
+
+    escolhidos = _reconstruir(pesos[:meio], valores[:meio], divisao)
+    escolhidos += [meio + i for i in _reconstruir(pesos[meio:], valores[meio:], capacidade - divisao)]
+    return escolhidos
+
+
+def otimizar_compras(insumos: List[Insumo], demanda_diaria: Sequence[float], orcamento: float,
+                    horizonte: int = 30, vida_util: Optional[Sequence[int]] = None,
+                    pesos: Optional[Sequence[float]] = None,
+                    max_celulas: int = MAX_CELULAS_PADRAO) -> Dict:
+    """
+    OTIMIZADOR DE COMPRAS: Decide quanto comprar de cada insumo dentro de um orçamento
+
+    FUNCIONA COMO: Encher uma mochila (o orçamento) escolhendo quantas unidades levar
+    de cada produto, sem passar do valor disponível.
+
+    - demanda_diaria: previsão por insumo (ex.: saída de PrevisaoDemanda)
+    - horizonte: quantos dias a compra deve cobrir
+    - vida_util: dias de validade de um lote novo de cada insumo (limita a compra útil)
+    - pesos: importância de cada unidade de demanda atendida (padrão 1 para todos)
+    - max_celulas: tamanho máximo do vetor de PD; orçamentos maiores usam modo aproximado
+
+    ESCALA DE CUSTO: os custos viram centavos e são divididos pelo MDC entre eles (exato).
+    Se ainda assim o vetor passar de max_celulas, a escala aumenta e os custos são
+    arredondados PARA CIMA — a compra continua cabendo no orçamento (modo aproximado).
+    A folga que o arredondamento deixa é gasta depois, com os custos exatos, pelos
+    insumos de maior valor por centavo que ainda têm necessidade.
+
+    Retorna dicionário com 'quantidades' (por nome), 'custo_total', 'valor_total',
+    'modo' ('exato' ou 'aproximado') e 'escala' (centavos por célula).
+    """
+    if orcamento < 0:
+        raise ValueError("orcamento não pode ser negativo")
+    if len(demanda_diaria) != len(insumos):
+        raise ValueError("demanda_diaria deve ter um valor por insumo")
+
+    necessidades = _necessidades(insumos, demanda_diaria, horizonte, vida_util)
+    custos = [insumo.custo_centavos for insumo in insumos]
+    orcamento_centavos = int(math.floor(orcamento * 100 + 1e-9))
+
+    candidatos = [i for i, (n, c) in enumerate(zip(necessidades, custos))
+                if n > 0 and 0 < c <= orcamento_centavos]
+
+    # Escala exata: MDC dos custos (e do orçamento) não perde precisão
+    escala = reduce(math.gcd, [custos[i] for i in candidatos], orcamento_centavos) or 1
+    modo = 'exato'
+    if orcamento_centavos // escala > max_celulas:
+        escala = math.ceil(orcamento_centavos / max_celulas)
+        modo = 'aproximado'
+    capacidade = orcamento_centavos // escala
+
+    grupos: List[Tuple[int, int]] = []
+    for i in candidatos:
+        custo_escalado = math.ceil(custos[i] / escala)
+        limite = min(necessidades[i], capacidade // custo_escalado) if custo_escalado else 0
+        grupos.extend(_dividir_em_grupos(i, limite))
+
+    peso_unidade = [1.0] * len(insumos) if pesos is None else [float(p) for p in pesos]
+    pesos_grupos = np.array([math.ceil(custos[i] / escala) * k for i, k in grupos], dtype=np.int64)
+    valores_grupos = np.array([peso_unidade[i] * k for i, k in grupos], dtype=np.float64)
+
+    quantidades = [0] * len(insumos)
+    for g in _reconstruir(pesos_grupos, valores_grupos, capacidade):
+        item, tamanho = grupos[g]
+        quantidades[item] += tamanho
+
+    # Completa o orçamento que sobrou (no modo aproximado, a folga dos custos arredondados)
+    restante = orcamento_centavos - sum(q * c for q, c in zip(quantidades, custos))
+    for i in sorted(candidatos, key=lambda i: peso_unidade[i] / custos[i], reverse=True):
+        extra = min(necessidades[i] - quantidades[i], restante // custos[i])
+        if extra > 0 and peso_unidade[i] > 0:
+            quantidades[i] += extra
+            restante -= extra * custos[i]
+
+    custo_total = sum(q * c for q, c in zip(quantidades, custos)) / 100
+    return {
+        'quantidades': {insumo.nome: q for insumo, q in zip(insumos, quantidades)},
+        'custo_total': custo_total,
+        'valor_total': sum(q * p for q, p in zip(quantidades, peso_unidade)),
+        'modo': modo,
+        'escala': escala,
+    }
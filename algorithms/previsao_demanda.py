@@ -0,0 +1,264 @@
+# algorithms/previsao_demanda.py
+import datetime
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.insumo import Insumo
+from models.registro_consumo import RegistroConsumo
+
+
+class PrevisaoDemanda:
+    """
+    PREVISÃO DE DEMANDA: Estima quanto cada insumo vai consumir por dia
+
+    FUNCIONA COMO: Uma planilha gigante com uma linha por insumo e uma coluna por dia.
+    Todas as previsões são calculadas de uma vez para todos os insumos (NumPy),
+    em vez de um laço por produto.
+
+    Métodos disponíveis (um valor por insumo):
+    - Média móvel dos últimos `janela` dias
+    - Suavização exponencial simples (alfa)
+    - Sazonal ingênua: repete o consumo de `periodo_sazonal` dias atrás
+
+    A partir da previsão calculamos o ponto de reposição e os dias de cobertura.
+
+    ATUALIZAÇÃO INCREMENTAL: cada dia fechado custa O(insumos); só registros
+    retroativos (em dias já fechados) forçam o recálculo vetorizado da matriz.
+    """
+
+    _CAPACIDADE_INICIAL = 64
+
+    def __init__(self, insumos: List[Insumo], janela: int = 7, alfa: float = 0.3,
+                periodo_sazonal: int = 7, tempo_reposicao: int = 3, fator_seguranca: float = 1.65):
+        if janela < 1 or periodo_sazonal < 1:
+            raise ValueError("janela e periodo_sazonal devem ser >= 1")
+        if not 0 < alfa <= 1:
+            raise ValueError("alfa deve estar no intervalo (0, 1]")
+
+        self.janela = janela
+        self.alfa = alfa
+        self.periodo_sazonal = periodo_sazonal
+        self.tempo_reposicao = tempo_reposicao
+        self.fator_seguranca = fator_seguranca
+
+        self.insumos: List[Insumo] = []
+        self._linha_por_id: Dict[int, int] = {}
+
+        # Matriz densa insumo × dia (colunas a partir de dia_inicial)
+        self.matriz = np.zeros((0, self._CAPACIDADE_INICIAL), dtype=np.float64)
+        self.dia_inicial: Optional[int] = None  # ordinal do primeiro dia da matriz
+        self.n_dias = 0      # colunas com algum dado (abertas ou fechadas)
+        self.n_fechados = 0  # colunas já incorporadas ao estado da previsão
+
+        # Estado incremental (um valor por insumo)
+        self._soma_janela = np.zeros(0)
+        self._soma_quad_janela = np.zeros(0)
+        self._nivel = np.zeros(0)
+        self._estado_valido = True
+
+        self._processados = 0  # quantos registros do livro já foram lidos
+        self._versao = 0
+        self._cache: Optional[Dict[str, np.ndarray]] = None
+        self._versao_cache = -1
+
+        self.adicionar_insumos(insumos)
+
+    # ------------------------------------------------------------------
+    # Montagem da matriz
+    # ------------------------------------------------------------------
+    def adicionar_insumos(self, insumos: List[Insumo]):
+        """Inclui novas linhas na matriz para insumos ainda desconhecidos"""
+        novos = [i for i in insumos if i.id not in self._linha_por_id]
+        if not novos:
+            return
+        for insumo in novos:
+            self._linha_por_id[insumo.id] = len(self.insumos)
+            self.insumos.append(insumo)
+
+        extra = len(novos)
+        self.matriz = np.vstack([self.matriz, np.zeros((extra, self.matriz.shape[1]))])
+        self._soma_janela = np.concatenate([self._soma_janela, np.zeros(extra)])
+        self._soma_quad_janela = np.concatenate([self._soma_quad_janela, np.zeros(extra)])
+        self._nivel = np.concatenate([self._nivel, np.zeros(extra)])
+        if self.n_fechados:
+            # Linhas novas só têm zeros no passado: estado precisa ser refeito
+            self._estado_valido = False
+        self._versao += 1
+
+    def _garantir_coluna(self, dia: int) -> int:
+        """Devolve a coluna do dia (ordinal), crescendo a matriz se necessário"""
+        if self.dia_inicial is None:
+            self.dia_inicial = dia
+
+        if dia < self.dia_inicial:
+            # Registro anterior ao início da matriz: desloca tudo para a direita
+            deslocamento = self.dia_inicial - dia
+            nova = np.zeros((self.matriz.shape[0], max(self.matriz.shape[1], self.n_dias + deslocamento)))
+            nova[:, deslocamento:deslocamento + self.n_dias] = self.matriz[:, :self.n_dias]
+            self.matriz = nova
+            self.dia_inicial = dia
+            self.n_dias += deslocamento
+            if self.n_fechados:
+                self.n_fechados += deslocamento
+                self._estado_valido = False
+
+        coluna = dia - self.dia_inicial
+        if coluna >= self.matriz.shape[1]:
+            # Dobra a capacidade (custo amortizado O(1) por dia)
+            capacidade = max(coluna + 1, 2 * self.matriz.shape[1])
+            nova = np.zeros((self.matriz.shape[0], capacidade))
+            nova[:, :self.n_dias] = self.matriz[:, :self.n_dias]
+            self.matriz = nova
+        self.n_dias = max(self.n_dias, coluna + 1)
+        return coluna
+
+    def registrar(self, registro: RegistroConsumo):
+        """Soma um registro de consumo na célula (insumo, dia) da matriz"""
+        if registro.insumo.id not in self._linha_por_id:
+            self.adicionar_insumos([registro.insumo])
+        linha = self._linha_por_id[registro.insumo.id]
+        coluna = self._garantir_coluna(registro.dia)
+        self.matriz[linha, coluna] += registro.quantidade_consumida
+        if coluna < self.n_fechados:
+            # Registro retroativo em dia já fechado
+            self._estado_valido = False
+        self._versao += 1
+
+    def registrar_colunas(self, linhas: np.ndarray, dias: np.ndarray, quantidades: np.ndarray):
+        """
+        Soma vários consumos de uma vez, direto de colunas (ex.: do LivroRazao),
+        sem objetos RegistroConsumo. linhas = posição do insumo em self.insumos.
+        """
+        if not len(dias):
+            return
+        self._garantir_coluna(int(dias.min()))  # primeiro o mais antigo: pode deslocar a matriz
+        self._garantir_coluna(int(dias.max()))
+        colunas = np.asarray(dias, dtype=np.int64) - self.dia_inicial
+        np.add.at(self.matriz, (np.asarray(linhas, dtype=np.int64), colunas), quantidades)
+        if int(colunas.min()) < self.n_fechados:
+            self._estado_valido = False
+        self._versao += 1
+
+    def sincronizar(self, registros: List[RegistroConsumo]):
+        """
+        Lê apenas os registros novos do livro (lista append-only do sistema).
+        Registros já processados não são percorridos de novo.
+        """
+        for registro in registros[self._processados:]:
+            self.registrar(registro)
+        self._processados = len(registros)
+
+    def sincronizar_livro(self, colunas: Dict[str, np.ndarray], catalogo: List[Insumo]):
+        """
+        Como sincronizar(), mas lendo as colunas do LivroRazao (sem objetos RegistroConsumo).
+        catalogo: lista cujas posições a coluna 'insumo' usa (a do sistema).
+        """
+        self.adicionar_insumos(catalogo)
+        inicio, total = self._processados, len(colunas['dia'])
+        if inicio < total:
+            # Posição no catálogo → linha da matriz
+            linha = np.fromiter((self._linha_por_id[i.id] for i in catalogo), dtype=np.int64, count=len(catalogo))
+            self.registrar_colunas(linha[colunas['insumo'][inicio:]], colunas['dia'][inicio:],
+                                   colunas['quantidade'][inicio:])
+        self._processados = total
+
+    def marcar_sincronizados(self, total: int):
+        """A lista de registros foi reorganizada (ex.: compactada) sem registros novos"""
+        self._processados = total
+
+    # ------------------------------------------------------------------
+    # Fechamento de dias e estado incremental
+    # ------------------------------------------------------------------
+    def fechar_ate(self, data: datetime.date):
+        """Fecha todos os dias até `data` (inclusive), atualizando o estado dia a dia"""
+        if self.dia_inicial is None:
+            return
+        ultima_coluna = self._garantir_coluna(data.toordinal())
+
+        if not self._estado_valido:
+            self._recalcular_estado(ultima_coluna + 1)
+            return
+
+        for coluna in range(self.n_fechados, ultima_coluna + 1):
+            self._fechar_coluna(coluna)
+        if ultima_coluna + 1 > self.n_fechados:
+            self.n_fechados = ultima_coluna + 1
+            self._versao += 1
+
+    def _fechar_coluna(self, coluna: int):
+        """Incorpora um dia ao estado: O(insumos)"""
+        x = self.matriz[:, coluna]
+        self._soma_janela += x
+        self._soma_quad_janela += x * x
+        saindo = coluna - self.janela
+        if saindo >= 0:
+            y = self.matriz[:, saindo]
+            self._soma_janela -= y
+            self._soma_quad_janela -= y * y
+        if coluna == 0:
+            self._nivel = x.copy()
+        else:
+            self._nivel = self.alfa * x + (1 - self.alfa) * self._nivel
+
+    def _recalcular_estado(self, n_fechados: int):
+        """Recalcula o estado do zero a partir da matriz (caso retroativo)"""
+        dados = self.matriz[:, :n_fechados]
+        recorte = dados[:, max(0, n_fechados - self.janela):]
+        self._soma_janela = recorte.sum(axis=1)
+        self._soma_quad_janela = (recorte * recorte).sum(axis=1)
+
+        # Suavização exponencial em forma fechada: pesos alfa*(1-alfa)^k
+        if n_fechados:
+            expoentes = np.arange(n_fechados - 1, -1, -1, dtype=np.float64)
+            pesos = self.alfa * (1 - self.alfa) ** expoentes
+            pesos[0] = (1 - self.alfa) ** (n_fechados - 1)  # primeiro dia inicializa o nível
+            self._nivel = dados @ pesos
+        else:
+            self._nivel = np.zeros(dados.shape[0])
+
+        self.n_fechados = n_fechados
+        self._estado_valido = True
+        self._versao += 1
+
+    # ------------------------------------------------------------------
+    # Resultados
+    # ------------------------------------------------------------------
+    def resultado(self, metodo: str = 'exponencial') -> Dict[str, np.ndarray]:
+        """
+        Devolve as previsões e indicadores de todos os insumos (arrays alinhados a `self.insumos`).
+        As previsões ficam em cache até que algum dado novo chegue; dias de cobertura e
+        `repor` dependem do estoque atual (que muda sem registro novo, ex.: reposição)
+        e são refeitos a cada chamada, em O(insumos).
+        """
+        if metodo not in ('media_movel', 'exponencial', 'sazonal'):
+            raise ValueError(f"Método de previsão desconhecido: {metodo}")
+        if not self._estado_valido:
+            self._recalcular_estado(self.n_fechados)
+
+        chave = (self._versao, metodo)
+        if self._cache is None or self._versao_cache != chave:
+            n = self.n_fechados
+            dias_janela = max(1, min(self.janela, n))
+            media = self._soma_janela / dias_janela
+            variancia = np.maximum(self._soma_quad_janela / dias_janela - media * media, 0.0)
+            desvio = np.sqrt(variancia)
+
+            if n >= self.periodo_sazonal:
+                sazonal = self.matriz[:, n - self.periodo_sazonal].copy()
+            else:
+                sazonal = media.copy()
+
+            previsoes = {'media_movel': media, 'exponencial': self._nivel.copy(), 'sazonal': sazonal}
+            demanda = previsoes[metodo]
+            ponto_reposicao = (demanda * self.tempo_reposicao
+                            + self.fator_seguranca * desvio * math.sqrt(self.tempo_reposicao))
+            self._cache = dict(previsoes, desvio=desvio, ponto_reposicao=ponto_reposicao)
+            self._versao_cache = chave
+
+        demanda = self._cache[metodo]
+        estoque = np.array([i.quantidade for i in self.insumos], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dias_cobertura = np.where(demanda > 0, np.maximum(estoque, 0) / demanda, np.inf)
+        return dict(self._cache, dias_cobertura=dias_cobertura, repor=estoque <= self._cache['ponto_reposicao'])
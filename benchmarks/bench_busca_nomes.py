@@ -0,0 +1,51 @@
+# benchmarks/bench_busca_nomes.py
+"""
+BENCHMARK: busca aproximada (top-10) e autocompletar em 100 mil nomes
+
+Uso: python benchmarks/bench_busca_nomes.py [n_nomes]
+"""
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from structures.indice_trigramas import IndiceTrigramas
+
+BASES = ['Reagente', 'Luvas', 'Máscaras', 'Tubos', 'Agulhas', 'Seringa', 'Cateter', 'Gaze', 'Álcool', 'Soro']
+CONSULTAS = ['Mascaras', 'seringa 10ml', 'reagnte', 'cateter ABX', 'alcool 70']
+
+
+def gerar_nomes(n: int, semente: int = 42):
+    rng = np.random.default_rng(semente)
+    letras = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    bases = rng.integers(0, len(BASES), n)
+    codigos = rng.integers(0, 26, (n, 3))
+    volumes = rng.integers(1, 1000, n)
+    return [f"{BASES[b]} {''.join(letras[c])} {v}ml" for b, c, v in zip(bases, codigos, volumes)]
+
+
+def main():
+    n_nomes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    nomes = gerar_nomes(n_nomes)
+
+    inicio = time.perf_counter()
+    indice = IndiceTrigramas(nomes)
+    indice.buscar('aquecimento')  # monta as listas de postagem
+    print(f"construção: {time.perf_counter() - inicio:.2f}s ({n_nomes:,} nomes)")
+
+    for consulta in CONSULTAS:
+        inicio = time.perf_counter()
+        resultados = indice.buscar(consulta, limite=10)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        melhor = indice.nomes[resultados[0][0]] if resultados else '-'
+        print(f"{consulta!r:>16}: {decorrido:.2f} ms (melhor: {melhor})")
+
+    inicio = time.perf_counter()
+    indice.autocompletar('masc', limite=10)
+    print(f"autocompletar: {(time.perf_counter() - inicio) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_ordenacao_externa.py
+"""
+BENCHMARK: ordenação externa do livro-razão com memória fixa
+
+Gera um snapshot sintético, abre sem materializar e ordena por quantidade e
+por validade com um orçamento de memória pequeno. O pico de memória (RSS)
+não deve crescer com o número de eventos.
+
+Uso: python benchmarks/bench_ordenacao_externa.py [n_eventos] [memoria_MiB]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from system.dados_sinteticos import gerar_dataset
+from system.sistema_consumo import SistemaConsumo
+
+
+def main():
+    n_eventos = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    memoria = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'carga.snap')
+        gerar_dataset(caminho, 10_000, n_eventos)
+        sistema = SistemaConsumo.carregar_snapshot(caminho)
+
+        for por in ('quantidade', 'validade'):
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            info = sistema.ordenar_em_disco(os.path.join(pasta, f'{por}.npy'), por=por,
+                                            memoria_maxima=memoria * 2 ** 20, pasta=pasta)
+            duracao = time.perf_counter() - inicio
+            pico_heap = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+            print(f"por {por}: {info['linhas']:,} linhas em {duracao:.1f}s "
+                  f"({info['linhas'] / duracao / 1e6:.1f} M linhas/s, {info['corridas']} corridas, "
+                  f"{info['passadas']} passada(s), pico alocado {pico_heap:,.0f} MiB)")
+            os.remove(os.path.join(pasta, f'{por}.npy'))
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"orçamento da ordenação: {memoria} MiB | RSS máximo do processo: {pico:,.0f} MiB "
+          f"(inclui páginas do snapshot mapeado)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_otimizacao_compras.py
+"""
+BENCHMARK: otimizador de compras com 500 insumos
+
+Uso: python benchmarks/bench_otimizacao_compras.py
+"""
+import datetime
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from models.insumo import Insumo
+from algorithms.otimizacao_compras import otimizar_compras
+
+
+def criar_cenario(n_insumos: int = 500, semente: int = 42):
+    """Insumos, demanda diária e vida útil aleatórios (reprodutíveis)"""
+    rng = random.Random(semente)
+    hoje = datetime.date.today()
+    insumos, demanda, vida_util = [], [], []
+    for i in range(n_insumos):
+        tipo = rng.choice(['reagente', 'descartavel'])
+        custo = round(rng.uniform(5, 60) if tipo == 'reagente' else rng.uniform(0.5, 5), 2)
+        insumos.append(Insumo(i + 1, f"Insumo {i + 1}", rng.randint(0, 50),
+                            hoje + datetime.timedelta(days=rng.randint(30, 365)), tipo, custo))
+        demanda.append(rng.uniform(0.5, 8))
+        vida_util.append(rng.randint(10, 60))
+    return insumos, demanda, vida_util
+
+
+def main():
+    insumos, demanda, vida_util = criar_cenario()
+    print(f"{'orçamento':>12} {'modo':>11} {'escala':>7} {'custo':>12} {'valor':>8} {'tempo (s)':>10}")
+    for orcamento in (1_000, 10_000, 100_000):
+        inicio = time.perf_counter()
+        resultado = otimizar_compras(insumos, demanda, orcamento, horizonte=30, vida_util=vida_util)
+        duracao = time.perf_counter() - inicio
+        print(f"{orcamento:>12,} {resultado['modo']:>11} {resultado['escala']:>7} "
+            f"{resultado['custo_total']:>12,.2f} {resultado['valor_total']:>8.0f} {duracao:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
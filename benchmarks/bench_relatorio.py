@@ -0,0 +1,28 @@
+# benchmarks/bench_relatorio.py
+"""
+BENCHMARK: relatório completo sobre 10 milhões de registros, em cada formato
+
+Uso: python benchmarks/bench_relatorio.py [n_registros]
+"""
+import io
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_snapshot import criar_sistema
+
+
+def main():
+    n_registros = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    sistema = criar_sistema(n_registros)
+
+    for formato in ('texto', 'markdown', 'html', 'csv'):
+        saida = io.StringIO()
+        inicio = time.perf_counter()
+        sistema.gerar_relatorio_completo(destino=saida, formato=formato)
+        print(f"{formato:>9}: {time.perf_counter() - inicio:.3f}s ({len(saida.getvalue()):,} caracteres)")
+
+
+if __name__ == "__main__":
+    main()
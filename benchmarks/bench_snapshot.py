@@ -0,0 +1,54 @@
+# benchmarks/bench_snapshot.py
+"""
+BENCHMARK: carga de snapshot com 10 milhões de registros
+
+Uso: python benchmarks/bench_snapshot.py [n_registros]
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from structures.livro_razao import LivroRazao
+from system.dados_sinteticos import gerar_eventos, gerar_insumos
+from system.sistema_consumo import SistemaConsumo
+
+
+def criar_sistema(n_registros: int, n_insumos: int = 1000, semente: int = 42) -> SistemaConsumo:
+    """Sistema com um livro sintético montado direto nas colunas (sem objetos de registro)"""
+    sistema = SistemaConsumo()
+    sistema.insumos = gerar_insumos(n_insumos, semente=semente)
+    blocos = list(gerar_eventos(sistema.insumos, n_registros, semente=semente))
+    sistema.livro = LivroRazao.de_colunas({nome: np.concatenate([b[nome] for b in blocos])
+                                        for nome in LivroRazao.COLUNAS})
+    sistema._restauracao = (None, None)  # estado equivalente a um sistema recém-carregado
+    return sistema
+
+
+def main():
+    n_registros = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    sistema = criar_sistema(n_registros)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'estado.snap')
+
+        inicio = time.perf_counter()
+        sistema.salvar_snapshot(caminho)
+        print(f"salvar  {n_registros:>12,} registros: {time.perf_counter() - inicio:.3f}s "
+            f"({os.path.getsize(caminho) / 2**20:.0f} MiB)")
+
+        inicio = time.perf_counter()
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+        print(f"carregar {n_registros:>11,} registros: {time.perf_counter() - inicio:.3f}s")
+
+        inicio = time.perf_counter()
+        total = int(carregado.livro.coluna('quantidade').sum())
+        print(f"primeira soma do livro: {time.perf_counter() - inicio:.3f}s (total = {total:,})")
+        del carregado
+
+
+if __name__ == "__main__":
+    main()
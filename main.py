@@ -14,15 +14,18 @@ def main():
     sistema.carregar_insumos_exemplo()
     sistema.simular_consumo_diario(30)
     
-    # Gera apenas os gráficos
+    # Gera apenas os gráficos (passando o sistema, o DataFrame é montado uma vez e reaproveitado)
     print("📈 Gerando gráfico de consumo diário...")
-    VisualizadorDados.gerar_grafico_consumo_diario(sistema.registros_completos)
+    VisualizadorDados.gerar_grafico_consumo_diario(sistema)
     
     print("🏆 Gerando gráfico dos insumos mais consumidos...")
-    VisualizadorDados.gerar_grafico_top_insumos(sistema.registros_completos)
+    VisualizadorDados.gerar_grafico_top_insumos(sistema)
     
     print("💰 Gerando gráfico de custos por tipo...")
-    VisualizadorDados.gerar_grafico_custo_por_tipo(sistema.registros_completos)
+    VisualizadorDados.gerar_grafico_custo_por_tipo(sistema)
+    
+    print("🌡️  Gerando mapa de calor do consumo...")
+    VisualizadorDados.gerar_mapa_calor_consumo(sistema, periodo='dia')
     
     print("⚠️  Gerando gráfico de estoque baixo...")
     VisualizadorDados.gerar_grafico_estoque_baixo(sistema.insumos)
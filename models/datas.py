@@ -0,0 +1,40 @@
+import datetime
+from typing import List, Tuple
+
+import numpy as np
+
+# Situação da validade de cada insumo (códigos de classificar_validades)
+VENCIDO = 0     # validade já passou
+VENCENDO = 1    # vence de hoje até `dias_limite` dias
+DENTRO = 2      # ainda longe de vencer
+SITUACOES = ('vencido', 'vencendo', 'dentro')
+
+
+def para_dia(data: datetime.date) -> int:
+    """
+    CONVERTE DATA EM DIA: date(2024, 1, 1) → 738886 (ordinal, dias desde 01/01/0001)
+
+    Datas são guardadas como dias inteiros (int32 nas colunas): comparar e subtrair
+    vira conta de inteiros, e todo um catálogo é classificado de uma vez com NumPy.
+    """
+    return data.toordinal()
+
+
+def para_data(dia: int) -> datetime.date:
+    """Volta para date (só na borda da API: tela, relatórios, resultados)"""
+    return datetime.date.fromordinal(int(dia))
+
+
+def dias_validade(insumos: List) -> np.ndarray:
+    """Validade de cada insumo como dia ordinal (int32), na ordem da lista"""
+    return np.fromiter((i.validade_dia for i in insumos), dtype=np.int32, count=len(insumos))
+
+
+def classificar_validades(validades: np.ndarray, hoje: int, dias_limite: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    CLASSIFICAÇÃO VETORIZADA de todas as validades de uma vez.
+    Retorna (dias_restantes, situacao), com situacao em VENCIDO / VENCENDO / DENTRO.
+    """
+    restantes = np.asarray(validades, dtype=np.int64) - hoje
+    situacao = (restantes >= 0).astype(np.int8) + (restantes > dias_limite)
+    return restantes, situacao
@@ -0,0 +1,19 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def para_centavos(valor) -> int:
+    """
+    CONVERTE REAIS EM CENTAVOS: 15.5 → 1550
+
+    Todo dinheiro do sistema é guardado em centavos inteiros (int64 nas colunas),
+    então somas de milhões de registros são exatas — nada de R$ 0,01 sumindo.
+    Passamos pelo texto do número (Decimal) para que 0.29 vire 29, não 28.
+    """
+    return int((Decimal(str(valor)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def formatar_reais(centavos: int) -> str:
+    """Texto para a tela (só aqui o valor vira "reais"): 1550 → 'R$ 15.50'"""
+    centavos = int(centavos)
+    inteiro, resto = divmod(abs(centavos), 100)
+    return f"R$ {'-' if centavos < 0 else ''}{inteiro}.{resto:02d}"
@@ -1,4 +1,7 @@
 import datetime
+from typing import Optional
+from models.dinheiro import formatar_reais, para_centavos
+from models.datas import para_data, para_dia
 
 class Insumo:
     """
@@ -9,23 +12,46 @@ class Insumo:
     - Nome: como o produto é chamado (ex: "Reagente A", "Luvas")
     - Quantidade: quanto temos em estoque no momento
     - Validade: até quando o produto pode ser usado (data importante!)
+      (guardada como dia ordinal: validade_dia; validade é a visão em date)
     - Tipo: se é "reagente" (para exames) ou "descartavel" (uso único)
     - Custo Unitário: quanto custa cada unidade desse produto
+      (guardado em centavos inteiros: custo_centavos; custo_unitario é só a visão em reais)
     """
     
     def __init__(self, id: int, nome: str, quantidade: int, validade: datetime.date, 
-                tipo: str, custo_unitario: float):
+                tipo: str, custo_unitario: float, custo_centavos: Optional[int] = None,
+                validade_dia: Optional[int] = None):
         # Aqui estamos criando a "ficha" do produto com todas as informações
         self.id = id  # Número identificador
         self.nome = nome  # Nome do produto
         self.quantidade = quantidade  # Quantidade em estoque
-        self.validade = validade  # Data de validade
+        # Data de validade, como dia ordinal (use validade_dia se já tiver o ordinal)
+        self.validade_dia = int(validade_dia) if validade_dia is not None else para_dia(validade)
         self.tipo = tipo  # Tipo: reagente ou descartavel
-        self.custo_unitario = custo_unitario  # Preço de cada unidade
+        # Preço de cada unidade, em centavos (use custo_centavos se já tiver o valor exato)
+        self.custo_centavos = int(custo_centavos) if custo_centavos is not None else para_centavos(custo_unitario)
+
+    @property
+    def validade(self) -> datetime.date:
+        """Data de validade (para exibir; comparações em massa usam validade_dia)"""
+        return para_data(self.validade_dia)
+
+    @validade.setter
+    def validade(self, data: datetime.date):
+        self.validade_dia = para_dia(data)
+
+    @property
+    def custo_unitario(self) -> float:
+        """Preço de cada unidade em reais (para exibir; as contas usam custo_centavos)"""
+        return self.custo_centavos / 100
+
+    @custo_unitario.setter
+    def custo_unitario(self, valor: float):
+        self.custo_centavos = para_centavos(valor)
     
     def __str__(self):
         """
         Como o produto será mostrado quando imprimirmos na tela
         Ex: "Reagente A (ID: 1) - 100 unidades - Validade: 2024-12-31 - R$ 15.50"
         """
-        return f"{self.nome} (ID: {self.id}) - {self.quantidade} unidades - Validade: {self.validade} - R$ {self.custo_unitario:.2f}"
\ No newline at end of file
+        return f"{self.nome} (ID: {self.id}) - {self.quantidade} unidades - Validade: {self.validade} - {formatar_reais(self.custo_centavos)}"
\ No newline at end of file
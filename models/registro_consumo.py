@@ -1,5 +1,7 @@
 import datetime
 from models.insumo import Insumo  # Importamos a classe Insumo para usar aqui
+from models.dinheiro import formatar_reais
+from models.datas import para_data, para_dia
 
 class RegistroConsumo:
     """
@@ -7,22 +9,45 @@ class RegistroConsumo:
     
     Pense como um ticket de compra:
     - Insumo: qual produto foi usado
-    - Data: quando foi usado
+    - Data: quando foi usado (guardada como dia ordinal: dia)
     - Quantidade Consumida: quantas unidades foram usadas
-    - Custo Total: quanto custou esse uso (quantidade × preço unitário)
+    - Custo Total: quanto custou esse uso (quantidade × preço unitário), em centavos inteiros
     """
     
     def __init__(self, insumo: Insumo, data: datetime.date, quantidade_consumida: int):
         self.insumo = insumo  # Qual produto foi usado
-        self.data = data  # Data do uso
+        self.dia = para_dia(data)  # Data do uso (dia ordinal)
         self.quantidade_consumida = quantidade_consumida  # Quantas unidades usadas
-        self.custo_total = quantidade_consumida * insumo.custo_unitario  # Custo total
+        self.custo_centavos = quantidade_consumida * insumo.custo_centavos  # Custo total (exato)
 
         insumo.quantidade -= quantidade_consumida
+
+    @classmethod
+    def restaurar(cls, insumo: Insumo, dia: int, quantidade_consumida: int, custo_centavos: int):
+        """
+        Recria um registro já contabilizado (ex.: vindo de um snapshot).
+        NÃO mexe no estoque do insumo, que já foi salvo com o valor final.
+        """
+        registro = cls.__new__(cls)
+        registro.insumo = insumo
+        registro.dia = dia
+        registro.quantidade_consumida = quantidade_consumida
+        registro.custo_centavos = custo_centavos
+        return registro
+
+    @property
+    def data(self) -> datetime.date:
+        """Data do uso (para exibir; ordenações e filtros usam dia)"""
+        return para_data(self.dia)
+
+    @property
+    def custo_total(self) -> float:
+        """Custo total em reais (para exibir; somas devem usar custo_centavos)"""
+        return self.custo_centavos / 100
     
     def __str__(self):
         """
         Como o registro será mostrado na tela
         Ex: "2024-01-15: Reagente A - 5 unidades - R$ 77.50"
         """
-        return f"{self.data}: {self.insumo.nome} - {self.quantidade_consumida} unidades - R$ {self.custo_total:.2f}"
\ No newline at end of file
+        return f"{self.data}: {self.insumo.nome} - {self.quantidade_consumida} unidades - {formatar_reais(self.custo_centavos)}"
\ No newline at end of file
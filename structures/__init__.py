@@ -1,7 +1,29 @@
 """
-PACOTE STRUCTURES: Contém as estruturas de dados (Fila e Pilha)
+PACOTE STRUCTURES: Contém as estruturas de dados (Fila, Pilha, Livro-Razão e índices)
 """
 from .fila_consumo import FilaConsumo
 from .pilha_consulta import PilhaConsulta
+from .livro_razao import LivroRazao
+from .arvore_fenwick import ArvoreFenwick, HistoricoEstoque
+from .janela_consumo import EstatisticasJanela
+from .indice_trigramas import IndiceTrigramas
+from .log_eventos import LogEventos, Assinatura
+from .detector_anomalias import DetectorAnomalias
+from .livro_compartilhado import LivroCompartilhado, LeitorLivroCompartilhado
+from .cubo_consumo import CuboConsumo
 
-__all__ = ['FilaConsumo', 'PilhaConsulta']
\ No newline at end of file
+__all__ = [
+    'FilaConsumo',
+    'PilhaConsulta',
+    'LivroRazao',
+    'ArvoreFenwick',
+    'HistoricoEstoque',
+    'EstatisticasJanela',
+    'IndiceTrigramas',
+    'LogEventos',
+    'Assinatura',
+    'DetectorAnomalias',
+    'LivroCompartilhado',
+    'LeitorLivroCompartilhado',
+    'CuboConsumo'
+]
\ No newline at end of file
@@ -0,0 +1,158 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class ArvoreFenwick:
+    """
+    ÁRVORE DE FENWICK (Binary Indexed Tree): somas de prefixo com atualização rápida
+
+    FUNCIONA COMO: Um caderno onde cada página guarda a soma de um bloco de dias
+    de tamanho potência de 2. Para somar "do dia 0 até o dia i" basta juntar
+    O(log n) páginas; para corrigir um dia, atualizamos O(log n) páginas.
+
+    Índices externos começam em 0 (internamente a árvore usa 1..n).
+    """
+
+    def __init__(self, valores: Optional[List[int]] = None, tamanho: int = 0):
+        valores = list(valores) if valores is not None else [0] * tamanho
+        self.tamanho = len(valores)
+        # Construção linear O(n): cada nó empurra sua soma para o "pai"
+        self._arvore = [0] + valores
+        for i in range(1, self.tamanho + 1):
+            pai = i + (i & -i)
+            if pai <= self.tamanho:
+                self._arvore[pai] += self._arvore[i]
+
+    def adicionar(self, indice: int, delta: int):
+        """Soma `delta` na posição `indice` - O(log n)"""
+        if not 0 <= indice < self.tamanho:
+            raise IndexError(f"Índice fora da árvore: {indice}")
+        i = indice + 1
+        while i <= self.tamanho:
+            self._arvore[i] += delta
+            i += i & -i
+
+    def prefixo(self, indice: int) -> int:
+        """Soma das posições 0..indice (inclusive) - O(log n). Índices negativos somam 0"""
+        i = min(indice, self.tamanho - 1) + 1
+        total = 0
+        while i > 0:
+            total += self._arvore[i]
+            i -= i & -i
+        return total
+
+    def intervalo(self, inicio: int, fim: int) -> int:
+        """Soma das posições inicio..fim (inclusive)"""
+        if fim < inicio:
+            return 0
+        return self.prefixo(fim) - self.prefixo(inicio - 1)
+
+
+class HistoricoEstoque:
+    """
+    HISTÓRICO DE ESTOQUE: Responde "quanto tinha do insumo no dia X?"
+
+    Guarda, para cada insumo, o consumo e as entradas (reposições) por dia em
+    ÁRVORES DE FENWICK. Como o estoque atual já descontou e somou tudo, o estoque
+    ao FIM do dia X é:
+
+        estoque_atual + consumo depois do dia X - entradas depois do dia X
+
+    Consultas e registros retroativos custam O(log dias).
+    """
+
+    def __init__(self):
+        self.dia_origem: Optional[int] = None  # ordinal do índice 0
+        self.n_dias = 0
+        self._arvores: Dict[int, ArvoreFenwick] = {}
+        self._diario: Dict[int, List[int]] = {}  # consumo bruto por dia (para crescer)
+        self._arvores_entrada: Dict[int, ArvoreFenwick] = {}
+        self._diario_entrada: Dict[int, List[int]] = {}  # entradas brutas por dia
+
+    @classmethod
+    def de_colunas(cls, insumos: np.ndarray, dias: np.ndarray, quantidades: np.ndarray) -> 'HistoricoEstoque':
+        """Monta o histórico de uma vez a partir das colunas do livro-razão (vetorizado)"""
+        historico = cls()
+        if len(dias) == 0:
+            return historico
+        historico.dia_origem = int(dias.min())
+        historico.n_dias = int(dias.max()) - historico.dia_origem + 1
+        chave = insumos.astype(np.int64) * historico.n_dias + (dias - historico.dia_origem)
+        n_insumos = int(insumos.max()) + 1
+        matriz = np.bincount(chave, weights=quantidades,
+                            minlength=n_insumos * historico.n_dias).reshape(n_insumos, historico.n_dias)
+        for posicao in np.unique(insumos).tolist():
+            diario = matriz[posicao].astype(np.int64).tolist()
+            historico._diario[posicao] = diario
+            historico._arvores[posicao] = ArvoreFenwick(diario)
+        return historico
+
+    def _garantir_dia(self, dia: int):
+        """Amplia o intervalo de dias cobertos (dobrando, para custo amortizado)"""
+        if self.dia_origem is None:
+            self.dia_origem, self.n_dias = dia, 1
+        inicio, fim = self.dia_origem, self.dia_origem + self.n_dias - 1
+        if inicio <= dia <= fim:
+            return
+
+        if dia < inicio:
+            novo_inicio = min(dia, inicio - self.n_dias)
+            novo_fim = fim
+        else:
+            novo_inicio = inicio
+            novo_fim = max(dia, fim + self.n_dias)
+        antes = inicio - novo_inicio
+        depois = novo_fim - fim
+        for diarios, arvores in ((self._diario, self._arvores), (self._diario_entrada, self._arvores_entrada)):
+            for posicao, diario in diarios.items():
+                diarios[posicao] = [0] * antes + diario + [0] * depois
+                arvores[posicao] = ArvoreFenwick(diarios[posicao])
+        self.dia_origem = novo_inicio
+        self.n_dias = novo_fim - novo_inicio + 1
+
+    def _somar(self, diarios: Dict[int, List[int]], arvores: Dict[int, ArvoreFenwick],
+               insumo: int, dia: int, quantidade: int):
+        self._garantir_dia(dia)
+        if insumo not in arvores:
+            diarios[insumo] = [0] * self.n_dias
+            arvores[insumo] = ArvoreFenwick(tamanho=self.n_dias)
+        indice = dia - self.dia_origem
+        diarios[insumo][indice] += quantidade
+        arvores[insumo].adicionar(indice, quantidade)
+
+    def _intervalo(self, arvores: Dict[int, ArvoreFenwick], insumo: int, inicio: int, fim: int) -> int:
+        """Soma de uma das séries do insumo entre os dias inicio e fim (ordinais, inclusive)"""
+        arvore = arvores.get(insumo)
+        if arvore is None or self.dia_origem is None:
+            return 0
+        return arvore.intervalo(max(inicio, self.dia_origem) - self.dia_origem,
+                                min(fim, self.dia_origem + self.n_dias - 1) - self.dia_origem)
+
+    def registrar(self, insumo: int, dia: int, quantidade: int):
+        """Registra um consumo (pode ser de um dia passado) - O(log dias) amortizado"""
+        self._somar(self._diario, self._arvores, insumo, dia, quantidade)
+
+    def registrar_entrada(self, insumo: int, dia: int, quantidade: int):
+        """Registra uma entrada de estoque (reposição) no dia - O(log dias) amortizado"""
+        self._somar(self._diario_entrada, self._arvores_entrada, insumo, dia, quantidade)
+
+    def consumo_no_periodo(self, insumo: int, inicio: int, fim: int) -> int:
+        """Unidades consumidas do insumo entre os dias inicio e fim (ordinais, inclusive)"""
+        return self._intervalo(self._arvores, insumo, inicio, fim)
+
+    def consumo_depois(self, insumo: int, dia: int) -> int:
+        """Unidades consumidas do insumo DEPOIS do dia (exclusive)"""
+        if self.dia_origem is None:
+            return 0
+        return self.consumo_no_periodo(insumo, dia + 1, self.dia_origem + self.n_dias - 1)
+
+    def entradas_depois(self, insumo: int, dia: int) -> int:
+        """Unidades que entraram no estoque do insumo DEPOIS do dia (exclusive)"""
+        if self.dia_origem is None:
+            return 0
+        return self._intervalo(self._arvores_entrada, insumo, dia + 1, self.dia_origem + self.n_dias - 1)
+
+    def estoque_em(self, insumo: int, dia: int, estoque_atual: int) -> int:
+        """Estoque ao FIM do dia, partindo do estoque atual"""
+        return estoque_atual + self.consumo_depois(insumo, dia) - self.entradas_depois(insumo, dia)
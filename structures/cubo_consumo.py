@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+PERIODOS = ('dia', 'semana', 'mes', 'total')
+EIXOS = ('insumo', 'tipo', 'total')
+
+_ORDINAL_1970 = 719163  # date(1970, 1, 1).toordinal(): origem do datetime64
+
+
+class CuboConsumo:
+    """
+    CUBO DE CONSUMO: matriz densa insumo × dia, com o tipo de cada insumo ao lado
+
+    FUNCIONA COMO: Uma planilha com uma linha por insumo e uma coluna por dia,
+    já somada. "Um insumo no trimestre" é uma fatia de linha; "reagentes por
+    semana" soma as linhas do tipo e junta as colunas de cada semana. Tudo
+    em NumPy sobre a fatia pedida, sem voltar aos registros.
+
+    - Montagem: um único np.bincount sobre (linha do insumo, dia) do livro-razão
+    - Atualização: cada consumo soma em uma célula - O(1) amortizado; a matriz
+      cresce dobrando (em insumos, em dias para frente e para trás)
+    - Tipo: um código por insumo (terceira dimensão do cubo), trocável a qualquer momento.
+      Um segundo cubo, tipo × dia, é mantido junto: roll-ups por tipo ou total
+      não precisam somar as linhas de todos os insumos
+    """
+
+    def __init__(self, capacidade_insumos: int = 16, capacidade_dias: int = 64):
+        self._dados = np.zeros((max(1, capacidade_insumos), max(1, capacidade_dias)), dtype=np.int64)
+        self.origem: Optional[int] = None        # ordinal da coluna 0
+        self.primeiro_dia: Optional[int] = None  # dias com dados: primeiro_dia..ultimo_dia
+        self.ultimo_dia: Optional[int] = None
+        self.n_insumos = 0
+        self.tipos: List[str] = []               # código → nome do tipo
+        self._codigo_tipo: Dict[str, int] = {}
+        self._tipo_insumo = np.full(self._dados.shape[0], -1, dtype=np.int32)
+        self._por_tipo = np.zeros((1, self._dados.shape[1]), dtype=np.int64)  # tipo × dia
+
+    @classmethod
+    def de_colunas(cls, insumos: np.ndarray, dias: np.ndarray, quantidades: np.ndarray,
+                   tipos: Sequence[str]) -> 'CuboConsumo':
+        """Monta o cubo de uma vez a partir das colunas do livro (tipos: um por posição de insumo)"""
+        n_insumos = max(len(tipos), int(insumos.max()) + 1 if len(insumos) else 0)
+        if not len(dias):
+            cubo = cls(capacidade_insumos=n_insumos)
+        else:
+            primeiro, ultimo = int(dias.min()), int(dias.max())
+            n_dias = ultimo - primeiro + 1
+            cubo = cls(capacidade_insumos=n_insumos, capacidade_dias=n_dias)
+            chave = insumos.astype(np.int64) * n_dias + (dias.astype(np.int64) - primeiro)
+            somas = np.bincount(chave, weights=quantidades, minlength=n_insumos * n_dias)
+            cubo._dados[:n_insumos, :n_dias] = np.rint(somas).astype(np.int64).reshape(n_insumos, n_dias)
+            cubo.origem, cubo.primeiro_dia, cubo.ultimo_dia = primeiro, primeiro, ultimo
+        cubo.n_insumos = n_insumos
+        for posicao, tipo in enumerate(tipos):
+            cubo.definir_tipo(posicao, tipo)
+        return cubo
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+    def _garantir_insumo(self, posicao: int):
+        if posicao >= self._dados.shape[0]:
+            capacidade = max(posicao + 1, 2 * self._dados.shape[0])
+            dados = np.zeros((capacidade, self._dados.shape[1]), dtype=np.int64)
+            dados[:self._dados.shape[0]] = self._dados
+            tipos = np.full(capacidade, -1, dtype=np.int32)
+            tipos[:len(self._tipo_insumo)] = self._tipo_insumo
+            self._dados, self._tipo_insumo = dados, tipos
+        self.n_insumos = max(self.n_insumos, posicao + 1)
+
+    def _garantir_dia(self, dia: int):
+        if self.origem is None:
+            self.origem = dia
+        largura = self._dados.shape[1]
+        if self.origem <= dia < self.origem + largura:
+            return
+        # Dobra a largura do lado que faltou (dias novos à direita, retroativos à esquerda)
+        if dia < self.origem:
+            nova_origem = min(dia, self.origem - largura)
+            capacidade = self.origem + largura - nova_origem
+        else:
+            nova_origem = self.origem
+            capacidade = max(dia - self.origem + 1, 2 * largura)
+        inicio = self.origem - nova_origem
+        for nome in ('_dados', '_por_tipo'):
+            antigo = getattr(self, nome)
+            novo = np.zeros((antigo.shape[0], capacidade), dtype=np.int64)
+            novo[:, inicio:inicio + largura] = antigo
+            setattr(self, nome, novo)
+        self.origem = nova_origem
+
+    def definir_tipo(self, posicao: int, tipo: str):
+        """Associa (ou troca) o tipo do insumo na posição"""
+        self._garantir_insumo(posicao)
+        codigo = self._codigo_tipo.get(tipo)
+        if codigo is None:
+            codigo = self._codigo_tipo[tipo] = len(self.tipos)
+            self.tipos.append(tipo)
+            if codigo >= self._por_tipo.shape[0]:
+                por_tipo = np.zeros((2 * self._por_tipo.shape[0], self._por_tipo.shape[1]), dtype=np.int64)
+                por_tipo[:self._por_tipo.shape[0]] = self._por_tipo
+                self._por_tipo = por_tipo
+        anterior = int(self._tipo_insumo[posicao])
+        if anterior == codigo:
+            return
+        # O consumo já registrado do insumo muda de tipo junto com ele - O(dias)
+        if anterior >= 0:
+            self._por_tipo[anterior] -= self._dados[posicao]
+        self._por_tipo[codigo] += self._dados[posicao]
+        self._tipo_insumo[posicao] = codigo
+
+    def registrar(self, posicao: int, dia: int, quantidade: int):
+        """Soma um consumo na célula (insumo, dia) - O(1) amortizado"""
+        self._garantir_insumo(posicao)
+        self._garantir_dia(dia)
+        self._dados[posicao, dia - self.origem] += quantidade
+        codigo = self._tipo_insumo[posicao]
+        if codigo >= 0:
+            self._por_tipo[codigo, dia - self.origem] += quantidade
+        self.primeiro_dia = dia if self.primeiro_dia is None else min(self.primeiro_dia, dia)
+        self.ultimo_dia = dia if self.ultimo_dia is None else max(self.ultimo_dia, dia)
+
+    # ------------------------------------------------------------------
+    # Fatias e agregações
+    # ------------------------------------------------------------------
+    def fatiar(self, inicio: Optional[int] = None, fim: Optional[int] = None,
+               insumos: Optional[Sequence[int]] = None, tipos: Optional[Sequence[str]] = None,
+               por: str = 'insumo', periodo: str = 'dia') -> Dict[str, np.ndarray]:
+        """
+        Consumo do período [inicio, fim] (ordinais; padrão: todo o cubo).
+        - insumos / tipos: restringem as linhas (posições / nomes de tipo)
+        - por: 'insumo' (uma linha por insumo), 'tipo' (soma por tipo) ou 'total'
+        - periodo: 'dia', 'semana' (segunda-feira), 'mes' ou 'total'
+        Retorna {'linhas': posições ou tipos, 'colunas': 1º dia de cada período, 'valores': matriz}.
+        """
+        if por not in EIXOS:
+            raise ValueError(f"Eixo desconhecido: {por} (use {', '.join(EIXOS)})")
+        if periodo not in PERIODOS:
+            raise ValueError(f"Período desconhecido: {periodo} (use {', '.join(PERIODOS)})")
+
+        # Colunas: o período pedido, cortado aos dias que existem no cubo
+        if self.primeiro_dia is None:
+            inicio, fim = 0, -1
+        else:
+            inicio = self.primeiro_dia if inicio is None else max(inicio, self.primeiro_dia)
+            fim = self.ultimo_dia if fim is None else min(fim, self.ultimo_dia)
+        dias = np.arange(inicio, fim + 1, dtype=np.int64)
+        c0 = inicio - (self.origem or 0)
+
+        fim_coluna = c0 + len(dias)
+        if insumos is None and por != 'insumo':
+            # Roll-up por tipo/total sem filtro de insumos: sai do cubo tipo × dia
+            codigos = np.arange(len(self.tipos)) if tipos is None else \
+                np.array([self._codigo_tipo[t] for t in tipos if t in self._codigo_tipo], dtype=np.int64)
+            bloco = self._por_tipo[codigos, c0:fim_coluna]
+            rotulos = np.array([self.tipos[c] for c in codigos.tolist()], dtype=object)
+            if por == 'total':
+                bloco, rotulos = bloco.sum(axis=0, keepdims=True), np.array(['total'], dtype=object)
+        else:
+            # Linhas: insumos pedidos e/ou do tipo pedido
+            linhas = np.arange(self.n_insumos) if insumos is None else np.asarray(insumos, dtype=np.int64)
+            if tipos is not None:
+                codigos = [self._codigo_tipo[t] for t in tipos if t in self._codigo_tipo]
+                linhas = linhas[np.isin(self._tipo_insumo[linhas], codigos)]
+            if insumos is None and tipos is None:
+                bloco = self._dados[:self.n_insumos, c0:fim_coluna]  # visão, sem cópia
+            else:
+                bloco = self._dados[linhas, c0:fim_coluna]
+            rotulos = linhas
+            if por == 'tipo':
+                codigos = self._tipo_insumo[linhas]
+                presentes = np.unique(codigos[codigos >= 0])
+                bloco = np.stack([bloco[codigos == c].sum(axis=0) for c in presentes]) if len(presentes) \
+                    else np.zeros((0, len(dias)), dtype=np.int64)
+                rotulos = np.array([self.tipos[c] for c in presentes.tolist()], dtype=object)
+            elif por == 'total':
+                bloco, rotulos = bloco.sum(axis=0, keepdims=True), np.array(['total'], dtype=object)
+
+        # Colunas agrupadas: np.add.reduceat nos inícios de cada semana/mês
+        if periodo == 'dia' or not len(dias):
+            return {'linhas': rotulos, 'colunas': dias, 'valores': bloco}
+        if periodo == 'total':
+            return {'linhas': rotulos, 'colunas': dias[:1], 'valores': bloco.sum(axis=1, keepdims=True)}
+        if periodo == 'semana':
+            chave = dias - (dias - 1) % 7  # ordinal 1 (01/01/0001) é segunda-feira
+        else:
+            chave = (dias - _ORDINAL_1970).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        inicios = np.flatnonzero(np.concatenate(([True], chave[1:] != chave[:-1])))
+        valores = np.add.reduceat(bloco, inicios, axis=1) if bloco.shape[0] else bloco[:, inicios]
+        return {'linhas': rotulos, 'colunas': dias[inicios], 'valores': valores}
+
+    def tipo_de(self, posicao: int) -> Optional[str]:
+        """Tipo associado ao insumo na posição (None se nunca foi definido)"""
+        codigo = int(self._tipo_insumo[posicao]) if posicao < self.n_insumos else -1
+        return self.tipos[codigo] if codigo >= 0 else None
+
+    @property
+    def formato(self):
+        """(insumos, dias) com dados"""
+        if self.primeiro_dia is None:
+            return (self.n_insumos, 0)
+        return (self.n_insumos, self.ultimo_dia - self.primeiro_dia + 1)
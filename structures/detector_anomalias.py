@@ -0,0 +1,146 @@
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class _EstadoInsumo:
+    """
+    Estado do detector para UM insumo: médias e variâncias exponenciais (EWMA)
+    - *_evento: quantidade de cada consumo registrado
+    - *_dia: total de cada dia com consumo (o dia atual entra quando fecha)
+    - dia / total_dia: dia mais recente, que ainda pode receber consumo
+    Tamanho fixo: não guarda histórico, só estes números.
+    """
+
+    __slots__ = ('media_evento', 'var_evento', 'n_eventos',
+                 'media_dia', 'var_dia', 'n_dias', 'dia', 'total_dia', 'dia_alertado')
+
+    def __init__(self):
+        self.media_evento = 0.0
+        self.var_evento = 0.0
+        self.n_eventos = 0
+        self.media_dia = 0.0
+        self.var_dia = 0.0
+        self.n_dias = 0
+        self.dia: Optional[int] = None
+        self.total_dia = 0
+        self.dia_alertado = False
+
+
+class DetectorAnomalias:
+    """
+    DETECTOR DE ANOMALIAS EM FLUXO: avisa picos de consumo no momento do registro
+
+    Para cada insumo guarda a média e a variância com peso exponencial (alfa)
+    de dois sinais: a quantidade de cada consumo e o total de cada dia.
+    Um valor é anômalo quando passa de `limiar` desvios acima da média:
+
+        escore = (valor - média) / max(desvio, desvio_minimo)
+
+    - Evento: cada consumo é comparado com os consumos anteriores do insumo.
+    - Dia: o total do dia em andamento é comparado com os dias anteriores a
+      cada consumo, então o pico é avisado já no consumo que o causou (uma vez
+      por dia). O dia só entra na média quando chega um dia mais novo.
+
+    Cada registro custa O(1) e cada insumo ocupa alguns números, sem reler o
+    histórico. Nos `aquecimento` primeiros eventos (ou dias) nada é avisado.
+    Um valor anômalo entra na média limitado a média + limiar × desvio, para
+    que um pico não esconda o próximo. Registros retroativos (dia anterior ao
+    mais recente do insumo) só são avaliados como evento.
+    """
+
+    def __init__(self, alfa: float = 0.1, limiar: float = 4.0, aquecimento: int = 10,
+                 desvio_minimo: float = 1.0, max_alertas: int = 1000):
+        if not 0 < alfa <= 1:
+            raise ValueError("alfa deve estar no intervalo (0, 1]")
+        if limiar <= 0 or desvio_minimo <= 0:
+            raise ValueError("limiar e desvio_minimo devem ser > 0")
+        if aquecimento < 1:
+            raise ValueError("aquecimento deve ser >= 1")
+        self.alfa = alfa
+        self.limiar = limiar
+        self.aquecimento = aquecimento
+        self.desvio_minimo = desvio_minimo
+        self.alertas: deque = deque(maxlen=max_alertas)  # últimos alertas, do mais antigo ao mais novo
+        self._estados: Dict[int, _EstadoInsumo] = {}
+
+    def _escore(self, media: float, variancia: float, n: int, valor: float):
+        """(escore, desvio) do valor; escore None enquanto houver menos de `aquecimento` observações"""
+        desvio = max(math.sqrt(variancia), self.desvio_minimo)
+        if n < self.aquecimento:
+            return None, desvio
+        return (valor - media) / desvio, desvio
+
+    def _atualizar(self, media: float, variancia: float, n: int, valor: float, desvio: float, anomalo: bool):
+        """Um passo da EWMA (média e variância); valores anômalos entram limitados"""
+        if n == 0:
+            return float(valor), 0.0
+        if anomalo:
+            valor = media + self.limiar * desvio
+        diferenca = valor - media
+        incremento = self.alfa * diferenca
+        return media + incremento, (1 - self.alfa) * (variancia + diferenca * incremento)
+
+    def registrar(self, posicao: int, dia: int, quantidade: int) -> List[Dict]:
+        """
+        Processa um consumo e retorna os alertas que ele gerou (lista vazia se normal).
+        Cada alerta: {'tipo': 'evento' | 'dia', 'insumo' (posição), 'dia', 'valor',
+        'esperado', 'desvio', 'escore'}.
+        """
+        estado = self._estados.get(posicao)
+        if estado is None:
+            estado = self._estados[posicao] = _EstadoInsumo()
+        novos = []
+
+        escore, desvio = self._escore(estado.media_evento, estado.var_evento, estado.n_eventos, quantidade)
+        anomalo = escore is not None and escore > self.limiar
+        if anomalo:
+            novos.append(self._alerta('evento', posicao, dia, quantidade, estado.media_evento, desvio, escore))
+        estado.media_evento, estado.var_evento = self._atualizar(
+            estado.media_evento, estado.var_evento, estado.n_eventos, quantidade, desvio, anomalo)
+        estado.n_eventos += 1
+
+        if estado.dia is None or dia > estado.dia:
+            if estado.dia is not None:
+                self._fechar_dia(estado)
+            estado.dia, estado.total_dia, estado.dia_alertado = dia, quantidade, False
+        elif dia == estado.dia:
+            estado.total_dia += quantidade
+        else:
+            return self._guardar(novos)  # retroativo: o total daquele dia já fechou
+
+        if not estado.dia_alertado:
+            escore, desvio = self._escore(estado.media_dia, estado.var_dia, estado.n_dias, estado.total_dia)
+            if escore is not None and escore > self.limiar:
+                estado.dia_alertado = True
+                novos.append(self._alerta('dia', posicao, dia, estado.total_dia, estado.media_dia, desvio, escore))
+        return self._guardar(novos)
+
+    def _fechar_dia(self, estado: _EstadoInsumo):
+        """O dia mais recente terminou: o total final entra na média diária"""
+        escore, desvio = self._escore(estado.media_dia, estado.var_dia, estado.n_dias, estado.total_dia)
+        anomalo = escore is not None and escore > self.limiar
+        estado.media_dia, estado.var_dia = self._atualizar(
+            estado.media_dia, estado.var_dia, estado.n_dias, estado.total_dia, desvio, anomalo)
+        estado.n_dias += 1
+
+    def _alerta(self, tipo: str, posicao: int, dia: int, valor: int, esperado: float,
+                desvio: float, escore: float) -> Dict:
+        return {'tipo': tipo, 'insumo': posicao, 'dia': dia, 'valor': valor,
+                'esperado': round(esperado, 2), 'desvio': round(desvio, 2), 'escore': round(escore, 2)}
+
+    def _guardar(self, novos: List[Dict]) -> List[Dict]:
+        self.alertas.extend(novos)
+        return novos
+
+    def estado(self, posicao: int) -> Dict[str, float]:
+        """Médias e desvios atuais do insumo (evento e dia) - útil para calibrar o limiar"""
+        estado = self._estados.get(posicao) or _EstadoInsumo()
+        return {
+            'media_evento': estado.media_evento, 'desvio_evento': math.sqrt(estado.var_evento),
+            'eventos': estado.n_eventos,
+            'media_dia': estado.media_dia, 'desvio_dia': math.sqrt(estado.var_dia), 'dias': estado.n_dias,
+        }
+
+    def __len__(self) -> int:
+        return len(self._estados)
@@ -1,4 +1,4 @@
-from typing import Optional  # Para dizer que algo pode ser vazio
+from typing import List, Optional  # Para dizer que algo pode ser vazio
 from models.registro_consumo import RegistroConsumo  # Importamos o registro
 
 class FilaConsumo:
@@ -44,4 +44,11 @@ class FilaConsumo:
         """
         if not self.esta_vazia():
             return self.registros[0]  # Mostra o primeiro sem remover
-        return None
\ No newline at end of file
+        return None
+    
+    def primeiros(self, quantidade: int) -> List[RegistroConsumo]:
+        """
+        VER OS PRIMEIROS DA FILA: Os `quantidade` primeiros registros, sem remover
+        Copia só os registros pedidos, não a fila inteira
+        """
+        return self.registros[:max(0, quantidade)]
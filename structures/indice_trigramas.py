@@ -0,0 +1,148 @@
+import bisect
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto: str) -> str:
+    """
+    Forma canônica de um nome para comparação:
+    sem acentos ('Máscaras' → 'mascaras'), minúsculo e só letras/dígitos separados por um espaço
+    """
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acento = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return _SEPARADORES.sub(' ', sem_acento.casefold()).strip()
+
+
+def trigramas(texto: str) -> List[str]:
+    """
+    Trigramas (sem repetição) do texto normalizado. Cada palavra ganha dois
+    espaços antes e um depois, então o começo da palavra pesa mais:
+    'luva' → '  l', ' lu', 'luv', 'uva', 'va '
+    """
+    vistos = {}
+    for palavra in normalizar(texto).split():
+        palavra = f"  {palavra} "
+        for i in range(len(palavra) - 2):
+            vistos.setdefault(palavra[i:i + 3], None)
+    return list(vistos)
+
+
+class IndiceTrigramas:
+    """
+    ÍNDICE DE TRIGRAMAS: busca aproximada por nome ('Mascaras', 'luvs', 'reagnte b')
+
+    FUNCIONA COMO: O índice remissivo de um livro, mas por pedaços de 3 letras.
+    Para cada trigrama guardamos a lista dos nomes que o contêm. Na busca, só
+    olhamos as listas dos trigramas da consulta e contamos quantos cada nome
+    compartilha — nunca comparamos a consulta com o catálogo inteiro.
+
+    SIMILARIDADE: trigramas em comum / trigramas na união (0 a 1, 1 = igual).
+
+    As listas ficam em arrays NumPy (formato CSR): `inicios[t]:inicios[t + 1]`
+    dentro de `postagens` são os nomes com o trigrama t. Nomes adicionados
+    depois só entram no próximo uso (reconstrução vetorizada).
+    """
+
+    def __init__(self, nomes: Iterable[str] = ()):
+        self.nomes: List[str] = []
+        self._normalizados: List[str] = []
+        self._ids_trigrama: Dict[str, int] = {}
+        self._trigramas_nome: List[int] = []   # ids de todos os nomes, em sequência
+        self._quantidades: List[int] = []      # quantos trigramas cada nome tem
+        self._construido = -1                  # quantos nomes as estruturas abaixo cobrem
+        self._postagens = np.zeros(0, dtype=np.int32)
+        self._inicios = np.zeros(1, dtype=np.int64)
+        self._tamanhos = np.zeros(0, dtype=np.int64)
+        self._alfabetico: List[str] = []
+        self._ordem_alfabetica = np.zeros(0, dtype=np.int64)
+        self._posto_alfabetico = np.zeros(0, dtype=np.int64)  # posição de cada nome na ordem alfabética
+        for nome in nomes:
+            self.adicionar(nome)
+
+    def adicionar(self, nome: str) -> int:
+        """Inclui um nome no índice e devolve a posição dele"""
+        ids = [self._ids_trigrama.setdefault(t, len(self._ids_trigrama)) for t in trigramas(nome)]
+        self.nomes.append(nome)
+        self._normalizados.append(normalizar(nome))
+        self._trigramas_nome.extend(ids)
+        self._quantidades.append(len(ids))
+        return len(self.nomes) - 1
+
+    def _construir(self):
+        """Monta as listas de postagem e a ordem alfabética (só se houver nomes novos)"""
+        if self._construido == len(self.nomes):
+            return
+        ids = np.array(self._trigramas_nome, dtype=np.int64)
+        self._tamanhos = np.array(self._quantidades, dtype=np.int64)
+        donos = np.repeat(np.arange(len(self.nomes), dtype=np.int32), self._tamanhos)
+        ordem = np.argsort(ids, kind='stable')
+        self._postagens = donos[ordem]
+        self._inicios = np.zeros(len(self._ids_trigrama) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=len(self._ids_trigrama)), out=self._inicios[1:])
+
+        self._ordem_alfabetica = np.argsort(np.array(self._normalizados, dtype=object), kind='stable')
+        self._alfabetico = [self._normalizados[p] for p in self._ordem_alfabetica.tolist()]
+        self._posto_alfabetico = np.empty(len(self.nomes), dtype=np.int64)
+        self._posto_alfabetico[self._ordem_alfabetica] = np.arange(len(self.nomes))
+        self._construido = len(self.nomes)
+
+    def buscar(self, texto: str, limite: int = 10, similaridade_minima: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Os `limite` nomes mais parecidos com `texto`, do mais para o menos parecido.
+        Retorna [(posição, similaridade)]; empates saem em ordem alfabética.
+        """
+        self._construir()
+        da_consulta = trigramas(texto)
+        conhecidos = [self._ids_trigrama[t] for t in da_consulta if t in self._ids_trigrama]
+        if not conhecidos or limite <= 0:
+            return []
+
+        candidatos = np.concatenate([self._postagens[self._inicios[t]:self._inicios[t + 1]] for t in conhecidos])
+        comuns = np.bincount(candidatos, minlength=len(self.nomes))
+        posicoes = np.flatnonzero(comuns)
+        compartilhados = comuns[posicoes]
+        similaridade = compartilhados / (len(da_consulta) + self._tamanhos[posicoes] - compartilhados)
+
+        manter = similaridade >= similaridade_minima
+        posicoes, similaridade = posicoes[manter], similaridade[manter]
+        if len(posicoes) > limite:
+            # Só os melhores vão para a ordenação completa (e os empatados com o último)
+            corte = np.partition(similaridade, len(similaridade) - limite)[len(similaridade) - limite]
+            manter = similaridade >= corte
+            posicoes, similaridade = posicoes[manter], similaridade[manter]
+
+        ordem = np.lexsort((self._posto_alfabetico[posicoes], -similaridade))[:limite]
+        return [(int(posicoes[i]), float(similaridade[i])) for i in ordem.tolist()]
+
+    def autocompletar(self, prefixo: str, limite: int = 10) -> List[int]:
+        """Posições dos nomes que começam com `prefixo` (sem acento/maiúscula), em ordem alfabética"""
+        self._construir()
+        prefixo = normalizar(prefixo)
+        inicio = bisect.bisect_left(self._alfabetico, prefixo)
+        fim = bisect.bisect_left(self._alfabetico, prefixo + '\uffff', lo=inicio)
+        return self._ordem_alfabetica[inicio:min(fim, inicio + max(0, limite))].tolist()
+
+    def posicao_exata(self, nome: str) -> Optional[int]:
+        """Posição do primeiro nome igual a `nome` ignorando acentos e maiúsculas (ou None)"""
+        self._construir()
+        alvo = normalizar(nome)
+        i = bisect.bisect_left(self._alfabetico, alvo)
+        if i < len(self._alfabetico) and self._alfabetico[i] == alvo:
+            return int(self._ordem_alfabetica[i])
+        return None
+
+    def posicoes_exatas(self, nome: str) -> List[int]:
+        """Posições de TODOS os nomes iguais a `nome` ignorando acentos e maiúsculas, em ordem"""
+        self._construir()
+        alvo = normalizar(nome)
+        inicio = bisect.bisect_left(self._alfabetico, alvo)
+        fim = bisect.bisect_right(self._alfabetico, alvo, lo=inicio)
+        return sorted(self._ordem_alfabetica[inicio:fim].tolist())
+
+    def __len__(self) -> int:
+        return len(self.nomes)
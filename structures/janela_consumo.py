@@ -0,0 +1,147 @@
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class _JanelaInsumo:
+    """
+    Uma janela de `tamanho` dias para UM insumo.
+    - dias: (dia, total do dia) de cada dia com consumo dentro da janela
+    - atual: (dia, total) do dia mais recente, que ainda pode receber consumo
+    - maximos: deque monotônica DECRESCENTE dos dias anteriores → frente é o máximo
+    - minimos: deque monotônica CRESCENTE dos dias anteriores → frente é o mínimo
+    O dia mais recente só entra nas deques quando chega um dia mais novo (total final),
+    então cada dia entra e sai de cada deque no máximo uma vez: O(1) amortizado.
+    """
+
+    __slots__ = ('tamanho', 'inicio', 'dias', 'soma', 'atual', 'maximos', 'minimos')
+
+    def __init__(self, tamanho: int):
+        self.tamanho = tamanho
+        self.inicio: Optional[int] = None  # primeiro dia ainda dentro da janela
+        self.dias = deque()
+        self.soma = 0
+        self.atual: Optional[Tuple[int, int]] = None
+        self.maximos = deque()
+        self.minimos = deque()
+
+    def avancar(self, dia: int):
+        """Descarta da janela os dias anteriores a `dia - tamanho + 1`"""
+        limite = dia - self.tamanho + 1
+        if self.inicio is not None and limite <= self.inicio:
+            return
+        self.inicio = limite
+        while self.dias and self.dias[0][0] < limite:
+            self.soma -= self.dias.popleft()[1]
+        while self.maximos and self.maximos[0][0] < limite:
+            self.maximos.popleft()
+        while self.minimos and self.minimos[0][0] < limite:
+            self.minimos.popleft()
+        if self.atual is not None and self.atual[0] < limite:
+            self.atual = None
+
+    def adicionar(self, dia: int, quantidade: int):
+        if self.inicio is not None and dia < self.inicio:
+            return  # Retroativo mais antigo que a janela: não afeta esta janela
+
+        self.soma += quantidade
+        if self.atual is None or dia > self.atual[0]:
+            # Caso normal: o dia anterior fica fechado e um dia novo entra pelo fim
+            if self.atual is not None:
+                self._empurrar(*self.atual)
+            self.atual = (dia, quantidade)
+            self.dias.append(self.atual)
+            self.avancar(dia)
+        elif dia == self.atual[0]:
+            # Mais consumo no dia mais recente: as deques não mudam
+            self.atual = (dia, self.atual[1] + quantidade)
+            self.dias[-1] = self.atual
+        else:
+            # Registro retroativo dentro da janela: corrige o dia e refaz as deques - O(tamanho)
+            dias = dict(self.dias)
+            dias[dia] = dias.get(dia, 0) + quantidade
+            self.dias = deque(sorted(dias.items()))
+            self.maximos.clear()
+            self.minimos.clear()
+            for d, total in list(self.dias)[:-1]:
+                self._empurrar(d, total)
+
+    def _empurrar(self, dia: int, total: int):
+        while self.maximos and self.maximos[-1][1] <= total:
+            self.maximos.pop()
+        self.maximos.append((dia, total))
+        while self.minimos and self.minimos[-1][1] >= total:
+            self.minimos.pop()
+        self.minimos.append((dia, total))
+
+    def resumo(self, dia: int) -> Tuple[int, int, int, int]:
+        """
+        (soma, dias com consumo, maior, menor total diário) da janela terminando em `dia`,
+        SEM descartar nada: uma consulta não move a janela (só registrar faz isso),
+        então retroativos que chegarem depois ainda entram. O(dias que ficam de fora).
+        """
+        limite = dia - self.tamanho + 1
+        soma, fora = self.soma, 0
+        for d, total in self.dias:
+            if d >= limite:
+                break
+            soma -= total
+            fora += 1
+        # Deques ordenadas por dia: o primeiro item dentro da janela é o máximo (mínimo) dela
+        candidatos = [self.atual[1]] if self.atual is not None and self.atual[0] >= limite else []
+        maximos = candidatos + [next((t for d, t in self.maximos if d >= limite), candidatos[0] if candidatos else 0)]
+        minimos = candidatos + [next((t for d, t in self.minimos if d >= limite), candidatos[0] if candidatos else 0)]
+        return soma, len(self.dias) - fora, max(maximos), min(minimos)
+
+
+class EstatisticasJanela:
+    """
+    ESTATÍSTICAS EM JANELA DESLIZANTE: "quanto foi consumido nos últimos 7/30 dias?"
+
+    FUNCIONA COMO: Uma FilaConsumo por janela — os dias novos entram no fim e os
+    dias que saem do período saem pela frente. Junto com a soma guardamos deques
+    monotônicas que dão o pico (e o mínimo) de consumo diário sem percorrer a janela.
+
+    Cada evento custa O(1) amortizado por janela, para quantas janelas quisermos.
+    """
+
+    def __init__(self, janelas: Iterable[int] = (7, 30)):
+        self.janelas: Tuple[int, ...] = tuple(sorted(set(janelas)))
+        if not self.janelas or self.janelas[0] < 1:
+            raise ValueError("Informe ao menos uma janela com tamanho >= 1 dia")
+        self._por_insumo: Dict[int, Dict[int, _JanelaInsumo]] = {}
+        self.ultimo_dia: Optional[int] = None
+
+    def registrar(self, insumo: int, dia: int, quantidade: int):
+        """Atualiza todas as janelas do insumo com um consumo (dia em ordinal)"""
+        janelas = self._por_insumo.get(insumo)
+        if janelas is None:
+            janelas = self._por_insumo[insumo] = {t: _JanelaInsumo(t) for t in self.janelas}
+        for janela in janelas.values():
+            janela.adicionar(dia, quantidade)
+        if self.ultimo_dia is None or dia > self.ultimo_dia:
+            self.ultimo_dia = dia
+
+    def consultar(self, insumo: int, janela: int, dia_referencia: Optional[int] = None) -> Dict[str, float]:
+        """
+        Estatísticas da janela de `janela` dias terminando em dia_referencia
+        (padrão: o dia mais recente registrado). Dias sem consumo contam como zero.
+        A janela só anda para frente: dia_referencia não pode ser anterior ao último registro.
+        Retorna {'soma', 'media', 'maximo', 'minimo'}
+        """
+        if janela not in self.janelas:
+            raise ValueError(f"Janela de {janela} dias não configurada: {self.janelas}")
+        if dia_referencia is not None and self.ultimo_dia is not None and dia_referencia < self.ultimo_dia:
+            raise ValueError("dia_referencia anterior ao último consumo registrado")
+        dados = self._por_insumo.get(insumo, {}).get(janela)
+        referencia = dia_referencia if dia_referencia is not None else self.ultimo_dia
+        if dados is None or referencia is None:
+            return {'soma': 0, 'media': 0.0, 'maximo': 0, 'minimo': 0}
+
+        soma, dias_com_consumo, maior, menor = dados.resumo(referencia)
+        return {
+            'soma': soma,
+            'media': soma / janela,
+            'maximo': maior,
+            # Se algum dia da janela não teve consumo, o mínimo diário é zero
+            'minimo': menor if dias_com_consumo == janela else 0,
+        }
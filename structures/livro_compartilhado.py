@@ -0,0 +1,278 @@
+"""
+LIVRO-RAZÃO EM MEMÓRIA COMPARTILHADA: um processo escreve, vários leem sem cópia.
+
+Dois segmentos de multiprocessing.shared_memory:
+- controle (nome fixo): cabeçalho de int64 com época, linhas publicadas,
+  capacidade e versão do livro, protegido por um contador de sequência
+  (seqlock): o escritor deixa o contador ímpar enquanto altera o cabeçalho,
+  e o leitor repete a leitura se o viu ímpar ou mudando.
+- dados (`<nome>_<época>`): as colunas do LivroRazao, uma após a outra,
+  com espaço para `capacidade` linhas.
+
+O livro só cresce no fim, então as linhas [0, linhas publicadas) de uma
+época nunca mudam: o leitor recebe visões NumPy direto do segmento e tem
+um instantâneo consistente enquanto o escritor continua acrescentando.
+Quando a capacidade acaba, ou o sistema troca de livro (ex.: retenção
+compactou), o escritor cria o segmento da próxima época e apaga o anterior;
+quem já tinha visões continua com o mapeamento antigo até soltá-las.
+"""
+from multiprocessing import resource_tracker, shared_memory
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from structures.livro_razao import LivroRazao
+
+_MAGICO = 0x4C4956524F  # "LIVRO"
+# Posições no cabeçalho de controle
+_H_MAGICO, _H_SEQUENCIA, _H_EPOCA, _H_LINHAS, _H_CAPACIDADE, _H_VERSAO, _H_FECHADO, _H_RASTREADOR = range(8)
+_TAMANHO_CABECALHO = 8 * 8
+_ALINHAMENTO = 64
+
+
+def _layout(capacidade: int) -> Tuple[Dict[str, int], int]:
+    """Deslocamento de cada coluna no segmento de dados e o tamanho total"""
+    deslocamentos, posicao = {}, 0
+    for nome, tipo in LivroRazao.COLUNAS.items():
+        deslocamentos[nome] = posicao
+        posicao += capacidade * np.dtype(tipo).itemsize
+        posicao = (posicao + _ALINHAMENTO - 1) // _ALINHAMENTO * _ALINHAMENTO
+    return deslocamentos, max(posicao, _ALINHAMENTO)
+
+
+class _ColunaCompartilhada(np.ndarray):
+    """
+    Coluna que mantém vivo o segmento de onde veio: o NumPy não impede que um
+    mmap seja fechado com arrays apontando para ele, então cada visão (e toda
+    fatia dela) guarda uma referência ao SharedMemory, que só é fechado pelo
+    coletor de lixo quando a última visão deixa de existir.
+    """
+
+    def __array_finalize__(self, origem):
+        self._segmento = getattr(origem, '_segmento', None)
+
+
+def _colunas(segmento: shared_memory.SharedMemory, capacidade: int, linhas: int,
+             somente_leitura: bool) -> Dict[str, np.ndarray]:
+    """Visões (sem cópia) das colunas de um segmento de dados"""
+    deslocamentos, _ = _layout(capacidade)
+    colunas = {}
+    for nome, tipo in LivroRazao.COLUNAS.items():
+        coluna = np.ndarray((linhas,), dtype=tipo, buffer=segmento.buf, offset=deslocamentos[nome])
+        if somente_leitura:
+            coluna = coluna.view(_ColunaCompartilhada)
+            coluna._segmento = segmento
+            coluna.flags.writeable = False
+        colunas[nome] = coluna
+    return colunas
+
+
+def _pid_rastreador() -> int:
+    """pid do resource_tracker usado por este processo (0 se ainda não há um)"""
+    return getattr(resource_tracker._resource_tracker, '_pid', None) or 0
+
+
+def _rastreador_herdado(pid_escritor: int) -> bool:
+    """True se este processo usa o mesmo resource_tracker do escritor (ele mesmo ou um filho seu)"""
+    rastreador = resource_tracker._resource_tracker
+    if getattr(rastreador, '_pid', None) is None:
+        # Filhos criados com 'spawn' recebem só o descritor do rastreador do pai
+        return getattr(rastreador, '_fd', None) is not None
+    return rastreador._pid == pid_escritor
+
+
+def _anexar(nome: str, pid_escritor: Optional[int] = None) -> shared_memory.SharedMemory:
+    """
+    Abre um segmento existente sem que o processo leitor passe a ser "dono" dele.
+    pid_escritor: pid do resource_tracker do escritor (None = ler do próprio cabeçalho de controle)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=nome, track=False)
+    segmento = shared_memory.SharedMemory(name=nome)
+    if pid_escritor is None:
+        pid_escritor = int(np.frombuffer(segmento.buf, dtype=np.int64, count=1, offset=8 * _H_RASTREADOR)[0])
+    # Antes do 3.13 quem só abre o segmento também o registra no resource_tracker, que o
+    # apagaria quando o LEITOR terminasse: o registro é desfeito logo depois de abrir. Com o
+    # rastreador do escritor o registro repetido não muda nada, e desfazê-lo tiraria o do escritor
+    if not _rastreador_herdado(pid_escritor):
+        resource_tracker.unregister(segmento._name, 'shared_memory')
+    return segmento
+
+
+class LivroCompartilhado:
+    """
+    ESCRITOR: publica as colunas de um LivroRazao em memória compartilhada
+
+    publicar() copia só as linhas novas desde a última chamada (O(linhas novas))
+    e depois avança o contador de linhas no cabeçalho. Outros processos abrem
+    com LeitorLivroCompartilhado(nome). fechar() apaga os segmentos.
+    """
+
+    def __init__(self, livro: LivroRazao, nome: Optional[str] = None, capacidade_minima: int = 1024):
+        self.capacidade_minima = max(1, capacidade_minima)
+        self._controle = shared_memory.SharedMemory(name=nome, create=True, size=_TAMANHO_CABECALHO)
+        self.nome = self._controle.name
+        self._cabecalho = np.ndarray((_TAMANHO_CABECALHO // 8,), dtype=np.int64, buffer=self._controle.buf)
+        self._cabecalho[:] = 0
+        self._cabecalho[_H_MAGICO] = _MAGICO
+        self._cabecalho[_H_RASTREADOR] = _pid_rastreador()
+        self._dados: Optional[shared_memory.SharedMemory] = None
+        self._colunas: Dict[str, np.ndarray] = {}
+        self._livro: Optional[LivroRazao] = None
+        self.epoca = 0
+        self.linhas = 0
+        self.capacidade = 0
+        self.fechado = False
+        self.publicar(livro)
+
+    def _escrever_cabecalho(self, campos: Dict[int, int]):
+        """Altera o cabeçalho dentro do seqlock (contador ímpar = escrita em andamento)"""
+        cabecalho = self._cabecalho
+        cabecalho[_H_SEQUENCIA] += 1
+        for posicao, valor in campos.items():
+            cabecalho[posicao] = valor
+        cabecalho[_H_SEQUENCIA] += 1
+
+    def _nova_epoca(self, livro: LivroRazao):
+        """Segmento novo, com folga para crescer, e cópia de todas as linhas"""
+        total = len(livro)
+        capacidade = max(self.capacidade_minima, 2 * total)
+        dados = shared_memory.SharedMemory(name=f'{self.nome}_{self.epoca + 1}', create=True,
+                                           size=_layout(capacidade)[1])
+        colunas = _colunas(dados, capacidade, capacidade, somente_leitura=False)
+        for nome, coluna in livro.colunas().items():
+            colunas[nome][:total] = coluna
+
+        antigo = self._dados
+        self._dados, self._colunas = dados, colunas
+        self.epoca, self.linhas, self.capacidade = self.epoca + 1, total, capacidade
+        self._escrever_cabecalho({_H_EPOCA: self.epoca, _H_LINHAS: total,
+                                  _H_CAPACIDADE: capacidade, _H_VERSAO: livro.versao})
+        if antigo is not None:
+            antigo.close()
+            antigo.unlink()  # leitores que ainda o mapeiam continuam com ele até fechar
+
+    def publicar(self, livro: Optional[LivroRazao] = None) -> int:
+        """
+        Torna visíveis aos leitores as linhas do livro (o mesmo de antes, ou um livro novo).
+        Retorna o número de linhas publicadas.
+        """
+        if self.fechado:
+            raise ValueError("LivroCompartilhado já foi fechado")
+        livro = livro if livro is not None else self._livro
+        total = len(livro)
+        if livro is self._livro and total == self.linhas:
+            return total
+        if livro is self._livro and self.linhas < total <= self.capacidade:
+            # Caso comum: só acrescenta no fim, no espaço que os leitores ainda não enxergam
+            for nome, coluna in livro.colunas().items():
+                self._colunas[nome][self.linhas:total] = coluna[self.linhas:]
+            self.linhas = total
+            self._escrever_cabecalho({_H_LINHAS: total, _H_VERSAO: livro.versao})
+        else:
+            self._nova_epoca(livro)  # livro trocado ou sem espaço
+        self._livro = livro
+        return total
+
+    def fechar(self):
+        """Avisa os leitores e apaga os segmentos (visões já abertas continuam válidas)"""
+        if self.fechado:
+            return
+        self._escrever_cabecalho({_H_FECHADO: 1})
+        self.fechado = True
+        self._colunas, self._cabecalho = {}, None
+        for segmento in (self._dados, self._controle):
+            if segmento is not None:
+                segmento.close()
+                segmento.unlink()
+        self._dados = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+
+class LeitorLivroCompartilhado:
+    """
+    LEITOR: abre, em outro processo, o livro publicado por um LivroCompartilhado
+
+    instantaneo() devolve as colunas como visões somente leitura da memória
+    compartilhada (nenhuma cópia), cortadas no número de linhas publicado no
+    momento da leitura: um retrato consistente, que não muda depois.
+    """
+
+    _TENTATIVAS = 1000
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._controle = _anexar(nome)
+        self._cabecalho = np.ndarray((_TAMANHO_CABECALHO // 8,), dtype=np.int64, buffer=self._controle.buf)
+        if self._cabecalho[_H_MAGICO] != _MAGICO:
+            self.fechar()
+            raise ValueError(f"Segmento {nome} não é um livro-razão compartilhado")
+        self._pid_escritor = int(self._cabecalho[_H_RASTREADOR])
+        self._dados: Optional[shared_memory.SharedMemory] = None
+        self._epoca_aberta = 0
+        self.epoca = 0
+        self.versao = -1
+        self.linhas = 0
+
+    def _ler_cabecalho(self) -> Tuple[int, int, int, int, int]:
+        """(época, linhas, capacidade, versão, fechado) de um mesmo instante (seqlock)"""
+        cabecalho = self._cabecalho
+        for _ in range(self._TENTATIVAS):
+            antes = int(cabecalho[_H_SEQUENCIA])
+            if antes % 2:
+                continue  # escrita em andamento
+            valores = (int(cabecalho[_H_EPOCA]), int(cabecalho[_H_LINHAS]), int(cabecalho[_H_CAPACIDADE]),
+                       int(cabecalho[_H_VERSAO]), int(cabecalho[_H_FECHADO]))
+            if int(cabecalho[_H_SEQUENCIA]) == antes:
+                return valores
+        raise TimeoutError(f"Cabeçalho de {self.nome} não estabilizou")
+
+    @property
+    def mudou(self) -> bool:
+        """True se o escritor publicou algo depois do último instantâneo (leitura barata)"""
+        epoca, linhas, _, versao, fechado = self._ler_cabecalho()
+        return fechado or (epoca, linhas, versao) != (self.epoca, self.linhas, self.versao)
+
+    def instantaneo(self) -> Dict[str, np.ndarray]:
+        """Colunas publicadas agora, como visões somente leitura (sem cópia)"""
+        if self._controle is None:
+            raise ValueError("Leitor já foi fechado")
+        for _ in range(self._TENTATIVAS):
+            epoca, linhas, capacidade, versao, fechado = self._ler_cabecalho()
+            if fechado:
+                raise ValueError(f"O livro compartilhado {self.nome} foi fechado pelo escritor")
+            if epoca != self._epoca_aberta:
+                try:
+                    dados = _anexar(f'{self.nome}_{epoca}', self._pid_escritor)
+                except FileNotFoundError:
+                    continue  # o escritor já passou para outra época: relê o cabeçalho
+                # A época anterior fica com as visões que ainda a usam (veja _ColunaCompartilhada)
+                self._dados, self._epoca_aberta = dados, epoca
+            self.epoca, self.linhas, self.versao = epoca, linhas, versao
+            return _colunas(self._dados, capacidade, linhas, somente_leitura=True)
+        raise TimeoutError(f"Não foi possível abrir a época atual de {self.nome}")
+
+    def livro(self) -> LivroRazao:
+        """Instantâneo como LivroRazao (somente leitura; acrescentar faz uma cópia local)"""
+        livro = LivroRazao.de_colunas(self.instantaneo())
+        livro.versao = self.versao
+        return livro
+
+    def fechar(self):
+        """Solta os segmentos; visões já entregues continuam válidas até deixarem de ser usadas"""
+        self._cabecalho = None
+        if self._controle is not None:
+            self._controle.close()
+        self._dados, self._controle = None, None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
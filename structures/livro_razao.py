@@ -0,0 +1,175 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class LivroRazao:
+    """
+    LIVRO-RAZÃO COLUNAR: Guarda os registros de consumo como colunas de números
+
+    Em vez de uma lista de objetos, cada campo vira um array NumPy:
+    - insumo: posição do insumo na lista de insumos do sistema
+    - dia: data do consumo como ordinal (date.toordinal())
+    - quantidade: unidades consumidas
+    - custo: custo total do registro, em centavos (int64: somas exatas)
+    - registros: quantos consumos a linha representa (1 no detalhe; mais em
+      linhas de agregado diário criadas pela retenção, veja system/retencao.py)
+
+    VANTAGEM: Somas, filtros e agrupamentos viram operações vetorizadas,
+    e as colunas podem ser enviadas para outros processos sem objetos Python.
+    Cresce dobrando a capacidade (append amortizado O(1)).
+    """
+
+    COLUNAS = {
+        'insumo': np.int32,
+        'dia': np.int32,
+        'quantidade': np.int64,
+        'custo': np.int64,
+        'registros': np.int32,
+    }
+
+    def __init__(self, capacidade: int = 1024):
+        self._dados: Dict[str, np.ndarray] = {
+            nome: np.zeros(max(1, capacidade), dtype=tipo) for nome, tipo in self.COLUNAS.items()
+        }
+        self._tamanho = 0
+        self.versao = 0  # aumenta a cada alteração (usado por caches)
+        self._indice_insumo = None  # (versao, ordem, inicios)
+        self._indice_dia = None     # (versao, ordem ou None, dias ordenados)
+        self._contagem_insumo = None  # linhas por insumo, mantida a cada append depois do 1º uso
+        self.em_ordem_cronologica = True  # mantido a cada append, sem varrer a coluna
+
+    @classmethod
+    def de_colunas(cls, colunas: Dict[str, np.ndarray]) -> 'LivroRazao':
+        """
+        Cria o livro usando os arrays recebidos diretamente, sem copiar
+        (ex.: arrays mapeados em memória de um snapshot).
+        A cópia só acontece se o livro precisar crescer.
+        """
+        tamanhos = {len(colunas[nome]) for nome in cls.COLUNAS}
+        if len(tamanhos) != 1:
+            raise ValueError("Todas as colunas do livro devem ter o mesmo tamanho")
+        livro = cls.__new__(cls)
+        livro._dados = {nome: colunas[nome] for nome in cls.COLUNAS}
+        livro._tamanho = tamanhos.pop()
+        livro.versao = 0
+        livro._indice_insumo = None
+        livro._indice_dia = None
+        livro._contagem_insumo = None
+        dias = livro._dados['dia']
+        livro.em_ordem_cronologica = len(dias) < 2 or bool(np.all(dias[1:] >= dias[:-1]))
+        return livro
+
+    def adicionar(self, insumo: int, dia: int, quantidade: int, custo: int, registros: int = 1):
+        """ADICIONAR: Acrescenta uma linha no final do livro"""
+        if self._tamanho == len(self._dados['dia']):
+            self._crescer(2 * self._tamanho)
+        i = self._tamanho
+        if i and dia < self._dados['dia'][i - 1]:
+            self.em_ordem_cronologica = False
+        self._dados['insumo'][i] = insumo
+        self._dados['dia'][i] = dia
+        self._dados['quantidade'][i] = quantidade
+        self._dados['custo'][i] = custo
+        self._dados['registros'][i] = registros
+        self._tamanho += 1
+        self.versao += 1
+        contagem = self._contagem_insumo
+        if contagem is not None:
+            if insumo >= len(contagem):
+                contagem = self._contagem_insumo = np.concatenate(
+                    (contagem, np.zeros(max(insumo + 1, 2 * len(contagem)) - len(contagem), dtype=np.int64)))
+            contagem[insumo] += 1
+
+    def _crescer(self, capacidade: int):
+        capacidade = max(capacidade, 1)
+        for nome, coluna in self._dados.items():
+            nova = np.zeros(capacidade, dtype=coluna.dtype)
+            nova[:self._tamanho] = coluna[:self._tamanho]
+            self._dados[nome] = nova
+
+    def coluna(self, nome: str) -> np.ndarray:
+        """Visão (sem cópia) da coluna com as linhas preenchidas"""
+        return self._dados[nome][:self._tamanho]
+
+    def colunas(self) -> Dict[str, np.ndarray]:
+        """Todas as colunas como visões (sem cópia)"""
+        return {nome: self.coluna(nome) for nome in self.COLUNAS}
+
+    def agregar_por_dia(self, linhas: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        AGREGADO DIÁRIO: soma as `linhas` por (dia, insumo), em ordem de dia e insumo.
+        Quantidade, custo e número de registros são somados de forma exata (inteiros).
+        """
+        dia, insumo = self.coluna('dia')[linhas], self.coluna('insumo')[linhas]
+        ordem = linhas[np.lexsort((insumo, dia))]
+        dia, insumo = self.coluna('dia')[ordem], self.coluna('insumo')[ordem]
+        novo_grupo = np.ones(len(ordem), dtype=bool)
+        novo_grupo[1:] = (dia[1:] != dia[:-1]) | (insumo[1:] != insumo[:-1])
+        inicios = np.flatnonzero(novo_grupo)
+        agregado = {'insumo': insumo[inicios], 'dia': dia[inicios]}
+        for nome in ('quantidade', 'custo', 'registros'):
+            agregado[nome] = (np.add.reduceat(self.coluna(nome)[ordem], inicios).astype(self.COLUNAS[nome])
+                              if len(ordem) else np.zeros(0, dtype=self.COLUNAS[nome]))
+        return agregado
+
+    def indice_por_insumo(self, n_insumos: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ÍNDICE POR INSUMO: linhas agrupadas por insumo, sem percorrer nada em Python.
+        As linhas do insumo p são ordem[inicios[p]:inicios[p + 1]] (em ordem cronológica de chegada).
+        Fica em cache até o livro mudar.
+        """
+        cache = self._indice_insumo
+        if cache is None or cache[0] != self.versao or len(cache[2]) < n_insumos + 1:
+            insumo = self.coluna('insumo')
+            ordem = np.argsort(insumo, kind='stable')
+            contagem = np.bincount(insumo, minlength=n_insumos)
+            inicios = np.concatenate(([0], np.cumsum(contagem))).astype(np.int64)
+            cache = (self.versao, ordem, inicios)
+            self._indice_insumo = cache
+        return cache[1], cache[2]
+
+    def indice_por_insumo_atual(self, n_insumos: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """O índice por insumo, só se já estiver montado para a versão atual (None = teria de reordenar)"""
+        cache = self._indice_insumo
+        if cache is not None and cache[0] == self.versao and len(cache[2]) >= n_insumos + 1:
+            return cache[1], cache[2]
+        return None
+
+    def contagem_por_insumo(self, n_insumos: int) -> np.ndarray:
+        """
+        Quantas linhas cada insumo tem. Um np.bincount no primeiro uso; depois cada
+        append soma 1 (O(1)), sem a reordenação que o índice por insumo precisaria.
+        """
+        contagem = self._contagem_insumo
+        if contagem is None:
+            contagem = np.bincount(self.coluna('insumo'), minlength=n_insumos).astype(np.int64)
+        if len(contagem) < n_insumos:
+            contagem = np.concatenate((contagem, np.zeros(n_insumos - len(contagem), dtype=np.int64)))
+        self._contagem_insumo = contagem
+        return contagem[:n_insumos]
+
+    def indice_por_dia(self) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        ÍNDICE POR DATA: (ordem, dias ordenados) para busca binária de períodos.
+        Se o livro já está em ordem cronológica (o caso normal), ordem é None e
+        nenhuma ordenação é feita — a própria coluna serve de índice.
+        """
+        cache = self._indice_dia
+        if cache is None or cache[0] != self.versao:
+            dias = self.coluna('dia')
+            if self.em_ordem_cronologica:
+                cache = (self.versao, None, dias)
+            else:
+                ordem = np.argsort(dias, kind='stable')
+                cache = (self.versao, ordem, dias[ordem])
+            self._indice_dia = cache
+        return cache[1], cache[2]
+
+    def definir_indice_por_insumo(self, ordem: np.ndarray, inicios: np.ndarray):
+        """Reaproveita um índice já calculado (ex.: carregado de um snapshot)"""
+        self._indice_insumo = (self.versao, ordem, inicios)
+        self._contagem_insumo = np.diff(inicios).astype(np.int64)
+
+    def __len__(self) -> int:
+        return self._tamanho
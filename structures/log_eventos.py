@@ -0,0 +1,169 @@
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+
+class LogEventos:
+    """
+    LOG DE EVENTOS (CDC): tudo o que muda no sistema, em ordem, com número de sequência
+
+    Cada evento é um dicionário {'sequencia', 'tipo', ...dados}. Os tipos são:
+    - 'consumo': um consumo registrado (insumo, data, quantidade, custo_centavos)
+    - 'estoque': o estoque de um insumo mudou (insumo, quantidade, variacao)
+    - 'insumo': um insumo foi adicionado ou alterado (insumo, acao, campos)
+    - 'anomalia': pico de consumo detectado (insumo, data, escopo, valor, esperado, escore)
+
+    As sequências só crescem (1, 2, 3...). Os últimos `retencao` eventos ficam
+    guardados, então quem anotou a última sequência que processou pode voltar
+    com assinar(desde=ultima + 1) e receber o que perdeu.
+
+    Cada assinante tem o próprio buffer limitado: um assinante lento enche o
+    seu buffer e passa a ler direto do log quando voltar, sem atrasar quem
+    publica nem os outros assinantes.
+    """
+
+    TIPOS = ('consumo', 'estoque', 'insumo', 'anomalia')
+
+    def __init__(self, retencao: int = 100_000, capacidade_padrao: int = 1024, proxima_sequencia: int = 1):
+        if retencao < 1 or capacidade_padrao < 1:
+            raise ValueError("retencao e capacidade_padrao devem ser >= 1")
+        self.capacidade_padrao = capacidade_padrao
+        self.proxima_sequencia = proxima_sequencia
+        self._eventos: deque = deque(maxlen=retencao)
+        self._assinaturas: List['Assinatura'] = []
+
+    @property
+    def primeira_sequencia(self) -> int:
+        """Sequência do evento mais antigo ainda guardado (= proxima_sequencia se vazio)"""
+        return self._eventos[0]['sequencia'] if self._eventos else self.proxima_sequencia
+
+    def __len__(self) -> int:
+        return len(self._eventos)
+
+    def publicar(self, tipo: str, **dados) -> int:
+        """Grava um evento e entrega aos assinantes interessados. Retorna a sequência dele"""
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Tipo de evento desconhecido: {tipo} (use {', '.join(self.TIPOS)})")
+        evento = {'sequencia': self.proxima_sequencia, 'tipo': tipo, **dados}
+        self.proxima_sequencia += 1
+        self._eventos.append(evento)
+        for assinatura in self._assinaturas:
+            assinatura._oferecer(evento)
+        return evento['sequencia']
+
+    def assinar(self, tipos: Optional[Iterable[str]] = None, desde: Optional[int] = None,
+                capacidade: Optional[int] = None) -> 'Assinatura':
+        """
+        Nova assinatura dos `tipos` pedidos (None = todos).
+        - desde: sequência a partir da qual receber (None = só eventos novos)
+        - capacidade: tamanho do buffer do assinante (padrão: capacidade_padrao)
+        Lança LookupError se `desde` for mais antigo que o log ainda guarda.
+        """
+        tipos = frozenset(self.TIPOS if tipos is None else tipos)
+        desconhecidos = tipos - set(self.TIPOS)
+        if desconhecidos:
+            raise ValueError(f"Tipos de evento desconhecidos: {', '.join(sorted(desconhecidos))}")
+        if desde is not None and desde > self.proxima_sequencia:
+            raise ValueError(f"Sequência {desde} ainda não existe (próxima: {self.proxima_sequencia})")
+        assinatura = Assinatura(self, tipos, capacidade or self.capacidade_padrao,
+                                self.proxima_sequencia if desde is None else desde)
+        if desde is not None and desde < self.proxima_sequencia:
+            assinatura.atrasada = True  # começa lendo o histórico direto do log
+            assinatura._verificar_retencao()
+        self._assinaturas.append(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: 'Assinatura'):
+        """Para de entregar eventos a uma assinatura"""
+        if assinatura in self._assinaturas:
+            assinatura._posicao = assinatura.posicao  # congela: daqui em diante nada mais chega
+            assinatura._ativa = False
+            self._assinaturas.remove(assinatura)
+
+    def _eventos_desde(self, sequencia: int, tipos: frozenset, limite: int) -> List[Dict]:
+        """Até `limite` eventos guardados dos `tipos`, a partir de `sequencia`"""
+        inicio = max(0, sequencia - self.primeira_sequencia)
+        return list(islice((e for e in islice(self._eventos, inicio, None) if e['tipo'] in tipos), limite))
+
+
+class Assinatura:
+    """
+    ASSINATURA: a "caixa de correio" de um consumidor do LogEventos
+
+    receber() devolve o próximo lote de eventos, sempre em ordem crescente de
+    sequência. `posicao` é a próxima sequência esperada: guarde-a para retomar
+    depois com log.assinar(desde=posicao).
+    """
+
+    def __init__(self, log: LogEventos, tipos: frozenset, capacidade: int, posicao: int):
+        if capacidade < 1:
+            raise ValueError("capacidade deve ser >= 1")
+        self._log = log
+        self.tipos = tipos
+        self.capacidade = capacidade
+        self._posicao = posicao
+        self._ativa = True
+        self.atrasada = False  # buffer encheu: o resto será lido do log
+        self.recebidos = 0
+        self._buffer: deque = deque()
+
+    @property
+    def posicao(self) -> int:
+        """
+        Próxima sequência esperada. Sem nada pendente (buffer vazio e sem atraso), é a
+        próxima do log: eventos de outros tipos publicados depois não a deixam para trás.
+        """
+        if self._ativa and not self._buffer and not self.atrasada:
+            return self._log.proxima_sequencia
+        return self._posicao
+
+    @posicao.setter
+    def posicao(self, valor: int):
+        self._posicao = valor
+
+    def _oferecer(self, evento: Dict):
+        if evento['tipo'] not in self.tipos:
+            return
+        if not self._buffer and not self.atrasada:
+            self._posicao = evento['sequencia']  # estava em dia: a posição passa a ser este evento
+        if self.atrasada or len(self._buffer) >= self.capacidade:
+            self.atrasada = True
+            return
+        self._buffer.append(evento)
+
+    def _verificar_retencao(self):
+        primeira = self._log.primeira_sequencia
+        if self.posicao < primeira:
+            raise LookupError(f"Eventos {self.posicao}..{primeira - 1} já saíram do log "
+                              f"(retomar a partir de {primeira} ou recarregar o estado)")
+
+    def _recuperar(self):
+        """Buffer vazio e atrasada: relê do log a partir da posição"""
+        self._verificar_retencao()
+        eventos = self._log._eventos_desde(self.posicao, self.tipos, self.capacidade)
+        self._buffer.extend(eventos)
+        ultimo_lido = eventos[-1]['sequencia'] if eventos else self._log.proxima_sequencia - 1
+        if not eventos:
+            self.posicao = ultimo_lido + 1  # o log foi lido até o fim sem nada dos tipos assinados
+        # Alcançou o fim do log? Então volta a receber direto no buffer
+        if len(eventos) < self.capacidade or ultimo_lido == self._log.proxima_sequencia - 1:
+            self.atrasada = False
+
+    @property
+    def pendentes(self) -> int:
+        """Eventos já no buffer, esperando receber()"""
+        return len(self._buffer)
+
+    def receber(self, maximo: Optional[int] = None) -> List[Dict]:
+        """Próximo lote (até `maximo` eventos; vazio se não há nada novo)"""
+        if not self._buffer and self.atrasada:
+            self._recuperar()
+        quantos = len(self._buffer) if maximo is None else min(maximo, len(self._buffer))
+        lote = [self._buffer.popleft() for _ in range(quantos)]
+        if lote:
+            self.posicao = lote[-1]['sequencia'] + 1
+            self.recebidos += len(lote)
+        return lote
+
+    def cancelar(self):
+        self._log.cancelar(self)
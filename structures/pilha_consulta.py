@@ -1,46 +1,107 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 from models.registro_consumo import RegistroConsumo
 
 class PilhaConsulta:
     """
     PILHA DE CONSULTA: Organiza os registros com os mais recentes primeiro (como pilha de pratos)
-    
+
     PRINCÍPIO: Último que entra é o primeiro que sai (LIFO - Last In, First Out)
     Use quando quiser ver os registros mais recentes primeiro
+
+    PROFUNDIDADE LIMITADA: guarda no máximo `profundidade_maxima` registros.
+    Quando enche, o registro mais antigo (o de baixo da pilha) é descartado,
+    então a memória não cresce com o tempo de uso. Use None para não limitar.
+
+    Por dentro é um buffer circular: empilhar, desempilhar e descartar são O(1)
+    e a paginação lê direto do buffer, sem copiar a pilha.
     """
-    
-    def __init__(self):
-        self.registros = []  # Lista vazia para guardar os registros
-    
+
+    PROFUNDIDADE_PADRAO = 1000
+
+    def __init__(self, profundidade_maxima: Optional[int] = PROFUNDIDADE_PADRAO):
+        if profundidade_maxima is not None and profundidade_maxima < 1:
+            raise ValueError("profundidade_maxima deve ser >= 1 (ou None para ilimitada)")
+        self.profundidade_maxima = profundidade_maxima
+        capacidade = profundidade_maxima if profundidade_maxima is not None else 16
+        self._buffer: List[Optional[RegistroConsumo]] = [None] * capacidade
+        self._base = 0        # posição no buffer do registro mais antigo
+        self._tamanho = 0
+        self._seq_base = 0    # número de sequência do registro mais antigo
+        self.descartados = 0  # quantos registros saíram por falta de espaço
+
+    def _posicao(self, indice: int) -> int:
+        """Posição no buffer do registro `indice` (0 = mais antigo)"""
+        return (self._base + indice) % len(self._buffer)
+
     def empilhar(self, registro: RegistroConsumo):
         """
         EMPILHAR: Adiciona um novo registro no topo da pilha
         Como colocar um prato limpo em cima da pilha
+        Se a pilha estiver cheia, o prato de baixo (mais antigo) é descartado
         """
-        self.registros.append(registro)
-    
+        if self._tamanho == len(self._buffer):
+            if self.profundidade_maxima is None:
+                self._crescer()
+            else:
+                # Descarta o mais antigo: o topo novo ocupa o lugar dele
+                self._buffer[self._base] = None
+                self._base = (self._base + 1) % len(self._buffer)
+                self._seq_base += 1
+                self._tamanho -= 1
+                self.descartados += 1
+        self._buffer[self._posicao(self._tamanho)] = registro
+        self._tamanho += 1
+
+    def _crescer(self):
+        """Pilha ilimitada: dobra o buffer mantendo a ordem"""
+        self._buffer = [self._buffer[self._posicao(i)] for i in range(self._tamanho)] + [None] * len(self._buffer)
+        self._base = 0
+
     def desempilhar(self) -> Optional[RegistroConsumo]:
         """
         DESEMPILHAR: Remove e retorna o último registro (o do topo)
         Como pegar o prato de cima da pilha
         """
         if not self.esta_vazia():
-            return self.registros.pop()  # Remove o último
+            posicao = self._posicao(self._tamanho - 1)
+            registro = self._buffer[posicao]
+            self._buffer[posicao] = None
+            self._tamanho -= 1
+            return registro
         return None
-    
+
     def topo(self) -> Optional[RegistroConsumo]:
         """
         VER TOPO: Mostra o último registro sem remover
         Como espiar o prato do topo sem pegá-lo
         """
         if not self.esta_vazia():
-            return self.registros[-1]  # Mostra o último
+            return self._buffer[self._posicao(self._tamanho - 1)]  # Mostra o último
         return None
-    
+
+    def pagina(self, quantidade: int, antes_de: Optional[int] = None) -> Tuple[List[RegistroConsumo], Optional[int]]:
+        """
+        PAGINAR: Os próximos `quantidade` registros mais antigos que o cursor `antes_de`
+        (do mais recente para o mais antigo). Sem cursor, começa pelo topo.
+
+        Retorna (registros, cursor). Passe o cursor na próxima chamada para continuar;
+        cursor None significa que não há mais registros. Só os registros da página são lidos.
+        """
+        fim = self._seq_base + self._tamanho if antes_de is None else min(antes_de, self._seq_base + self._tamanho)
+        inicio = max(self._seq_base, fim - max(0, quantidade))
+        registros = [self._buffer[self._posicao(seq - self._seq_base)] for seq in range(fim - 1, inicio - 1, -1)]
+        cursor = inicio if inicio > self._seq_base else None
+        return registros, cursor
+
+    @property
+    def registros(self) -> List[RegistroConsumo]:
+        """Cópia dos registros guardados, do mais antigo para o mais recente"""
+        return [self._buffer[self._posicao(i)] for i in range(self._tamanho)]
+
     def esta_vazia(self) -> bool:
         """VERIFICAR SE PILHA ESTÁ VAZIA"""
-        return len(self.registros) == 0
-    
+        return self._tamanho == 0
+
     def tamanho(self) -> int:
         """CONTAR REGISTROS: Quantos registros tem na pilha"""
-        return len(self.registros)
\ No newline at end of file
+        return self._tamanho
@@ -2,5 +2,8 @@
 PACOTE SYSTEM: Contém o sistema principal de gestão
 """
 from .sistema_consumo import SistemaConsumo
+from .rede_hospitalar import RedeHospitalar
+from .consulta import Consulta
+from .cenarios import Cenario
 
-__all__ = ['SistemaConsumo']
\ No newline at end of file
+__all__ = ['SistemaConsumo', 'RedeHospitalar', 'Consulta', 'Cenario']
\ No newline at end of file
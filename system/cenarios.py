@@ -0,0 +1,338 @@
+"""
+CENÁRIOS "E SE?": bifurcações baratas do sistema para simular compras.
+
+Perguntas como "e se o consumo de Luvas dobrar?" não precisam de uma cópia
+do SistemaConsumo inteiro. Todos os cenários criados a partir do mesmo
+estado do sistema compartilham uma BaseCenarios:
+- colunas do livro-razão (visões somente leitura, sem cópia: o livro só
+  cresce no fim, então as linhas [0, n) nunca mudam)
+- estoque e custo de cada insumo, em arrays criados uma única vez
+- a previsão de demanda da base, calculada uma vez por data/parâmetros
+
+Cada Cenario guarda só o que mudou nele (copy-on-write): estoques e custos
+alterados, fatores de consumo e um livro-razão pequeno com os consumos
+registrados ou simulados no cenário. A memória de centenas de cenários cresce
+com essas diferenças, não com o tamanho do sistema. O sistema original nunca
+é alterado.
+"""
+import operator
+import random
+import weakref
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from algorithms.otimizacao_compras import otimizar_compras
+from algorithms.previsao_demanda import PrevisaoDemanda
+from models.datas import para_dia
+from models.dinheiro import para_centavos
+from models.insumo import Insumo
+from structures.indice_trigramas import normalizar
+from structures.livro_razao import LivroRazao
+
+_COLUNAS = ('insumo', 'dia', 'quantidade')
+
+
+def _somente_leitura(array: np.ndarray) -> np.ndarray:
+    visao = array.view()
+    visao.flags.writeable = False
+    return visao
+
+
+class _InsumoCenario:
+    """Insumo visto de dentro de um cenário: estoque e custo do cenário, o resto do original"""
+
+    __slots__ = ('original', 'quantidade', 'custo_centavos')
+
+    def __init__(self, original: Insumo, quantidade: int, custo_centavos: int):
+        self.original = original
+        self.quantidade = quantidade
+        self.custo_centavos = custo_centavos
+
+    def __getattr__(self, nome):
+        # Só chega aqui o que não está nos slots; 'original' ausente (ex.: objeto ainda
+        # vazio no copy/pickle) e nomes especiais não vão para o original, senão recursão
+        if nome == 'original' or (nome.startswith('__') and nome.endswith('__')):
+            raise AttributeError(nome)
+        return getattr(self.original, nome)
+
+
+class BaseCenarios:
+    """
+    Estado do sistema no momento da bifurcação, compartilhado (somente leitura)
+    por todos os cenários criados a partir dele
+    """
+
+    def __init__(self, sistema):
+        self.insumos: List[Insumo] = list(sistema.insumos)
+        self.colunas = {nome: _somente_leitura(sistema.livro.coluna(nome)) for nome in _COLUNAS}
+        self.estoque = _somente_leitura(np.fromiter((i.quantidade for i in self.insumos),
+                                                    dtype=np.int64, count=len(self.insumos)))
+        self.custos = _somente_leitura(np.fromiter((i.custo_centavos for i in self.insumos),
+                                                   dtype=np.int64, count=len(self.insumos)))
+        dias = self.colunas['dia']
+        self.primeiro_dia: Optional[int] = int(dias.min()) if len(dias) else None
+        self.ultimo_dia: Optional[int] = int(dias.max()) if len(dias) else None
+        self._livro = weakref.ref(sistema.livro)
+        self._versao_livro = sistema.livro.versao
+        self._posicao_id = {insumo.id: p for p, insumo in enumerate(self.insumos)}
+        self._posicao_nome: Optional[Dict[str, int]] = None  # montados no primeiro uso
+        self._indice: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._visoes: Optional[List[_InsumoCenario]] = None
+        self._previsoes: Dict[Tuple, PrevisaoDemanda] = {}
+
+    def vale_para(self, sistema) -> bool:
+        """True se o sistema não mudou desde que a base foi criada (livro, catálogo, estoques, custos)"""
+        if self._livro() is not sistema.livro or sistema.livro.versao != self._versao_livro:
+            return False
+        if len(sistema.insumos) != len(self.insumos) or any(map(operator.is_not, sistema.insumos, self.insumos)):
+            return False
+        return (all(i.quantidade == q for i, q in zip(self.insumos, self.estoque.tolist()))
+                and all(i.custo_centavos == c for i, c in zip(self.insumos, self.custos.tolist())))
+
+    def posicao(self, insumo) -> int:
+        """Posição no catálogo da base (objeto Insumo ou nome, sem diferenciar maiúsculas nem acentos)"""
+        if isinstance(insumo, Insumo):
+            posicao = self._posicao_id.get(insumo.id)
+        else:
+            if self._posicao_nome is None:
+                self._posicao_nome = {normalizar(i.nome): p for p, i in enumerate(self.insumos)}
+            posicao = self._posicao_nome.get(normalizar(insumo))
+        if posicao is None:
+            raise KeyError(f"Insumo não encontrado no cenário: {insumo}")
+        return posicao
+
+    def linhas_dos_insumos(self, posicoes: np.ndarray) -> np.ndarray:
+        """Linhas do livro da base que pertencem aos insumos pedidos - O(linhas devolvidas)"""
+        if self._indice is None:
+            insumo = self.colunas['insumo']
+            ordem = np.argsort(insumo, kind='stable')
+            contagem = np.bincount(insumo, minlength=len(self.insumos))
+            self._indice = (ordem, np.concatenate(([0], np.cumsum(contagem))).astype(np.int64))
+        ordem, inicios = self._indice
+        partes = [ordem[inicios[p]:inicios[p + 1]] for p in posicoes.tolist() if p + 1 < len(inicios)]
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=np.int64)
+
+    def visoes(self) -> List[_InsumoCenario]:
+        """Os insumos com o estoque e o custo da base (criados uma vez, para todos os cenários)"""
+        if self._visoes is None:
+            self._visoes = [_InsumoCenario(i, q, c) for i, q, c in
+                            zip(self.insumos, self.estoque.tolist(), self.custos.tolist())]
+        return self._visoes
+
+    def previsao(self, data_referencia: int, parametros: Dict) -> PrevisaoDemanda:
+        """Previsão de demanda da base até a data (ordinal), calculada uma vez por data e parâmetros"""
+        chave = (data_referencia, tuple(sorted(parametros.items())))
+        previsao = self._previsoes.get(chave)
+        if previsao is None:
+            previsao = PrevisaoDemanda(self.visoes(), **parametros)
+            previsao.registrar_colunas(self.colunas['insumo'], self.colunas['dia'], self.colunas['quantidade'])
+            previsao.fechar_ate(date.fromordinal(data_referencia))
+            self._previsoes[chave] = previsao
+        return previsao
+
+
+class Cenario:
+    """
+    CENÁRIO "E SE?": uma bifurcação barata do SistemaConsumo
+
+    FUNCIONA COMO: Uma folha transparente sobre o sistema. O que está embaixo
+    (livro, estoques, custos) é lido direto da base compartilhada; o que o
+    cenário muda fica escrito só na folha.
+
+    - multiplicar_consumo: o histórico da base passa a valer `fator` vezes
+      para a previsão, e o consumo simulado no cenário também é multiplicado.
+      Consumos registrados no próprio cenário entram como foram registrados.
+    - definir_estoque / definir_custo: alteram só o cenário
+    - registrar_consumo / simular_consumo_diario: vão para o livro do cenário
+    - prever_demanda / otimizar_compras: mesmos resultados do sistema, mas
+      com os dados do cenário. Só os insumos que mudaram no cenário são
+      recalculados; os demais vêm da previsão da base, calculada uma vez.
+    - criar_cenario: bifurca de novo; o filho compartilha as linhas já
+      registradas no pai e copia só os dicionários de diferenças
+    """
+
+    def __init__(self, base: BaseCenarios, nome: str = '', pai: Optional['Cenario'] = None):
+        self.base = base
+        self.nome = nome
+        if pai is None:
+            self._camadas: Tuple[Dict[str, np.ndarray], ...] = ()  # consumos herdados de cenários pais
+            self._estoque: Dict[int, int] = {}    # posição → estoque no cenário
+            self._custos: Dict[int, int] = {}     # posição → custo unitário em centavos
+            self._fatores: Dict[int, float] = {}  # posição → multiplicador do consumo da base
+        else:
+            self._camadas = pai._camadas + ((pai._congelar(),) if len(pai.livro) else ())
+            self._estoque, self._custos, self._fatores = dict(pai._estoque), dict(pai._custos), dict(pai._fatores)
+        self.livro = LivroRazao(capacidade=16)  # consumos registrados neste cenário
+
+    def _congelar(self) -> Dict[str, np.ndarray]:
+        """Linhas atuais do livro do cenário como visões somente leitura (o livro só cresce no fim)"""
+        return {nome: _somente_leitura(self.livro.coluna(nome)) for nome in _COLUNAS}
+
+    def _colunas_proprias(self) -> Dict[str, np.ndarray]:
+        """Consumos do cenário (herdados dos pais + registrados nele), sem a base"""
+        camadas = self._camadas + (self.livro.colunas(),)
+        return {nome: np.concatenate([camada[nome] for camada in camadas]) for nome in _COLUNAS}
+
+    # ------------------------------------------------------------------
+    # Alterações (ficam só no cenário)
+    # ------------------------------------------------------------------
+    def _estoque_de(self, posicao: int) -> int:
+        return self._estoque.get(posicao, int(self.base.estoque[posicao]))
+
+    def _custo_de(self, posicao: int) -> int:
+        return self._custos.get(posicao, int(self.base.custos[posicao]))
+
+    def estoque(self, insumo) -> int:
+        """Estoque do insumo no cenário"""
+        return self._estoque_de(self.base.posicao(insumo))
+
+    def custo_centavos(self, insumo) -> int:
+        """Custo unitário do insumo no cenário, em centavos"""
+        return self._custo_de(self.base.posicao(insumo))
+
+    def definir_estoque(self, insumo, quantidade: int) -> 'Cenario':
+        self._estoque[self.base.posicao(insumo)] = int(quantidade)
+        return self
+
+    def definir_custo(self, insumo, custo_unitario: float) -> 'Cenario':
+        """Novo preço unitário em reais (ex.: "e se o fornecedor subir 20%?")"""
+        self._custos[self.base.posicao(insumo)] = para_centavos(custo_unitario)
+        return self
+
+    def multiplicar_consumo(self, insumo, fator: float) -> 'Cenario':
+        """Consumo do insumo vezes `fator` (acumula: dobrar duas vezes = 4×)"""
+        if fator < 0:
+            raise ValueError("fator não pode ser negativo")
+        posicao = self.base.posicao(insumo)
+        self._fatores[posicao] = self._fatores.get(posicao, 1.0) * fator
+        return self
+
+    def registrar_consumo(self, insumo, data, quantidade: int):
+        """Registra um consumo só no cenário (desconta o estoque do cenário)"""
+        posicao = self.base.posicao(insumo)
+        self.livro.adicionar(posicao, para_dia(data), quantidade, quantidade * self._custo_de(posicao))
+        self._estoque[posicao] = self._estoque_de(posicao) - quantidade
+
+    def simular_consumo_diario(self, dias: int = 30, inicio: Optional[date] = None,
+                               semente: Optional[int] = None) -> Dict[str, int]:
+        """
+        Simula consumo diário durante `dias` dias a partir de `inicio` (padrão: o dia
+        seguinte ao último consumo conhecido, ou amanhã), como
+        SistemaConsumo.simular_consumo_diario, com os fatores do cenário.
+        Retorna as unidades consumidas por insumo na simulação.
+        """
+        gerador = random.Random(semente)
+        if inicio is None:
+            inicio = date.fromordinal(max(date.today().toordinal(), self._ultimo_dia() or 0) + 1)
+        estoque = self.estoque_atual()
+        consumido: Dict[str, int] = {}
+        for dia in range(dias):
+            data = inicio + timedelta(days=dia)
+            disponiveis = np.flatnonzero(estoque > 0).tolist()
+            if not disponiveis:
+                continue
+            for posicao in gerador.sample(disponiveis, gerador.randint(1, min(3, len(disponiveis)))):
+                quantidade = round(gerador.randint(1, 5) * self._fatores.get(posicao, 1.0))
+                quantidade = min(int(estoque[posicao]), quantidade)
+                if quantidade <= 0:
+                    continue
+                insumo = self.base.insumos[posicao]
+                self.registrar_consumo(insumo, data, quantidade)
+                estoque[posicao] -= quantidade
+                consumido[insumo.nome] = consumido.get(insumo.nome, 0) + quantidade
+        return consumido
+
+    # ------------------------------------------------------------------
+    # Estado do cenário
+    # ------------------------------------------------------------------
+    def estoque_atual(self) -> np.ndarray:
+        """Estoque de todos os insumos (ordem do catálogo da base) - cópia da base + alterações"""
+        estoque = self.base.estoque.copy()
+        for posicao, quantidade in self._estoque.items():
+            estoque[posicao] = quantidade
+        return estoque
+
+    def _ultimo_dia(self) -> Optional[int]:
+        dias = [camada['dia'] for camada in self._camadas + (self.livro.colunas(),) if len(camada['dia'])]
+        ultimos = [int(d.max()) for d in dias] + ([self.base.ultimo_dia] if self.base.ultimo_dia is not None else [])
+        return max(ultimos) if ultimos else None
+
+    def _visoes(self) -> List[_InsumoCenario]:
+        """Insumos com estoque e custo do cenário (objetos novos só para os alterados)"""
+        visoes = list(self.base.visoes())
+        for posicao in self._estoque.keys() | self._custos.keys():
+            visoes[posicao] = _InsumoCenario(self.base.insumos[posicao], self._estoque_de(posicao),
+                                             self._custo_de(posicao))
+        return visoes
+
+    @property
+    def deltas(self) -> Dict[str, int]:
+        """Tamanho do que o cenário guarda além da base compartilhada"""
+        return {'estoques': len(self._estoque), 'custos': len(self._custos), 'fatores': len(self._fatores),
+                'consumos': len(self.livro) + sum(len(camada['dia']) for camada in self._camadas)}
+
+    # ------------------------------------------------------------------
+    # Previsão e compras
+    # ------------------------------------------------------------------
+    def prever_demanda(self, data_referencia=None, metodo: str = 'exponencial', **parametros):
+        """
+        Como SistemaConsumo.prever_demanda, com os dados do cenário.
+        data_referencia padrão: hoje, ou o último dia registrado no cenário se for depois.
+        Retorna dicionário {nome_insumo: {indicador: valor}}
+        """
+        proprias = self._colunas_proprias()
+        if data_referencia is None:
+            ultimo = int(proprias['dia'].max()) if len(proprias['dia']) else 0
+            data_referencia = date.fromordinal(max(date.today().toordinal(), ultimo))
+        resultado = self.base.previsao(data_referencia.toordinal(), parametros).resultado(metodo)
+
+        # Insumos que mudaram no cenário: consumo novo, fator ou estoque diferente
+        fatores = {p: f for p, f in self._fatores.items() if f != 1.0}
+        alterados = np.union1d(proprias['insumo'], list(fatores.keys() | self._estoque.keys())).astype(np.int64)
+        if len(proprias['dia']) and self.base.primeiro_dia is not None \
+                and int(proprias['dia'].min()) < self.base.primeiro_dia:
+            # Consumo anterior ao começo da base muda a primeira coluna de todos os insumos
+            alterados = np.arange(len(self.base.insumos), dtype=np.int64)
+
+        if len(alterados):
+            visoes = self._visoes()
+            parcial = PrevisaoDemanda([visoes[p] for p in alterados.tolist()], **parametros)
+            dias_iniciais = [d for d in (self.base.primeiro_dia, int(proprias['dia'].min()) if len(proprias['dia'])
+                                         else None) if d is not None]
+            if dias_iniciais:
+                # Um zero no primeiro dia alinha as colunas com as da previsão da base
+                parcial.registrar_colunas(np.zeros(1), np.array([min(dias_iniciais)]), np.zeros(1))
+            linhas = self.base.linhas_dos_insumos(alterados)
+            colunas = self.base.colunas
+            posicoes = np.searchsorted(alterados, colunas['insumo'][linhas])
+            escala = np.array([fatores.get(p, 1.0) for p in alterados.tolist()])
+            parcial.registrar_colunas(posicoes, colunas['dia'][linhas], colunas['quantidade'][linhas] * escala[posicoes])
+            parcial.registrar_colunas(np.searchsorted(alterados, proprias['insumo']), proprias['dia'],
+                                      proprias['quantidade'])
+            parcial.fechar_ate(data_referencia)
+            resultado_parcial = parcial.resultado(metodo)
+            resultado = {indicador: valores.copy() for indicador, valores in resultado.items()}
+            for indicador, valores in resultado.items():
+                valores[alterados] = resultado_parcial[indicador]
+
+        listas = {indicador: valores.tolist() for indicador, valores in resultado.items()}
+        return {
+            insumo.nome: {indicador: valores[linha] for indicador, valores in listas.items()}
+            for linha, insumo in enumerate(self.base.insumos)
+        }
+
+    def otimizar_compras(self, orcamento: float, horizonte: int = 30, vida_util=None,
+                         metodo: str = 'exponencial', data_referencia=None):
+        """Como SistemaConsumo.otimizar_compras, com demanda, estoque e custos do cenário"""
+        previsao = self.prever_demanda(data_referencia, metodo)
+        demanda = [previsao[insumo.nome][metodo] for insumo in self.base.insumos]
+        return otimizar_compras(self._visoes(), demanda, orcamento, horizonte=horizonte, vida_util=vida_util)
+
+    def criar_cenario(self, nome: str = '') -> 'Cenario':
+        """Novo cenário a partir deste (herda as alterações; as próximas de cada um ficam separadas)"""
+        return Cenario(self.base, nome, pai=self)
+
+    def __repr__(self):
+        return f"Cenario({self.nome!r}, {self.deltas})"
@@ -0,0 +1,274 @@
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+AGRUPAMENTOS = ('dia', 'semana', 'insumo', 'tipo')
+AGREGACOES = ('soma', 'contagem', 'media', 'maximo', 'minimo')
+COLUNAS_AGREGAVEIS = ('quantidade', 'custo')
+
+
+class Consulta:
+    """
+    CONSULTA DECLARATIVA: Descreva O QUE quer saber; o planejador decide COMO buscar
+
+    Exemplo:
+        sistema.consulta().tipo('reagente').periodo(inicio, fim) \\
+            .agrupar_por('semana').agregar(total=('quantidade', 'soma'))
+
+    Nada é calculado enquanto a consulta é montada (avaliação preguiçosa).
+    Ao executar, o planejador:
+    1. Resolve os filtros de insumo (nome, tipo, validade) no catálogo,
+       usando o índice de nomes e o índice de validades;
+    2. Escolhe o índice do livro que gera MENOS linhas candidatas —
+       índice por insumo ou índice por data (busca binária) — ou a varredura completa.
+       As linhas por insumo vêm de uma contagem mantida a cada append; se o índice
+       ordenado não estiver atualizado, as linhas saem de um filtro vetorizado;
+    3. Aplica os filtros restantes como máscaras NumPy só sobre as candidatas;
+    4. Agrupa e agrega de forma vetorizada.
+    """
+
+    def __init__(self, sistema):
+        self._sistema = sistema
+        self._tipos: Optional[set] = None
+        self._nomes: Optional[set] = None
+        self._periodo: Tuple[Optional[int], Optional[int]] = (None, None)
+        self._quantidade: Tuple[Optional[int], Optional[int]] = (None, None)
+        self._validade: Tuple[Optional[int], Optional[int]] = (None, None)
+        self._grupos: Tuple[str, ...] = ()
+        self._agregacoes: Dict[str, Tuple[str, str]] = {}
+        self._plano: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Montagem (cada método devolve a própria consulta)
+    # ------------------------------------------------------------------
+    def tipo(self, *tipos: str) -> 'Consulta':
+        """Filtra pelo tipo do insumo ('reagente', 'descartavel')"""
+        self._tipos = {t.lower() for t in tipos}
+        return self
+
+    def insumo(self, *nomes: str) -> 'Consulta':
+        """Filtra pelo nome do insumo (sem diferenciar maiúsculas nem acentos)"""
+        self._nomes = set(nomes)
+        return self
+
+    def periodo(self, inicio: Optional[date] = None, fim: Optional[date] = None) -> 'Consulta':
+        """Filtra pela data do consumo (inclusive nas duas pontas)"""
+        self._periodo = (inicio.toordinal() if inicio else None, fim.toordinal() if fim else None)
+        return self
+
+    def quantidade(self, minimo: Optional[int] = None, maximo: Optional[int] = None) -> 'Consulta':
+        """Filtra pela quantidade consumida em cada registro (inclusive)"""
+        self._quantidade = (minimo, maximo)
+        return self
+
+    def validade(self, inicio: Optional[date] = None, fim: Optional[date] = None) -> 'Consulta':
+        """Filtra pela validade do insumo (inclusive)"""
+        self._validade = (inicio.toordinal() if inicio else None, fim.toordinal() if fim else None)
+        return self
+
+    def agrupar_por(self, *chaves: str) -> 'Consulta':
+        """Agrupa por 'dia', 'semana' (segunda-feira), 'insumo' e/ou 'tipo'"""
+        for chave in chaves:
+            if chave not in AGRUPAMENTOS:
+                raise ValueError(f"Agrupamento desconhecido: {chave} (use {', '.join(AGRUPAMENTOS)})")
+        self._grupos = chaves
+        return self
+
+    def agregar(self, **agregacoes: Tuple[str, str]) -> 'Consulta':
+        """
+        Define os resultados: nome=(coluna, função).
+        Colunas: 'quantidade', 'custo'. Funções: soma, contagem, media, maximo, minimo.
+        Em dias já compactados pela retenção, maximo/minimo e o filtro de quantidade
+        enxergam o total do dia por insumo (o detalhe de cada consumo não existe mais).
+        """
+        for nome, (coluna, funcao) in agregacoes.items():
+            if coluna not in COLUNAS_AGREGAVEIS:
+                raise ValueError(f"Coluna não agregável: {coluna}")
+            if funcao not in AGREGACOES:
+                raise ValueError(f"Agregação desconhecida: {funcao}")
+        self._agregacoes = dict(agregacoes)
+        return self
+
+    # ------------------------------------------------------------------
+    # Planejamento
+    # ------------------------------------------------------------------
+    def _insumos_permitidos(self) -> Optional[np.ndarray]:
+        """Posições de insumo que passam nos filtros de catálogo (None = todos)"""
+        insumos = self._sistema.insumos
+        permitidos: Optional[np.ndarray] = None
+
+        if self._nomes is not None:
+            # Índice de nomes do sistema: todas as posições de cada nome, sem varrer o catálogo
+            posicoes = {p for n in self._nomes for p in self._sistema.posicoes_por_nome(n)}
+            permitidos = np.array(sorted(posicoes), dtype=np.int64)
+            self._plano.append(f"índice de nomes: {len(permitidos)} insumo(s)")
+
+        if self._validade != (None, None):
+            # Índice de validades: catálogo ordenado por validade (em cache no sistema) + busca binária
+            ordem, validades = self._sistema.indice_validades
+            inicio, fim = self._validade
+            a = 0 if inicio is None else np.searchsorted(validades, inicio, 'left')
+            b = len(ordem) if fim is None else np.searchsorted(validades, fim, 'right')
+            por_validade = np.sort(ordem[a:b])
+            permitidos = por_validade if permitidos is None else np.intersect1d(permitidos, por_validade)
+            self._plano.append(f"índice de validades: {len(por_validade)} insumo(s)")
+
+        if self._tipos is not None:
+            por_tipo = np.array([p for p, i in enumerate(insumos) if i.tipo.lower() in self._tipos], dtype=np.int64)
+            permitidos = por_tipo if permitidos is None else np.intersect1d(permitidos, por_tipo)
+            self._plano.append(f"filtro de tipo no catálogo: {len(por_tipo)} insumo(s)")
+
+        return permitidos
+
+    def _linhas_candidatas(self, permitidos: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], bool, bool]:
+        """
+        Escolhe o índice mais seletivo. Retorna (linhas ou None = todas,
+        filtro_de_insumo_já_aplicado, filtro_de_período_já_aplicado).
+        """
+        livro = self._sistema.livro
+        total = len(livro)
+        opcoes = [('varredura completa', total)]
+
+        n_insumos = len(self._sistema.insumos)
+        if permitidos is not None:
+            # Estimativa pela contagem mantida a cada append: planejar não reordena o livro
+            n_por_insumo = int(livro.contagem_por_insumo(n_insumos)[permitidos].sum())
+            opcoes.append(('índice por insumo', n_por_insumo))
+
+        inicio, fim = self._periodo
+        if (inicio, fim) != (None, None):
+            ordem_dia, dias = livro.indice_por_dia()
+            a = 0 if inicio is None else int(np.searchsorted(dias, inicio, 'left'))
+            b = total if fim is None else int(np.searchsorted(dias, fim, 'right'))
+            opcoes.append(('índice por data', b - a))
+
+        escolha, estimativa = min(opcoes, key=lambda o: o[1])
+        self._plano.append(f"acesso: {escolha} (~{estimativa} de {total} linhas)")
+
+        if escolha == 'índice por insumo':
+            indice = livro.indice_por_insumo_atual(n_insumos)
+            if indice is None:
+                # Índice desatualizado (o livro cresceu): reordenar custaria mais que uma varredura
+                self._plano.append("índice por insumo desatualizado: filtro vetorizado na coluna insumo")
+                return np.flatnonzero(np.isin(livro.coluna('insumo'), permitidos)), True, False
+            ordem, inicios = indice
+            linhas = np.concatenate([ordem[inicios[p]:inicios[p + 1]] for p in permitidos.tolist()] or
+                                    [np.zeros(0, dtype=np.int64)])
+            return np.sort(linhas), True, False
+        if escolha == 'índice por data':
+            linhas = np.arange(a, b) if ordem_dia is None else np.sort(ordem_dia[a:b])
+            return linhas, False, True
+        return None, False, False
+
+    def explicar(self) -> List[str]:
+        """Mostra o plano escolhido (sem executar a agregação)"""
+        self._plano = []
+        self._linhas_candidatas(self._insumos_permitidos())
+        return list(self._plano)
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    def _filtrar(self) -> Dict[str, np.ndarray]:
+        """Colunas (só das linhas que passam em todos os filtros)"""
+        self._plano = []
+        permitidos = self._insumos_permitidos()
+        linhas, insumo_ok, periodo_ok = self._linhas_candidatas(permitidos)
+
+        colunas = self._sistema.livro.colunas()
+        if linhas is not None:
+            colunas = {nome: coluna[linhas] for nome, coluna in colunas.items()}
+
+        mascara = np.ones(len(colunas['dia']), dtype=bool)
+        if permitidos is not None and not insumo_ok:
+            mascara &= np.isin(colunas['insumo'], permitidos)
+        inicio, fim = self._periodo
+        if not periodo_ok:
+            if inicio is not None:
+                mascara &= colunas['dia'] >= inicio
+            if fim is not None:
+                mascara &= colunas['dia'] <= fim
+        minimo, maximo = self._quantidade
+        if minimo is not None:
+            mascara &= colunas['quantidade'] >= minimo
+        if maximo is not None:
+            mascara &= colunas['quantidade'] <= maximo
+
+        if not mascara.all():
+            colunas = {nome: coluna[mascara] for nome, coluna in colunas.items()}
+        return colunas
+
+    def _chave_grupo(self, chave: str, colunas: Dict[str, np.ndarray]) -> np.ndarray:
+        if chave == 'dia':
+            return colunas['dia'].astype(np.int64)
+        if chave == 'semana':
+            dias = colunas['dia'].astype(np.int64)
+            return dias - (dias - 1) % 7  # ordinal 1 (01/01/0001) é segunda-feira
+        if chave == 'insumo':
+            return colunas['insumo'].astype(np.int64)
+        tipos = sorted({i.tipo for i in self._sistema.insumos})
+        codigo_por_posicao = np.array([tipos.index(i.tipo) for i in self._sistema.insumos], dtype=np.int64)
+        return codigo_por_posicao[colunas['insumo']] if len(codigo_por_posicao) else colunas['insumo'].astype(np.int64)
+
+    def _decodificar(self, chave: str, valor: int):
+        if chave in ('dia', 'semana'):
+            return date.fromordinal(valor)
+        if chave == 'insumo':
+            return self._sistema.insumos[valor].nome
+        return sorted({i.tipo for i in self._sistema.insumos})[valor]
+
+    def executar(self) -> List[Dict]:
+        """Executa a consulta e devolve uma lista de dicionários (um por grupo)"""
+        return list(self)
+
+    def __iter__(self) -> Iterator[Dict]:
+        colunas = self._filtrar()
+        agregacoes = self._agregacoes or {'quantidade': ('quantidade', 'soma'), 'registros': ('quantidade', 'contagem')}
+        n = len(colunas['dia'])
+
+        if self._grupos:
+            chaves = np.stack([self._chave_grupo(c, colunas) for c in self._grupos], axis=1) if n else \
+                np.zeros((0, len(self._grupos)), dtype=np.int64)
+            grupos, inverso = np.unique(chaves, axis=0, return_inverse=True)
+            inverso = inverso.reshape(-1)
+        else:
+            grupos = np.zeros((1, 0), dtype=np.int64)
+            inverso = np.zeros(n, dtype=np.int64)
+        n_grupos = len(grupos)
+
+        linhas = np.bincount(inverso, minlength=n_grupos)
+        # Contagem de consumos: linhas de agregado diário valem pelos registros que somam
+        contagem = np.zeros(n_grupos, dtype=np.int64)
+        np.add.at(contagem, inverso, colunas['registros'])
+        resultados = {}
+        for nome, (coluna, funcao) in agregacoes.items():
+            # Colunas inteiras (quantidade, custo em centavos): somas e extremos exatos em int64
+            valores = colunas[coluna].astype(np.int64)
+            if funcao == 'contagem':
+                resultados[nome] = contagem
+            elif funcao in ('soma', 'media'):
+                soma = np.zeros(n_grupos, dtype=np.int64)
+                np.add.at(soma, inverso, valores)
+                resultados[nome] = soma if funcao == 'soma' else np.divide(
+                    soma, contagem, out=np.zeros(n_grupos), where=contagem > 0)
+            else:
+                limite = np.iinfo(np.int64)
+                extremo = np.full(n_grupos, limite.min if funcao == 'maximo' else limite.max, dtype=np.int64)
+                (np.maximum if funcao == 'maximo' else np.minimum).at(extremo, inverso, valores)
+                resultados[nome] = np.where(linhas > 0, extremo, np.nan)
+
+        for g in range(n_grupos):
+            linha = {chave: self._decodificar(chave, int(grupos[g, k])) for k, chave in enumerate(self._grupos)}
+            for nome, (coluna, funcao) in agregacoes.items():
+                valor = resultados[nome][g]
+                if not np.isfinite(valor):
+                    valor = None
+                elif funcao == 'contagem' or (coluna == 'quantidade' and funcao != 'media'):
+                    valor = int(valor)
+                elif coluna == 'custo':
+                    valor = float(valor) / 100  # centavos → reais só na saída
+                else:
+                    valor = float(valor)
+                linha[nome] = valor
+            yield linha
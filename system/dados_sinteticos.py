@@ -0,0 +1,205 @@
+"""
+DADOS SINTÉTICOS: catálogo e consumo gerados de forma determinística (semente),
+em qualquer escala, para testes de carga e benchmarks.
+
+Uso: python -m system.dados_sinteticos destino.snap --insumos 40000 --eventos 100000000
+
+O resultado é um snapshot comum (veja system/snapshot.py): abra com
+SistemaConsumo.carregar_snapshot(destino). Os eventos são gerados e gravados
+em blocos, então a memória usada não depende do número de eventos.
+"""
+import argparse
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from models.insumo import Insumo
+from structures.livro_razao import LivroRazao
+from system.snapshot import criar_snapshot
+
+# Eventos gerados (e gravados) por vez: limita a memória usada pelo gerador
+TAMANHO_BLOCO = 1 << 20
+
+NOMES_BASE = {
+    'reagente': ['Reagente', 'Tampão', 'Corante', 'Anticorpo', 'Enzima', 'Meio de Cultura'],
+    'descartavel': ['Luvas', 'Máscaras', 'Tubos', 'Agulhas', 'Seringas', 'Gaze', 'Ponteiras'],
+}
+
+# Situação da validade → faixa de dias a partir de hoje (por tipo quando difere)
+FAIXAS_VALIDADE = {
+    'dentro': {'reagente': (60, 365), 'descartavel': (90, 730)},
+    'proximo': {'reagente': (1, 30), 'descartavel': (1, 30)},
+    'vencido_recente': {'reagente': (-30, -1), 'descartavel': (-30, -1)},
+    'muito_vencido': {'reagente': (-365, -31), 'descartavel': (-365, -31)},
+}
+DISTRIBUICAO_VALIDADE = {'dentro': 0.70, 'proximo': 0.15, 'vencido_recente': 0.10, 'muito_vencido': 0.05}
+
+CUSTO_MEDIANO = {'reagente': 20.0, 'descartavel': 2.0}  # custo unitário típico (R$)
+MAX_POR_EVENTO = {'reagente': 5, 'descartavel': 20}     # unidades consumidas por evento
+
+# Peso de cada dia da semana (segunda = 0): fim de semana tem menos consumo
+PESOS_SEMANA = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 0.6, 0.5])
+
+
+def gerar_insumos(n_insumos: int, semente: int = 42, fracao_reagentes: float = 0.5,
+                  distribuicao_validade: Optional[Dict[str, float]] = None,
+                  dispersao_custo: float = 0.5, hoje: Optional[date] = None) -> List[Insumo]:
+    """
+    Catálogo sintético de `n_insumos` itens.
+    - fracao_reagentes: proporção de reagentes (o resto é descartável)
+    - distribuicao_validade: probabilidade de cada situação de FAIXAS_VALIDADE
+    - dispersao_custo: sigma do custo log-normal em torno de CUSTO_MEDIANO
+    """
+    if not 0.0 <= fracao_reagentes <= 1.0:
+        raise ValueError("fracao_reagentes deve estar entre 0 e 1")
+    distribuicao = distribuicao_validade or DISTRIBUICAO_VALIDADE
+    situacoes = list(distribuicao)
+    probabilidades = np.array([distribuicao[s] for s in situacoes], dtype=np.float64)
+    probabilidades /= probabilidades.sum()
+    hoje_dia = (hoje or date.today()).toordinal()
+
+    rng = np.random.default_rng([semente, 0])
+    reagente = rng.random(n_insumos) < fracao_reagentes
+    situacao = rng.choice(len(situacoes), size=n_insumos, p=probabilidades)
+    sorteio_validade = rng.random(n_insumos)
+    variacao_custo = rng.normal(0.0, dispersao_custo, n_insumos)
+    estoque = rng.integers(20, 1001, n_insumos)
+    base = rng.integers(0, 1 << 30, n_insumos)
+
+    largura = len(str(n_insumos))
+    insumos = []
+    for i in range(n_insumos):
+        tipo = 'reagente' if reagente[i] else 'descartavel'
+        minimo, maximo = FAIXAS_VALIDADE[situacoes[situacao[i]]][tipo]
+        dias = minimo + int(sorteio_validade[i] * (maximo - minimo + 1))
+        custo = max(0.01, round(CUSTO_MEDIANO[tipo] * float(np.exp(variacao_custo[i])), 2))
+        nomes = NOMES_BASE[tipo]
+        nome = f"{nomes[int(base[i]) % len(nomes)]} {i + 1:0{largura}d}"
+        insumos.append(Insumo(i + 1, nome, int(estoque[i]), None, tipo, custo, validade_dia=hoje_dia + dias))
+    return insumos
+
+
+def gerar_eventos(insumos: List[Insumo], n_eventos: int, semente: int = 42, dias: int = 365,
+                  concentracao: float = 1.0, hoje: Optional[date] = None,
+                  tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Eventos de consumo em ordem cronológica, em blocos de `tamanho_bloco` linhas
+    no formato das colunas do LivroRazao (custo em centavos).
+    - dias: período coberto (terminando hoje), com menos consumo nos fins de semana
+    - concentracao: expoente da popularidade (lei de Zipf; 0 = todos iguais)
+    O resultado só depende dos parâmetros (inclusive tamanho_bloco), nunca da máquina.
+    """
+    n_insumos = len(insumos)
+    if n_insumos == 0 and n_eventos:
+        raise ValueError("Não há insumos para gerar eventos")
+    hoje = hoje or date.today()
+    primeiro_dia = hoje.toordinal() - dias + 1
+
+    rng = np.random.default_rng([semente, 1])
+    # Quantos eventos cai em cada dia: sorteio multinomial com o peso do dia da semana
+    pesos_dia = PESOS_SEMANA[(np.arange(primeiro_dia, primeiro_dia + dias) - 1) % 7]
+    fim_do_dia = np.cumsum(rng.multinomial(n_eventos, pesos_dia / pesos_dia.sum()))
+    # Popularidade: pesos de Zipf distribuídos em ordem aleatória pelo catálogo
+    popularidade = 1.0 / np.arange(1, n_insumos + 1) ** concentracao
+    popularidade_acumulada = np.cumsum(rng.permutation(popularidade))
+    popularidade_acumulada /= popularidade_acumulada[-1] if n_insumos else 1.0
+
+    custos = np.array([i.custo_centavos for i in insumos], dtype=np.int64)
+    maximos = np.array([MAX_POR_EVENTO.get(i.tipo, 10) for i in insumos], dtype=np.int64)
+
+    for numero, inicio in enumerate(range(0, n_eventos, tamanho_bloco)):
+        fim = min(n_eventos, inicio + tamanho_bloco)
+        rng = np.random.default_rng([semente, 2, numero])
+        linhas = np.arange(inicio, fim)
+        posicao = np.minimum(np.searchsorted(popularidade_acumulada, rng.random(fim - inicio), 'right'),
+                             n_insumos - 1).astype(np.int32)
+        quantidade = 1 + (rng.random(fim - inicio) * maximos[posicao]).astype(np.int64)
+        yield {
+            'insumo': posicao,
+            'dia': (primeiro_dia + np.searchsorted(fim_do_dia, linhas, 'right')).astype(np.int32),
+            'quantidade': quantidade,
+            'custo': quantidade * custos[posicao],
+            'registros': np.ones(fim - inicio, dtype=np.int32),
+        }
+
+
+def gerar_dataset(caminho: str, n_insumos: int, n_eventos: int, semente: int = 42,
+                  tamanho_bloco: int = TAMANHO_BLOCO, **parametros) -> Dict:
+    """
+    Gera catálogo + eventos direto em um snapshot, bloco a bloco.
+    Os parâmetros extras vão para gerar_insumos/gerar_eventos
+    (fracao_reagentes, distribuicao_validade, dispersao_custo, dias, concentracao, hoje).
+    Também grava o índice por insumo (em uma segunda passada pelo arquivo),
+    para o sistema carregado já ter as consultas por insumo prontas.
+    Retorna os metadados gravados.
+    """
+    de_insumos = {k: parametros.pop(k) for k in ('fracao_reagentes', 'distribuicao_validade',
+                                                 'dispersao_custo') if k in parametros}
+    if 'hoje' in parametros:
+        de_insumos['hoje'] = parametros['hoje']
+    insumos = gerar_insumos(n_insumos, semente=semente, **de_insumos)
+
+    metadados = {
+        'fila_completa': True, 'pilha_completa': True,
+        'sintetico': {'semente': semente, 'insumos': n_insumos, 'eventos': n_eventos,
+                      'tamanho_bloco': tamanho_bloco},
+    }
+    formatos = {f'livro.{nome}': (dtype, n_eventos) for nome, dtype in LivroRazao.COLUNAS.items()}
+    formatos['indice.insumo.ordem'] = (np.int64, n_eventos)
+    formatos['indice.insumo.inicios'] = (np.int64, n_insumos + 1)
+    arrays = criar_snapshot(caminho, insumos, formatos, metadados)
+
+    contagem = np.zeros(n_insumos, dtype=np.int64)
+    inicio = 0
+    for bloco in gerar_eventos(insumos, n_eventos, semente=semente, tamanho_bloco=tamanho_bloco, **parametros):
+        fim = inicio + len(bloco['insumo'])
+        for nome, coluna in bloco.items():
+            arrays[f'livro.{nome}'][inicio:fim] = coluna
+        contagem += np.bincount(bloco['insumo'], minlength=n_insumos)
+        inicio = fim
+
+    # Índice por insumo sem ordenar o arquivo inteiro: cada bloco ordena só as suas
+    # linhas e as coloca a partir do cursor do insumo (mesmo resultado do argsort estável)
+    inicios = arrays['indice.insumo.inicios']
+    inicios[0] = 0
+    np.cumsum(contagem, out=inicios[1:])
+    cursor = np.array(inicios[:-1])
+    coluna_insumo = arrays['livro.insumo']
+    for inicio in range(0, n_eventos, tamanho_bloco):
+        insumo = np.asarray(coluna_insumo[inicio:inicio + tamanho_bloco])
+        ordem = np.argsort(insumo, kind='stable')
+        ordenado = insumo[ordem]
+        contagem_bloco = np.bincount(ordenado, minlength=n_insumos)
+        primeira_do_grupo = np.cumsum(contagem_bloco) - contagem_bloco
+        posicao_no_grupo = np.arange(len(ordenado)) - primeira_do_grupo[ordenado]
+        arrays['indice.insumo.ordem'][cursor[ordenado] + posicao_no_grupo] = inicio + ordem
+        cursor += contagem_bloco
+
+    for array in arrays.values():
+        if isinstance(array, np.memmap):
+            array.flush()
+    return metadados
+
+
+def main(argumentos: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Gera um snapshot sintético para testes de carga")
+    parser.add_argument('destino', help="arquivo do snapshot a criar")
+    parser.add_argument('--insumos', type=int, default=40_000)
+    parser.add_argument('--eventos', type=int, default=1_000_000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--fracao-reagentes', type=float, default=0.5)
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO)
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    gerar_dataset(args.destino, args.insumos, args.eventos, semente=args.semente, tamanho_bloco=args.bloco,
+                  dias=args.dias, fracao_reagentes=args.fracao_reagentes)
+    print(f"✅ {args.eventos:,} eventos de {args.insumos:,} insumos em {args.destino} "
+          f"({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+MEMÓRIA: quem está ocupando a RAM do sistema?
+
+- relatorio_memoria: tamanho "profundo" de cada componente do SistemaConsumo
+  (objetos compartilhados contam uma vez só, para o primeiro componente que os guarda)
+- MonitorMemoria: fotos do tracemalloc ao longo do tempo (bytes por registro e
+  por pacote do projeto)
+
+Uso: python -m system.memoria --insumos 1000 --eventos 200000 --materializar
+"""
+import argparse
+import mmap
+import os
+import sys
+import tempfile
+import tracemalloc
+import types
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from tabulate import tabulate
+
+_RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ATOMICOS = (str, bytes, int, float, complex, bool, type(None))
+_IGNORADOS = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _medir(obj, vistos: set) -> Tuple[int, int]:
+    """(bytes na memória do processo, bytes de arrays mapeados de arquivo) alcançáveis a partir de obj"""
+    memoria = mapeado = 0
+    pendentes = [obj]
+    while pendentes:
+        o = pendentes.pop()
+        if id(o) in vistos or isinstance(o, _IGNORADOS):
+            continue
+        vistos.add(id(o))
+
+        if isinstance(o, np.ndarray):
+            if isinstance(o, np.memmap) or isinstance(o.base, mmap.mmap):
+                mapeado += o.nbytes
+                memoria += sys.getsizeof(o) - (o.nbytes if o.flags.owndata else 0)
+            elif o.base is not None:
+                memoria += sys.getsizeof(o)  # visão: os dados são contados no array de origem
+                pendentes.append(o.base)
+            else:
+                memoria += sys.getsizeof(o)  # cabeçalho + dados
+            continue
+        if isinstance(o, mmap.mmap):
+            mapeado += len(o)
+            continue
+        if hasattr(o, 'memory_usage') and hasattr(o, 'index'):  # DataFrame / Series do pandas
+            memoria += int(np.sum(o.memory_usage(deep=True)))
+            continue
+
+        memoria += sys.getsizeof(o)
+        if isinstance(o, _ATOMICOS):
+            continue
+        if isinstance(o, dict):
+            pendentes.extend(o.keys())
+            pendentes.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            pendentes.extend(o)
+        atributos = getattr(o, '__dict__', None)
+        if atributos is not None and id(atributos) not in vistos:
+            # Nomes de atributos são compartilhados por todas as instâncias: só os valores importam
+            vistos.add(id(atributos))
+            memoria += sys.getsizeof(atributos)
+            pendentes.extend(atributos.values())
+        for classe in type(o).__mro__:
+            for nome in getattr(classe, '__slots__', ()):
+                if hasattr(o, nome):
+                    pendentes.append(getattr(o, nome))
+    return memoria, mapeado
+
+
+def tamanho_profundo(obj, vistos: Optional[set] = None) -> int:
+    """
+    Bytes ocupados por obj e tudo o que ele alcança (listas, dicionários, atributos,
+    arrays NumPy, DataFrames). Passe o mesmo `vistos` para não contar duas vezes
+    objetos compartilhados. Arrays mapeados de arquivo (snapshots) não entram.
+    """
+    return _medir(obj, set() if vistos is None else vistos)[0]
+
+
+def relatorio_memoria(sistema, extras: Optional[Dict[str, object]] = None) -> Dict:
+    """
+    RELATÓRIO DE MEMÓRIA por componente do sistema.
+    A ordem importa: os insumos vêm primeiro e os registros completos antes da
+    fila e da pilha, então fila/pilha só pagam pelas próprias listas (os registros
+    são os mesmos objetos). Não materializa registros de um snapshot.
+    - extras: outros objetos a medir junto, por nome (ex.: {'dataframe': df})
+    Retorna {'componentes': {nome: bytes}, 'mapeado', 'total', 'registros', 'bytes_por_registro'}
+    """
+    componentes = [
+        ('insumos', sistema.insumos),
+        ('registros_completos', sistema._registros_completos),
+        ('fila_consumo', sistema._fila_consumo),
+        ('pilha_consulta', sistema._pilha_consulta),
+        ('livro', sistema.livro),
+        ('historico_estoque', sistema._historico_estoque),
+        ('estatisticas_janela', sistema._estatisticas_janela),
+        ('cubo_consumo', sistema._cubo_consumo),
+        ('previsao', sistema.previsao),
+        ('base_cenarios', sistema._base_cenarios),
+        ('cache_pd', sistema.cache_pd),
+        ('indice_nomes', sistema._indice_nomes),
+        ('eventos', sistema.eventos),
+        ('detector_anomalias', sistema.detector_anomalias),
+        ('cache_dataframe', sistema._cache_dataframe),
+        ('restauracao', sistema._restauracao),
+    ] + list((extras or {}).items())
+
+    vistos = {id(sistema)}
+    tamanhos, mapeado = {}, 0
+    for nome, componente in componentes:
+        memoria, mapeado_componente = _medir(componente, vistos)
+        tamanhos[nome] = memoria
+        mapeado += mapeado_componente
+    total = sum(tamanhos.values())
+    registros = len(sistema.livro)
+    return {
+        'componentes': tamanhos,
+        'mapeado': mapeado,
+        'total': total,
+        'registros': registros,
+        'bytes_por_registro': total / registros if registros else 0.0,
+    }
+
+
+def _pacote(nome_arquivo: str) -> str:
+    """Pacote do projeto (models, structures...) ou biblioteca responsável por um arquivo"""
+    if nome_arquivo.startswith('<'):  # '<frozen importlib._bootstrap>', '<string>'...
+        return 'python'
+    caminho = os.path.abspath(nome_arquivo)
+    if caminho.startswith(_RAIZ_PROJETO + os.sep):
+        return os.path.relpath(caminho, _RAIZ_PROJETO).split(os.sep)[0]
+    for biblioteca in ('numpy', 'pandas', 'matplotlib'):
+        if f"{os.sep}{biblioteca}{os.sep}" in caminho:
+            return biblioteca
+    return 'python'
+
+
+class MonitorMemoria:
+    """
+    MONITOR DE MEMÓRIA: tira fotos do tracemalloc em momentos marcados.
+    Cada foto guarda o total alocado, o pico, os bytes por registro e quanto
+    cada pacote (models, structures, system, numpy...) alocou até ali.
+
+        with MonitorMemoria() as monitor:
+            ...
+            monitor.marcar("depois de carregar", len(sistema.livro))
+    """
+
+    def __init__(self, quadros: int = 1):
+        self.quadros = quadros
+        self.historico: List[Dict] = []
+        self._iniciou_tracemalloc = False
+
+    def iniciar(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.quadros)
+            self._iniciou_tracemalloc = True
+        return self
+
+    def parar(self):
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def __enter__(self) -> 'MonitorMemoria':
+        return self.iniciar()
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+    def marcar(self, rotulo: str, registros: int = 0) -> Dict:
+        """Foto do momento atual (o pico é zerado para medir só o próximo trecho)"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Monitor não iniciado: use iniciar() ou 'with MonitorMemoria()'")
+        atual, pico = tracemalloc.get_traced_memory()
+        por_pacote: Dict[str, int] = {}
+        for estatistica in tracemalloc.take_snapshot().statistics('filename'):
+            pacote = _pacote(estatistica.traceback[0].filename)
+            por_pacote[pacote] = por_pacote.get(pacote, 0) + estatistica.size
+        tracemalloc.reset_peak()
+        marca = {
+            'rotulo': rotulo,
+            'registros': registros,
+            'bytes': atual,
+            'pico': pico,
+            'bytes_por_registro': atual / registros if registros else 0.0,
+            'por_pacote': dict(sorted(por_pacote.items(), key=lambda item: -item[1])),
+        }
+        self.historico.append(marca)
+        return marca
+
+
+def _mib(n: float) -> str:
+    return f"{n / 2 ** 20:,.1f} MiB"
+
+
+def formatar_relatorio_memoria(relatorio: Dict, historico: Optional[List[Dict]] = None) -> str:
+    """Tabelas (tabulate) do relatório por componente e, se houver, do histórico do monitor"""
+    linhas = [(nome, _mib(b), f"{100 * b / relatorio['total']:.1f}%" if relatorio['total'] else "-")
+              for nome, b in sorted(relatorio['componentes'].items(), key=lambda item: -item[1])]
+    texto = ["🧠 MEMÓRIA POR COMPONENTE:",
+             tabulate(linhas, headers=["Componente", "Memória", "%"]),
+             f"Total: {_mib(relatorio['total'])} | Mapeado de arquivo: {_mib(relatorio['mapeado'])} | "
+             f"{relatorio['bytes_por_registro']:.1f} bytes/registro ({relatorio['registros']:,} registros)"]
+    if historico:
+        linhas = [(m['rotulo'], f"{m['registros']:,}", _mib(m['bytes']), _mib(m['pico']),
+                   f"{m['bytes_por_registro']:.1f}",
+                   ", ".join(f"{p}={_mib(b)}" for p, b in list(m['por_pacote'].items())[:3]))
+                  for m in historico]
+        texto += ["", "📈 EVOLUÇÃO (tracemalloc):",
+                  tabulate(linhas, headers=["Etapa", "Registros", "Alocado", "Pico", "Bytes/registro",
+                                            "Maiores pacotes"])]
+    return "\n".join(texto)
+
+
+def main(argumentos: Optional[List[str]] = None):
+    from system.dados_sinteticos import gerar_dataset
+    from system.sistema_consumo import SistemaConsumo
+    from visualization.visualizador_dados import VisualizadorDados
+
+    parser = argparse.ArgumentParser(description="Relatório de memória sobre um dataset sintético")
+    parser.add_argument('--snapshot', help="snapshot existente (senão um dataset é gerado)")
+    parser.add_argument('--insumos', type=int, default=1000)
+    parser.add_argument('--eventos', type=int, default=200_000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--materializar', action='store_true',
+                        help="cria também os objetos RegistroConsumo (fila, pilha e registros completos)")
+    parser.add_argument('--dataframe', action='store_true',
+                        help="monta também o DataFrame dos gráficos (direto do livro, em cache)")
+    args = parser.parse_args(argumentos)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = args.snapshot
+        if caminho is None:
+            caminho = os.path.join(pasta, 'sintetico.snap')
+            gerar_dataset(caminho, args.insumos, args.eventos, semente=args.semente)
+
+        with MonitorMemoria() as monitor:
+            sistema = SistemaConsumo.carregar_snapshot(caminho)
+            monitor.marcar("snapshot carregado", len(sistema.livro))
+            sistema.historico_estoque, sistema.estatisticas_janela, sistema.indice_nomes
+            monitor.marcar("índices montados", len(sistema.livro))
+            if args.materializar:
+                sistema.registros_completos
+                monitor.marcar("registros materializados", len(sistema.livro))
+            if args.dataframe:
+                VisualizadorDados.criar_dataframe_consumo(sistema)  # fica em sistema._cache_dataframe
+                monitor.marcar("DataFrame dos gráficos", len(sistema.livro))
+
+        # A contagem profunda roda com o tracemalloc desligado (ele deixaria tudo bem mais lento)
+        print(formatar_relatorio_memoria(relatorio_memoria(sistema), monitor.historico))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import heapq
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.datas import VENCENDO, classificar_validades, dias_validade
+from models.insumo import Insumo
+from models.registro_consumo import RegistroConsumo
+from structures.livro_compartilhado import LeitorLivroCompartilhado
+from system.sistema_consumo import SistemaConsumo
+
+
+def _agregar_particao(particao: Dict, hoje: int, dias_limite: int) -> Dict:
+    """
+    MAP: roda dentro de um processo trabalhador, sobre UMA unidade.
+    Recebe só arrays (colunas do livro e dados dos insumos) — ou o nome do
+    livro em memória compartilhada — e devolve agregados parciais pequenos,
+    nunca os registros.
+    """
+    if 'livro_compartilhado' in particao:
+        with LeitorLivroCompartilhado(particao['livro_compartilhado']) as leitor:
+            return _agregar_colunas(leitor.instantaneo(), particao, hoje, dias_limite)
+    return _agregar_colunas(particao['colunas'], particao, hoje, dias_limite)
+
+
+def _agregar_colunas(colunas: Dict[str, np.ndarray], particao: Dict, hoje: int, dias_limite: int) -> Dict:
+    """Agregados parciais de uma unidade a partir das colunas do livro"""
+    nomes = particao['nomes']
+    quantidade = colunas['quantidade']
+
+    consumo_por_posicao = np.bincount(colunas['insumo'], weights=quantidade, minlength=len(nomes))
+
+    _, situacao = classificar_validades(particao['validades'], hoje, dias_limite)
+    vencendo = np.flatnonzero((particao['estoques'] > 0) & (situacao == VENCENDO))
+
+    return {
+        'registros': int(colunas['registros'].sum()),
+        'consumo_total': int(quantidade.sum()),
+        'custo_centavos': int(colunas['custo'].sum()),
+        'consumo_por_insumo': {nomes[p]: int(v) for p, v in enumerate(consumo_por_posicao) if v},
+        'vencendo': [(nomes[p], int(particao['validades'][p]), int(particao['estoques'][p])) for p in vencendo],
+    }
+
+
+class RedeHospitalar:
+    """
+    REDE HOSPITALAR: Um SistemaConsumo por unidade (partição), coordenados juntos
+
+    FUNCIONA COMO: Cada hospital tem o seu almoxarifado. As escritas vão direto
+    para a unidade certa; as perguntas da rede inteira são respondidas com
+    map/reduce — cada processo trabalhador agrega uma unidade e devolve só
+    os totais parciais, que o coordenador junta.
+
+    max_processos: tamanho do pool (None = número de núcleos; 1 = tudo no processo atual)
+    compartilhar_livros: os trabalhadores leem o livro de cada unidade da memória
+    compartilhada (SistemaConsumo.compartilhar_livro) em vez de recebê-lo serializado,
+    então cada consulta custa o mesmo com 1 mil ou 10 milhões de registros (padrão).
+    False volta a serializar as colunas a cada consulta. Sem processos trabalhadores
+    (max_processos=1) o livro é lido direto, sem cópia, nos dois modos.
+    """
+
+    def __init__(self, max_processos: Optional[int] = None, compartilhar_livros: bool = True):
+        self.unidades: Dict[str, SistemaConsumo] = {}
+        self.max_processos = max_processos
+        self.compartilhar_livros = compartilhar_livros
+        self._executor: Optional[Executor] = None
+
+    # ------------------------------------------------------------------
+    # Partições e escrita
+    # ------------------------------------------------------------------
+    def adicionar_unidade(self, nome: str, sistema: Optional[SistemaConsumo] = None) -> SistemaConsumo:
+        """Cria (ou registra) a partição de uma unidade"""
+        if nome in self.unidades:
+            raise ValueError(f"Unidade já cadastrada: {nome}")
+        self.unidades[nome] = sistema if sistema is not None else SistemaConsumo()
+        return self.unidades[nome]
+
+    def unidade(self, nome: str) -> SistemaConsumo:
+        """Partição de uma unidade (KeyError se não existir)"""
+        if nome not in self.unidades:
+            raise KeyError(f"Unidade desconhecida: {nome}")
+        return self.unidades[nome]
+
+    def registrar_consumo(self, unidade: str, insumo: Insumo, data: date, quantidade: int) -> RegistroConsumo:
+        """Roteia o registro para a partição da unidade"""
+        return self.unidade(unidade).registrar_consumo(insumo, data, quantidade)
+
+    # ------------------------------------------------------------------
+    # Map/reduce
+    # ------------------------------------------------------------------
+    def _particao(self, sistema: SistemaConsumo, em_processo: bool = True) -> Dict:
+        """Empacota uma unidade só com arrays contíguos (baratos de serializar)"""
+        particao = {
+            'nomes': [i.nome for i in sistema.insumos],
+            'validades': dias_validade(sistema.insumos),
+            'estoques': np.array([i.quantidade for i in sistema.insumos], dtype=np.int64),
+        }
+        if self.compartilhar_livros and em_processo:
+            particao['livro_compartilhado'] = sistema.compartilhar_livro().nome  # só o nome viaja
+        else:
+            particao['colunas'] = sistema.livro.colunas()
+        return particao
+
+    def _mapear(self, hoje: Optional[date] = None, dias_limite: int = 30) -> Dict[str, Dict]:
+        """Executa _agregar_particao em todas as unidades, em paralelo quando possível"""
+        hoje_ord = (hoje or date.today()).toordinal()
+        nomes = list(self.unidades)
+        em_processo = not (self.max_processos == 1 or len(nomes) <= 1)
+        particoes = [self._particao(self.unidades[n], em_processo) for n in nomes]
+
+        if not em_processo:
+            parciais = [_agregar_particao(p, hoje_ord, dias_limite) for p in particoes]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_processos)
+            futuros = [self._executor.submit(_agregar_particao, p, hoje_ord, dias_limite) for p in particoes]
+            parciais = [f.result() for f in futuros]
+        return dict(zip(nomes, parciais))
+
+    def totais(self) -> Dict:
+        """REDUCE: totais de consumo, custo e registros da rede inteira (e por unidade)"""
+        parciais = self._mapear()
+        return {
+            'registros': sum(p['registros'] for p in parciais.values()),
+            'consumo_total': sum(p['consumo_total'] for p in parciais.values()),
+            'custo_total': sum(p['custo_centavos'] for p in parciais.values()) / 100,
+            'por_unidade': {u: p['consumo_total'] for u, p in parciais.items()},
+        }
+
+    def top_insumos(self, n: int = 5) -> List[Tuple[str, int]]:
+        """REDUCE: insumos mais consumidos somando todas as unidades"""
+        soma: Dict[str, int] = {}
+        for parcial in self._mapear().values():
+            for nome, qtd in parcial['consumo_por_insumo'].items():
+                soma[nome] = soma.get(nome, 0) + qtd
+        return heapq.nlargest(n, soma.items(), key=lambda item: item[1])
+
+    def insumos_vencendo(self, dias_limite: int = 30, hoje: Optional[date] = None) -> List[Tuple[str, str, date, int]]:
+        """REDUCE: (unidade, insumo, validade, estoque) com validade nos próximos dias, do mais urgente"""
+        resultado = []
+        for unidade, parcial in self._mapear(hoje, dias_limite).items():
+            for nome, validade, estoque in parcial['vencendo']:
+                resultado.append((unidade, nome, date.fromordinal(validade), estoque))
+        resultado.sort(key=lambda item: item[2])
+        return resultado
+
+    def fechar(self):
+        """Encerra o pool de processos (e a memória compartilhada dos livros, se usada)"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.compartilhar_livros:
+            for sistema in self.unidades.values():
+                sistema.parar_compartilhamento()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
@@ -0,0 +1,223 @@
+import csv
+import html
+import io
+import sys
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from tabulate import tabulate
+
+from models.dinheiro import formatar_reais
+
+# Tamanho do buffer de escrita (as linhas são acumuladas e gravadas em blocos)
+TAMANHO_BUFFER = 1 << 16
+
+
+class Secao:
+    """
+    SEÇÃO DO RELATÓRIO: título + colunas + um GERADOR de linhas.
+    As linhas são produzidas uma a uma a partir de dados já calculados,
+    então o relatório nunca monta uma lista com tudo na memória.
+    - texto: como cada linha aparece no formato texto (recebe posição e linha)
+    """
+
+    def __init__(self, titulo: str, colunas: Sequence[str], linhas: Callable[[], Iterable[Tuple]],
+                texto: Callable[[int, Tuple], str], largura: int = 40):
+        self.titulo = titulo
+        self.colunas = list(colunas)
+        self.linhas = linhas
+        self.texto = texto
+        self.largura = largura
+
+
+# ----------------------------------------------------------------------
+# Escritores (um por formato)
+# ----------------------------------------------------------------------
+class EscritorTexto:
+    """Formato original do sistema: texto com ícones, pronto para o terminal"""
+
+    def __init__(self, saida: io.TextIOBase):
+        self.saida = saida
+
+    def inicio(self, titulo: str):
+        self.saida.write("=" * 80 + "\n" + titulo + "\n" + "=" * 80 + "\n")
+
+    def secao(self, secao: Secao):
+        self.saida.write(f"\n{secao.titulo}\n" + "-" * secao.largura + "\n")
+        for posicao, linha in enumerate(secao.linhas()):
+            self.saida.write(secao.texto(posicao, linha) + "\n")
+
+    def fim(self):
+        pass
+
+
+class EscritorMarkdown(EscritorTexto):
+    """Markdown: cada seção vira uma tabela do tabulate (formato GitHub)"""
+
+    def inicio(self, titulo: str):
+        self.saida.write(f"# {titulo}\n")
+
+    def secao(self, secao: Secao):
+        self.saida.write(f"\n## {secao.titulo}\n\n")
+        # O tabulate precisa ver a seção inteira para alinhar as colunas;
+        # as seções são pequenas (limitadas pelo catálogo ou por um top-N)
+        linhas = list(secao.linhas())
+        if linhas:
+            self.saida.write(tabulate(linhas, headers=secao.colunas, tablefmt='github') + "\n")
+        else:
+            self.saida.write("_Sem dados_\n")
+
+
+class EscritorHTML(EscritorTexto):
+    """HTML simples: uma <table> por seção, escrita linha a linha"""
+
+    def inicio(self, titulo: str):
+        self.saida.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(titulo)}"
+                        f"</title></head>\n<body>\n<h1>{html.escape(titulo)}</h1>\n")
+
+    def secao(self, secao: Secao):
+        self.saida.write(f"<h2>{html.escape(secao.titulo)}</h2>\n<table>\n<tr>")
+        self.saida.write("".join(f"<th>{html.escape(c)}</th>" for c in secao.colunas) + "</tr>\n")
+        for linha in secao.linhas():
+            self.saida.write("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in linha) + "</tr>\n")
+        self.saida.write("</table>\n")
+
+    def fim(self):
+        self.saida.write("</body></html>\n")
+
+
+class EscritorCSV(EscritorTexto):
+    """CSV: a primeira coluna identifica a seção; cada seção tem o seu cabeçalho"""
+
+    def __init__(self, saida: io.TextIOBase):
+        super().__init__(saida)
+        self._csv = csv.writer(saida)
+
+    def inicio(self, titulo: str):
+        pass
+
+    def secao(self, secao: Secao):
+        self._csv.writerow(['secao'] + secao.colunas)
+        for linha in secao.linhas():
+            self._csv.writerow([secao.titulo] + list(linha))
+
+
+ESCRITORES = {
+    'texto': EscritorTexto,
+    'markdown': EscritorMarkdown,
+    'html': EscritorHTML,
+    'csv': EscritorCSV,
+}
+
+
+@contextmanager
+def _abrir_destino(destino) -> Iterator[io.TextIOBase]:
+    """Aceita None (stdout), caminho de arquivo ou objeto de arquivo; sempre com buffer"""
+    if destino is None:
+        yield sys.stdout
+        sys.stdout.flush()
+    elif isinstance(destino, str):
+        with open(destino, 'w', encoding='utf-8', newline='', buffering=TAMANHO_BUFFER) as saida:
+            yield saida
+    else:
+        yield destino
+
+
+# ----------------------------------------------------------------------
+# Seções do relatório completo
+# ----------------------------------------------------------------------
+def formatar_linha_livro(sistema, linha: int) -> str:
+    """Mesmo formato de RegistroConsumo.__str__, mas lido direto das colunas do livro"""
+    livro = sistema.livro
+    insumo = sistema.insumos[int(livro.coluna('insumo')[linha])]
+    data = date.fromordinal(int(livro.coluna('dia')[linha]))
+    return (f"{data}: {insumo.nome} - {int(livro.coluna('quantidade')[linha])} unidades"
+            f" - {formatar_reais(livro.coluna('custo')[linha])}")
+
+
+def secoes_relatorio_completo(sistema, nome_busca: str = "Reagente A") -> List[Secao]:
+    """
+    Monta as seções do relatório completo. Tudo sai de dados já prontos:
+    somas e filtros vetorizados nas colunas do livro e as páginas da fila/pilha.
+    """
+    livro = sistema.livro
+    n_registros = int(livro.coluna('registros').sum())  # inclui os consumos já agregados
+
+    def estoque():
+        for insumo in sistema.insumos:
+            yield insumo.nome, insumo.quantidade, insumo.validade
+
+    def estatisticas():
+        yield "Total de insumos", len(sistema.insumos)
+        yield "Total de registros", n_registros
+        if n_registros:
+            yield "Consumo total", f"{int(livro.coluna('quantidade').sum())} unidades"
+            yield "Custo total", formatar_reais(livro.coluna('custo').sum())
+
+    def primeiros_fila():
+        for texto in sistema.primeiros_da_fila(3):
+            yield (texto,)
+
+    def ultimos_pilha():
+        for texto in sistema.ultimos_da_pilha(3):
+            yield (texto,)
+
+    def busca():
+        # Usa o índice por insumo só se já estiver atualizado; senão um filtro vetorizado O(n)
+        # na coluna, em vez de reordenar o livro inteiro para um único relatório
+        # Todos os insumos com esse nome, como na busca sequencial original
+        alvos = [p for p, i in enumerate(sistema.insumos) if i.nome.lower() == nome_busca.lower()]
+        if not alvos:
+            return
+        indice = livro.indice_por_insumo_atual(len(sistema.insumos))
+        if indice is not None:
+            ordem, inicios = indice
+            linhas = np.sort(np.concatenate([ordem[inicios[p]:inicios[p + 1]] for p in alvos]))
+        else:
+            linhas = np.flatnonzero(np.isin(livro.coluna('insumo'), alvos))
+        for linha in linhas[:2].tolist():
+            yield (formatar_linha_livro(sistema, linha),)
+        if len(linhas) > 2:
+            yield (f"... e mais {len(linhas) - 2} registros",)
+
+    def ordenacao():
+        # Os 3 primeiros registros ordenados por quantidade (ordenação estável, como o merge sort)
+        quantidades = livro.coluna('quantidade')[:3]
+        for linha in np.argsort(quantidades, kind='stable').tolist():
+            yield sistema.insumos[int(livro.coluna('insumo')[linha])].nome, int(quantidades[linha])
+
+    secoes = [
+        Secao("📦 ESTOQUE ATUAL:", ["Insumo", "Quantidade", "Validade"], estoque,
+            lambda i, l: f"• {l[0]}: {l[1]} unidades (Validade: {l[2]})"),
+        Secao("📊 ESTATÍSTICAS:", ["Indicador", "Valor"], estatisticas,
+            lambda i, l: f"• {l[0]}: {l[1]}"),
+        Secao("⏰ PRIMEIROS REGISTROS (FILA - ORDEM CRONOLÓGICA):", ["Registro"], primeiros_fila,
+            lambda i, l: f"{i+1}. {l[0]}", largura=60),
+        Secao("🔙 ÚLTIMOS REGISTROS (PILHA - ORDEM INVERSA):", ["Registro"], ultimos_pilha,
+            lambda i, l: f"{i+1}. {l[0]}", largura=60),
+        Secao(f"🔍 BUSCA SEQUENCIAL ('{nome_busca}'):", ["Registro"], busca,
+            lambda i, l: l[0] if l[0].startswith("...") else f"{i+1}. {l[0]}"),
+    ]
+    if n_registros:
+        secoes.append(Secao("📊 ORDENAÇÃO POR QUANTIDADE (TOP 3):", ["Insumo", "Quantidade"], ordenacao,
+                            lambda i, l: f"{i+1}. {l[0]}: {l[1]} unidades"))
+    return secoes
+
+
+def escrever_relatorio(secoes: Iterable[Secao], destino=None, formato: str = 'texto',
+                    titulo: str = "📋 RELATÓRIO COMPLETO DO SISTEMA"):
+    """
+    ESCREVER RELATÓRIO: passa cada seção pelo escritor do formato escolhido.
+    - destino: None (tela), caminho de arquivo ou objeto de arquivo
+    - formato: 'texto', 'markdown', 'html' ou 'csv'
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de relatório desconhecido: {formato} (use {', '.join(ESCRITORES)})")
+    with _abrir_destino(destino) as saida:
+        escritor = ESCRITORES[formato](saida)
+        escritor.inicio(titulo)
+        for secao in secoes:
+            escritor.secao(secao)
+        escritor.fim()
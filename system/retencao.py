@@ -0,0 +1,96 @@
+"""
+RETENÇÃO EM CAMADAS: detalhe para os dias recentes, agregado diário para o resto.
+
+- Camada quente: cada consumo dos últimos `dias_detalhe` dias, como registrado.
+- Camada fria: uma linha por (dia, insumo) com a soma de quantidade, custo e
+  número de registros, para tudo o que é mais antigo.
+
+As duas camadas vivem no mesmo LivroRazao (as linhas frias vêm primeiro, em
+ordem de dia e insumo) e em registros_completos (um RegistroConsumo por linha),
+então consultas, relatórios e gráficos somam as duas sem saber que existem.
+Os totais por dia — e portanto o estoque histórico, as janelas e a previsão —
+não mudam. A memória passa a crescer com (insumos × dias), não com o número de
+consumos. Fila e pilha guardam só registros da camada quente.
+"""
+from typing import Dict
+
+import numpy as np
+
+from models.registro_consumo import RegistroConsumo
+from structures.fila_consumo import FilaConsumo
+from structures.livro_razao import LivroRazao
+from structures.pilha_consulta import PilhaConsulta
+
+
+def compactar_historico(sistema, corte: int) -> Dict[str, int]:
+    """
+    Agrega por (dia, insumo) todos os registros com dia < `corte` (ordinal).
+    As linhas frias já existentes (sistema.linhas_compactadas) são reaproveitadas;
+    só são reagregadas se chegou um registro retroativo mais antigo que elas.
+    Retorna {'linhas_antes', 'linhas_depois', 'linhas_agregadas'}.
+    """
+    livro = sistema.livro
+    total = len(livro)
+    prefixo = min(sistema.linhas_compactadas, total)
+    dias = livro.coluna('dia')
+
+    cauda_fria = prefixo + np.flatnonzero(dias[prefixo:] < corte)
+    if not len(cauda_fria):
+        return {'linhas_antes': total, 'linhas_depois': total, 'linhas_agregadas': 0}
+    quentes = prefixo + np.flatnonzero(dias[prefixo:] >= corte)
+
+    # Registro retroativo antes do corte anterior: funde com as linhas frias existentes
+    if prefixo and int(dias[cauda_fria].min()) < sistema.corte_compactado:
+        base, a_agregar = 0, np.concatenate((np.arange(prefixo), cauda_fria))
+    else:
+        base, a_agregar = prefixo, cauda_fria
+    agregado = livro.agregar_por_dia(a_agregar)
+    n_agregado = len(agregado['dia'])
+
+    if sistema.previsao is not None:
+        sistema._sincronizar_previsao()  # nada pendente antes de trocar o livro
+    colunas = livro.colunas()
+    novo_livro = LivroRazao.de_colunas({
+        nome: np.concatenate((colunas[nome][:base], agregado[nome], colunas[nome][quentes]))
+        for nome in LivroRazao.COLUNAS
+    })
+    novo_livro.versao = livro.versao + 1  # caches por versão não confundem os dois livros
+    # Linha antiga → linha nova (só a camada quente continua na fila/pilha)
+    nova_linha = np.full(total, -1, dtype=np.int64)
+    nova_linha[quentes] = base + n_agregado + np.arange(len(quentes))
+
+    if sistema._restauracao is not None:
+        # Ainda não materializado: basta renumerar as linhas da fila e da pilha
+        linhas_fila, linhas_pilha = sistema._restauracao
+        remapeadas = []
+        for linhas in (linhas_fila, linhas_pilha):
+            linhas = np.arange(total) if linhas is None else np.asarray(linhas, dtype=np.int64)
+            linhas = nova_linha[linhas]
+            remapeadas.append(linhas[linhas >= 0])
+        sistema._restauracao = tuple(remapeadas)
+    else:
+        antigos = sistema._registros_completos
+        insumos = sistema.insumos
+        frios = [RegistroConsumo.restaurar(insumos[p], d, q, c) for p, d, q, c in zip(
+            agregado['insumo'].tolist(), agregado['dia'].tolist(),
+            agregado['quantidade'].tolist(), agregado['custo'].tolist())]
+        mantidos = [antigos[i] for i in quentes.tolist()]
+        sistema._registros_completos = antigos[:base] + frios + mantidos
+
+        na_camada_quente = {id(r) for r in mantidos}
+        fila = FilaConsumo()
+        fila.registros = [r for r in sistema._fila_consumo.registros if id(r) in na_camada_quente]
+        pilha = PilhaConsulta(sistema.profundidade_pilha)
+        for registro in sistema._pilha_consulta.registros:
+            if id(registro) in na_camada_quente:
+                pilha.empilhar(registro)
+        pilha.descartados = sistema._pilha_consulta.descartados
+        sistema._fila_consumo, sistema._pilha_consulta = fila, pilha
+
+    sistema.livro = novo_livro
+    if sistema.previsao is not None:
+        sistema.previsao.marcar_sincronizados(len(novo_livro))
+    sistema.linhas_compactadas = base + n_agregado
+    sistema.corte_compactado = max(sistema.corte_compactado, corte)
+    return {'linhas_antes': total, 'linhas_depois': len(novo_livro),
+            'linhas_agregadas': int(len(a_agregar))}
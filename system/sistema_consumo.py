@@ -1,24 +1,144 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import operator
 import random
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+import numpy as np
+from models.datas import SITUACOES, classificar_validades, dias_validade
 from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
 from structures.fila_consumo import FilaConsumo
 from structures.pilha_consulta import PilhaConsulta
+from structures.livro_razao import LivroRazao
+from structures.arvore_fenwick import HistoricoEstoque
+from structures.janela_consumo import EstatisticasJanela
+from structures.cubo_consumo import CuboConsumo
+from structures.indice_trigramas import IndiceTrigramas, normalizar
+from structures.log_eventos import LogEventos
+from structures.detector_anomalias import DetectorAnomalias
+from structures.livro_compartilhado import LivroCompartilhado
 from algorithms.busca import busca_sequencial, busca_binaria_por_data
 from algorithms.ordenacao import merge_sort_por_quantidade, quick_sort_por_validade
-from algorithms.pd_consumo import consumo_otimo_rec, consumo_otimo_memo, consumo_otimo_iterativo
+from algorithms.corrida_pd import correr_solvers
+from algorithms.previsao_demanda import PrevisaoDemanda
+from algorithms.otimizacao_compras import otimizar_compras
+from algorithms.cache_pd import CacheResultadosPD
+from system.snapshot import escrever_snapshot, ler_snapshot
+from system.consulta import Consulta
+from system.cenarios import BaseCenarios, Cenario
+from system.relatorio import escrever_relatorio, formatar_linha_livro, secoes_relatorio_completo
 
 class SistemaConsumo:
     """
     SISTEMA PRINCIPAL DE GESTÃO DE CONSUMO
     """
 
-    def __init__(self):
-        self.fila_consumo = FilaConsumo()
-        self.pilha_consulta = PilhaConsulta()
+    def __init__(self, janelas_estatisticas: Tuple[int, ...] = (7, 30),
+                profundidade_pilha: Optional[int] = PilhaConsulta.PROFUNDIDADE_PADRAO,
+                cache_pd: Optional[CacheResultadosPD] = None, dias_detalhe: Optional[int] = None,
+                detector_anomalias: Optional[DetectorAnomalias] = None):
+        if dias_detalhe is not None and dias_detalhe < 1:
+            raise ValueError("dias_detalhe deve ser >= 1 (ou None para guardar todo o detalhe)")
+        self.profundidade_pilha = profundidade_pilha
+        self._fila_consumo = FilaConsumo()
+        self._pilha_consulta = PilhaConsulta(profundidade_pilha)
         self.insumos: List[Insumo] = []
-        self.registros_completos: List[RegistroConsumo] = []
+        self._registros_completos: List[RegistroConsumo] = []
+        # Posições (fila, pilha) ainda não materializadas de um snapshot; None = nada pendente
+        self._restauracao: Optional[Tuple] = None
+        self.livro = LivroRazao()  # mesmos registros em formato colunar
+        self._posicao_insumo: Dict[int, int] = {}
+        self.previsao: Optional[PrevisaoDemanda] = None
+        self._parametros_previsao: Dict = {}
+        self._historico_estoque: Optional[HistoricoEstoque] = None  # montado no primeiro uso
+        self.entradas_estoque: List[Tuple[int, int, int]] = []  # (posição, dia, quantidade) de repor_estoque
+        self.janelas_estatisticas = tuple(janelas_estatisticas)
+        self._estatisticas_janela: Optional[EstatisticasJanela] = None  # montado no primeiro uso
+        self._cubo_consumo: Optional[CuboConsumo] = None  # montado no primeiro uso
+        # Resultados da PD lembrados entre chamadas de calcular_consumo_otimo
+        self.cache_pd = cache_pd if cache_pd is not None else CacheResultadosPD()
+        self.ultima_corrida_pd: Optional[Dict] = None  # tempos e vencedor da última corrida da PD
+        self._indice_nomes: Optional[IndiceTrigramas] = None  # montado no primeiro uso
+        self._lista_indexada: Optional[List[Insumo]] = None  # lista de onde o índice foi montado
+        self._indice_validades: Optional[Tuple] = None  # (lista, chave, ordem, validades), montado no primeiro uso
+        self.versao_catalogo = 0  # sobe a cada insumo alterado (insumos novos aparecem no tamanho da lista)
+        # Mudanças (consumo, estoque, insumos) para assinantes: sistema.eventos.assinar(...)
+        self.eventos = LogEventos()
+        # Picos de consumo avisados no registro (O(1) por consumo, sem reler o histórico)
+        self.detector_anomalias = detector_anomalias if detector_anomalias is not None else DetectorAnomalias()
+        # Retenção em camadas (system/retencao.py): detalhe só nos últimos dias_detalhe dias
+        self.dias_detalhe = dias_detalhe
+        self.linhas_compactadas = 0  # primeiras linhas do livro = agregados diários
+        self.corte_compactado = 0    # dias antes deste ordinal já estão agregados
+        self._dia_mais_recente: Optional[int] = None
+        # DataFrame dos gráficos por versão do livro (montado pelo VisualizadorDados no primeiro uso)
+        self._cache_dataframe = None
+        # Colunas do livro em memória compartilhada para outros processos (compartilhar_livro())
+        self.livro_compartilhado: Optional[LivroCompartilhado] = None
+        # Estado compartilhado pelos cenários "e se?" (refeito quando o sistema muda)
+        self._base_cenarios: Optional[BaseCenarios] = None
+
+    def __getstate__(self) -> Dict:
+        """
+        Estado para pickle/deepcopy sem os caches presos a este objeto por referência fraca
+        (base dos cenários e DataFrame dos gráficos, refeitos no primeiro uso) e sem o
+        escritor da memória compartilhada, que continua sendo só do original.
+        """
+        estado = self.__dict__.copy()
+        estado['_base_cenarios'] = estado['_cache_dataframe'] = estado['livro_compartilhado'] = None
+        return estado
+
+    # ------------------------------------------------------------------
+    # Registros em objetos: criados sob demanda depois de carregar um snapshot
+    # ------------------------------------------------------------------
+    @property
+    def registros_completos(self) -> List[RegistroConsumo]:
+        if self._restauracao is not None:
+            self._materializar_registros()
+        return self._registros_completos
+
+    @registros_completos.setter
+    def registros_completos(self, registros: List[RegistroConsumo]):
+        self._registros_completos = registros
+
+    @property
+    def fila_consumo(self) -> FilaConsumo:
+        if self._restauracao is not None:
+            self._materializar_registros()
+        return self._fila_consumo
+
+    @fila_consumo.setter
+    def fila_consumo(self, fila: FilaConsumo):
+        self._fila_consumo = fila
+
+    @property
+    def pilha_consulta(self) -> PilhaConsulta:
+        if self._restauracao is not None:
+            self._materializar_registros()
+        return self._pilha_consulta
+
+    @pilha_consulta.setter
+    def pilha_consulta(self, pilha: PilhaConsulta):
+        self._pilha_consulta = pilha
+
+    def _materializar_registros(self):
+        """Recria os objetos RegistroConsumo a partir das colunas do livro (primeiro acesso)"""
+        linhas_fila, linhas_pilha = self._restauracao
+        self._restauracao = None
+
+        colunas = self.livro.colunas()
+        registros = []
+        for posicao, dia, quantidade, custo in zip(colunas['insumo'].tolist(), colunas['dia'].tolist(),
+                                                colunas['quantidade'].tolist(), colunas['custo'].tolist()):
+            registros.append(RegistroConsumo.restaurar(self.insumos[posicao], dia, quantidade, custo))
+
+        self._registros_completos = registros
+        self._fila_consumo = FilaConsumo()
+        self._fila_consumo.registros = (list(registros) if linhas_fila is None
+                                        else [registros[i] for i in linhas_fila.tolist()])
+        self._pilha_consulta = PilhaConsulta(self.profundidade_pilha)
+        linhas_pilha = range(len(registros)) if linhas_pilha is None else linhas_pilha.tolist()
+        for i in linhas_pilha[-self.profundidade_pilha:] if self.profundidade_pilha else linhas_pilha:
+            self._pilha_consulta.empilhar(registros[i])
 
     def carregar_insumos_exemplo(self):
         """
@@ -48,7 +168,7 @@ class SistemaConsumo:
 
             validade = hoje + timedelta(days=dias)
             quantidade = random.randint(20, 100)  # reagentes: estoque menor
-            self.insumos.append(Insumo(id_counter, nome, quantidade, validade, 'reagente', custos_reagentes[i]))
+            self.adicionar_insumo(Insumo(id_counter, nome, quantidade, validade, 'reagente', custos_reagentes[i]))
             id_counter += 1
 
         # Descartáveis (estoque maior)
@@ -65,7 +185,7 @@ class SistemaConsumo:
 
             validade = hoje + timedelta(days=dias)
             quantidade = random.randint(20, 100)  # descartáveis: estoque maior
-            self.insumos.append(Insumo(id_counter, nome, quantidade, validade, 'descartavel', custos_descartaveis[i]))
+            self.adicionar_insumo(Insumo(id_counter, nome, quantidade, validade, 'descartavel', custos_descartaveis[i]))
             id_counter += 1
 
     def simular_consumo_diario(self, dias: int = 30):
@@ -75,7 +195,8 @@ class SistemaConsumo:
         """
         hoje = datetime.today().date()
 
-        for dia in range(dias):
+        # Do dia mais antigo para hoje, para que o livro fique em ordem cronológica
+        for dia in range(dias - 1, -1, -1):
             data = hoje - timedelta(days=dia)  # dia atual da simulação
             insumos_disponiveis = [i for i in self.insumos if i.quantidade > 0]
 
@@ -96,11 +217,454 @@ class SistemaConsumo:
                     continue
                 quantidade_consumida = random.randint(1, max_consumo)
 
-                # cria registro (RegistroConsumo já decrementa insumo.quantidade)
-                registro = RegistroConsumo(insumo, data, quantidade_consumida)
-                self.fila_consumo.enfileirar(registro)
-                self.pilha_consulta.empilhar(registro)
-                self.registros_completos.append(registro)
+                self.registrar_consumo(insumo, data, quantidade_consumida)
+
+    def registrar_consumo(self, insumo: Insumo, data, quantidade: int) -> RegistroConsumo:
+        """
+        Registra um consumo em todas as estruturas do sistema (o insumo deve estar no catálogo).
+        RegistroConsumo já decrementa insumo.quantidade.
+        """
+        posicao = self.posicao_insumo(insumo)  # antes de mexer no estoque: insumo fora do catálogo falha
+        registro = RegistroConsumo(insumo, data, quantidade)
+        self.fila_consumo.enfileirar(registro)
+        self.pilha_consulta.empilhar(registro)
+        self.registros_completos.append(registro)
+        self.livro.adicionar(posicao, registro.dia, quantidade, registro.custo_centavos)
+        if self._historico_estoque is not None:
+            self._historico_estoque.registrar(posicao, registro.dia, quantidade)
+        if self._estatisticas_janela is not None:
+            self._estatisticas_janela.registrar(posicao, registro.dia, quantidade)
+        if self._cubo_consumo is not None:
+            if posicao >= self._cubo_consumo.n_insumos:
+                self._cubo_consumo.definir_tipo(posicao, insumo.tipo)
+            self._cubo_consumo.registrar(posicao, registro.dia, quantidade)
+        self.eventos.publicar('consumo', insumo=insumo.id, data=registro.data, quantidade=quantidade,
+                              custo_centavos=registro.custo_centavos)
+        self.eventos.publicar('estoque', insumo=insumo.id, quantidade=insumo.quantidade, variacao=-quantidade)
+        for alerta in self.detector_anomalias.registrar(posicao, registro.dia, quantidade):
+            self.eventos.publicar('anomalia', **self._formatar_alerta(alerta))
+        if self.dias_detalhe is not None and (self._dia_mais_recente is None or registro.dia > self._dia_mais_recente):
+            # Dia novo: o que saiu da janela de detalhe vira agregado diário
+            self._dia_mais_recente = registro.dia
+            self._compactar_antes_de(registro.dia - self.dias_detalhe + 1)
+        if self.livro_compartilhado is not None:
+            self.livro_compartilhado.publicar(self.livro)  # só a linha nova (ou o livro compactado)
+        return registro
+
+    def _formatar_alerta(self, alerta: Dict) -> Dict:
+        """Alerta do detector (posição, dia ordinal) → id, nome e data do insumo"""
+        insumo = self.insumos[alerta['insumo']]
+        return {'insumo': insumo.id, 'nome': insumo.nome, 'data': date.fromordinal(alerta['dia']),
+                'escopo': alerta['tipo'], 'valor': alerta['valor'], 'esperado': alerta['esperado'],
+                'escore': alerta['escore']}
+
+    def anomalias_recentes(self, limite: Optional[int] = None) -> List[Dict]:
+        """
+        Últimos picos de consumo avisados (do mais novo ao mais antigo).
+        escopo 'evento' = um consumo fora do padrão; 'dia' = total do dia fora do padrão.
+        """
+        alertas = list(self.detector_anomalias.alertas)[::-1]
+        return [self._formatar_alerta(a) for a in alertas[:limite]]
+
+    def compactar(self, dias_detalhe: Optional[int] = None, hoje: Optional[date] = None) -> Dict[str, int]:
+        """
+        Agrega por dia e insumo os registros anteriores aos últimos `dias_detalhe` dias
+        (padrão: self.dias_detalhe) contados até `hoje`. Veja system/retencao.py.
+        Com dias_detalhe no construtor isso acontece sozinho a cada dia novo registrado.
+        """
+        dias_detalhe = dias_detalhe or self.dias_detalhe
+        if dias_detalhe is None or dias_detalhe < 1:
+            raise ValueError("Informe dias_detalhe >= 1 (aqui ou no construtor)")
+        referencia = (hoje or datetime.today().date()).toordinal()
+        return self._compactar_antes_de(referencia - dias_detalhe + 1)
+
+    def _compactar_antes_de(self, corte: int) -> Dict[str, int]:
+        from system.retencao import compactar_historico
+        resultado = compactar_historico(self, corte)
+        if self.livro_compartilhado is not None:
+            self.livro_compartilhado.publicar(self.livro)
+        return resultado
+
+    def compartilhar_livro(self, nome: Optional[str] = None) -> LivroCompartilhado:
+        """
+        Publica o livro-razão em memória compartilhada (structures/livro_compartilhado.py).
+        Outros processos abrem com LeitorLivroCompartilhado(sistema.livro_compartilhado.nome)
+        e leem as colunas sem cópia; cada consumo registrado depois disso é publicado também.
+        """
+        if self.livro_compartilhado is None:
+            self.livro_compartilhado = LivroCompartilhado(self.livro, nome)
+        else:
+            self.livro_compartilhado.publicar(self.livro)
+        return self.livro_compartilhado
+
+    def parar_compartilhamento(self):
+        """Apaga a memória compartilhada do livro (leitores já abertos mantêm o que tinham)"""
+        if self.livro_compartilhado is not None:
+            self.livro_compartilhado.fechar()
+            self.livro_compartilhado = None
+
+    def adicionar_insumo(self, insumo: Insumo) -> int:
+        """
+        Coloca um insumo no catálogo (avisando os assinantes) e retorna a posição dele.
+        Se já estiver no catálogo, só retorna a posição; ValueError se outro insumo usa o mesmo id.
+        """
+        try:
+            return self.posicao_insumo(insumo)
+        except KeyError:
+            pass
+        self.insumos.append(insumo)
+        self._posicao_insumo[insumo.id] = len(self.insumos) - 1
+        self.eventos.publicar('insumo', insumo=insumo.id, acao='adicionado',
+                              campos={'nome': insumo.nome, 'quantidade': insumo.quantidade,
+                                      'validade': insumo.validade, 'tipo': insumo.tipo,
+                                      'custo_unitario': insumo.custo_unitario})
+        return len(self.insumos) - 1
+
+    def atualizar_insumo(self, insumo, **campos) -> Insumo:
+        """
+        Altera campos de um insumo (nome, validade, tipo, custo_unitario) e publica o evento 'insumo'.
+        O estoque não é editável aqui: entradas têm data e passam por repor_estoque().
+        """
+        insumo = self._buscar_insumo(insumo)
+        permitidos = ('nome', 'validade', 'tipo', 'custo_unitario')
+        if 'quantidade' in campos:
+            raise ValueError("O estoque muda por entradas datadas: use repor_estoque(insumo, data, quantidade)")
+        for campo in campos:
+            if campo not in permitidos:
+                raise ValueError(f"Campo não editável: {campo} (use {', '.join(permitidos)})")
+        for campo, valor in campos.items():
+            setattr(insumo, campo, valor)
+        self.versao_catalogo += 1
+        if 'nome' in campos:
+            self._indice_nomes = None  # remontado no próximo uso
+        if 'tipo' in campos and self._cubo_consumo is not None:
+            self._cubo_consumo.definir_tipo(self.posicao_insumo(insumo), insumo.tipo)
+        self.eventos.publicar('insumo', insumo=insumo.id, acao='alterado', campos=dict(campos))
+        return insumo
+
+    def repor_estoque(self, insumo, data, quantidade: int) -> Insumo:
+        """
+        REPOSIÇÃO: entrada de `quantidade` unidades no estoque no dia `data` (pode ser passado).
+        Fica no histórico de estoque, então estoque_em() de dias anteriores não muda;
+        publica o evento 'estoque'.
+        """
+        insumo = self._buscar_insumo(insumo)
+        if quantidade <= 0:
+            raise ValueError("A quantidade reposta deve ser positiva")
+        posicao, dia = self.posicao_insumo(insumo), data.toordinal()
+        insumo.quantidade += quantidade
+        self.entradas_estoque.append((posicao, dia, quantidade))
+        if self._historico_estoque is not None:
+            self._historico_estoque.registrar_entrada(posicao, dia, quantidade)
+        self.eventos.publicar('estoque', insumo=insumo.id, quantidade=insumo.quantidade, variacao=quantidade)
+        return insumo
+
+    def posicao_insumo(self, insumo: Insumo) -> int:
+        """
+        Posição do insumo em self.insumos (índice usado pelas colunas do livro).
+        KeyError se ele não está no catálogo (use adicionar_insumo); ValueError se
+        outro insumo do catálogo tem o mesmo id.
+        """
+        posicao = self._posicao_insumo.get(insumo.id)
+        if posicao is None or posicao >= len(self.insumos) or self.insumos[posicao] is not insumo:
+            # Insumos podem ter sido adicionados direto na lista: refaz o mapa
+            self._mapear_insumos()
+            posicao = self._posicao_insumo.get(insumo.id)
+            if posicao is None:
+                raise KeyError(f"Insumo fora do catálogo: {insumo.nome} (id {insumo.id}); use adicionar_insumo()")
+            if self.insumos[posicao] is not insumo:
+                raise ValueError(f"O id {insumo.id} já pertence a outro insumo do catálogo: "
+                                 f"{self.insumos[posicao].nome}")
+        return posicao
+
+    def _mapear_insumos(self):
+        """Refaz o mapa id → posição; ids repetidos misturariam dois insumos na mesma linha do livro"""
+        mapa: Dict[int, int] = {}
+        for posicao, insumo in enumerate(self.insumos):
+            if mapa.setdefault(insumo.id, posicao) != posicao:
+                raise ValueError(f"Id repetido no catálogo: {insumo.id} "
+                                 f"({self.insumos[mapa[insumo.id]].nome} e {insumo.nome})")
+        self._posicao_insumo = mapa
+
+    @property
+    def historico_estoque(self) -> HistoricoEstoque:
+        """Árvores de Fenwick por insumo, montadas a partir do livro no primeiro acesso"""
+        if self._historico_estoque is None:
+            historico = HistoricoEstoque.de_colunas(
+                self.livro.coluna('insumo'), self.livro.coluna('dia'), self.livro.coluna('quantidade'))
+            for posicao, dia, quantidade in self.entradas_estoque:
+                historico.registrar_entrada(posicao, dia, quantidade)
+            self._historico_estoque = historico
+        return self._historico_estoque
+
+    @property
+    def estatisticas_janela(self) -> EstatisticasJanela:
+        """Janelas deslizantes por insumo, montadas só com os dias recentes do livro no primeiro acesso"""
+        if self._estatisticas_janela is None:
+            estatisticas = EstatisticasJanela(self.janelas_estatisticas)
+            dias = self.livro.coluna('dia')
+            if len(dias):
+                recentes = np.flatnonzero(dias >= dias.max() - max(estatisticas.janelas) + 1)
+                recentes = recentes[np.argsort(dias[recentes], kind='stable')]
+                insumos = self.livro.coluna('insumo')[recentes].tolist()
+                quantidades = self.livro.coluna('quantidade')[recentes].tolist()
+                for posicao, dia, quantidade in zip(insumos, dias[recentes].tolist(), quantidades):
+                    estatisticas.registrar(posicao, dia, quantidade)
+            self._estatisticas_janela = estatisticas
+        return self._estatisticas_janela
+
+    @property
+    def cubo_consumo(self) -> CuboConsumo:
+        """Cubo insumo × dia (com o tipo de cada insumo), montado do livro com np.bincount no primeiro acesso"""
+        if self._cubo_consumo is None:
+            self._cubo_consumo = CuboConsumo.de_colunas(
+                self.livro.coluna('insumo'), self.livro.coluna('dia'), self.livro.coluna('quantidade'),
+                [i.tipo for i in self.insumos])
+        for posicao in range(self._cubo_consumo.n_insumos, len(self.insumos)):  # insumos sem consumo ainda
+            self._cubo_consumo.definir_tipo(posicao, self.insumos[posicao].tipo)
+        return self._cubo_consumo
+
+    def fatiar_consumo(self, inicio: Optional[date] = None, fim: Optional[date] = None, insumos=None,
+                       tipos=None, por: str = 'insumo', periodo: str = 'dia') -> Dict:
+        """
+        Consumo de qualquer fatia do cubo: insumos (objetos ou nomes), tipos e período,
+        somado por 'insumo', 'tipo' ou 'total' em colunas de 'dia', 'semana', 'mes' ou 'total'.
+        Ex.: fatiar_consumo(tipos=['reagente'], por='tipo', periodo='semana').
+        Retorna {'linhas': nomes, 'colunas': datas (início de cada período), 'valores': matriz}.
+        """
+        posicoes = None if insumos is None else [self.posicao_insumo(self._buscar_insumo(i)) for i in insumos]
+        fatia = self.cubo_consumo.fatiar(inicio.toordinal() if inicio else None, fim.toordinal() if fim else None,
+                                         posicoes, tipos, por, periodo)
+        linhas = fatia['linhas'].tolist()
+        return {
+            'linhas': [self.insumos[p].nome for p in linhas] if por == 'insumo' else linhas,
+            'colunas': [date.fromordinal(d) for d in fatia['colunas'].tolist()],
+            'valores': fatia['valores'],
+        }
+
+    def estatisticas_consumo(self, insumo, janela: int = 7, data_referencia=None) -> Dict[str, float]:
+        """
+        Consumo do insumo nos últimos `janela` dias: soma, média e pico/mínimo diário.
+        Atualizado a cada registro em O(1) amortizado (veja structures/janela_consumo.py).
+        """
+        insumo = self._buscar_insumo(insumo)
+        referencia = data_referencia.toordinal() if data_referencia is not None else None
+        return self.estatisticas_janela.consultar(self.posicao_insumo(insumo), janela, referencia)
+
+    @property
+    def indice_nomes(self) -> IndiceTrigramas:
+        """
+        Índice de trigramas dos nomes do catálogo (insumos novos entram no próximo acesso).
+        É refeito se a lista de insumos foi trocada por outra ou encolheu.
+        """
+        if (self._indice_nomes is None or self._lista_indexada is not self.insumos
+                or len(self._indice_nomes) > len(self.insumos)):
+            self._indice_nomes = IndiceTrigramas()
+            self._lista_indexada = self.insumos
+        for insumo in self.insumos[len(self._indice_nomes):]:
+            self._indice_nomes.adicionar(insumo.nome)
+        return self._indice_nomes
+
+    def buscar_insumos(self, texto: str, limite: int = 10) -> List[Tuple[Insumo, float]]:
+        """
+        BUSCA APROXIMADA: insumos com nome parecido com `texto`, ignorando acentos,
+        maiúsculas e pequenos erros de digitação. Retorna [(insumo, similaridade)].
+        """
+        return [(self.insumos[p], s) for p, s in self.indice_nomes.buscar(texto, limite)]
+
+    def autocompletar_insumo(self, prefixo: str, limite: int = 10) -> List[Insumo]:
+        """Insumos cujo nome começa com `prefixo` (ignorando acentos), em ordem alfabética"""
+        return [self.insumos[p] for p in self.indice_nomes.autocompletar(prefixo, limite)]
+
+    def posicoes_por_nome(self, nome: str) -> List[int]:
+        """
+        Posições no catálogo de todos os insumos com esse nome (sem diferenciar maiúsculas
+        nem acentos), pelo índice de nomes. Como em _buscar_insumo, um acerto cujo nome
+        mudou fora de atualizar_insumo refaz o índice; nome inexistente só devolve [].
+        """
+        alvo = normalizar(nome)
+        posicoes = self.indice_nomes.posicoes_exatas(nome)
+        if any(normalizar(self.insumos[p].nome) != alvo for p in posicoes):
+            self._indice_nomes = None
+            posicoes = self.indice_nomes.posicoes_exatas(nome)
+        return posicoes
+
+    @property
+    def indice_validades(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (posições do catálogo ordenadas por validade, validades nessa ordem), para busca binária.
+        Refeito só quando o catálogo muda (outra lista, insumo novo ou atualizar_insumo).
+        """
+        chave = (len(self.insumos), self.versao_catalogo)
+        if self._indice_validades is None or self._indice_validades[0] is not self.insumos \
+                or self._indice_validades[1] != chave:
+            validades = dias_validade(self.insumos)
+            ordem = np.argsort(validades, kind='stable')
+            self._indice_validades = (self.insumos, chave, ordem, validades[ordem])
+        return self._indice_validades[2], self._indice_validades[3]
+
+    def _buscar_insumo(self, insumo) -> Insumo:
+        """Aceita o objeto Insumo ou o nome (sem diferenciar maiúsculas nem acentos)"""
+        if isinstance(insumo, Insumo):
+            return insumo
+        posicao = self.indice_nomes.posicao_exata(insumo)
+        if posicao is not None and normalizar(self.insumos[posicao].nome) != normalizar(insumo):
+            # O nome indexado mudou fora de atualizar_insumo (ou a lista foi editada no lugar):
+            # refaz o índice e tenta de novo. Um nome que só não existe não refaz nada.
+            self._indice_nomes = None
+            posicao = self.indice_nomes.posicao_exata(insumo)
+        if posicao is None:
+            raise KeyError(f"Insumo não encontrado: {insumo}")
+        return self.insumos[posicao]
+
+    def estoque_em(self, insumo, data) -> int:
+        """
+        ESTOQUE NA DATA: quanto havia do insumo ao FIM do dia `data`.
+        Usa o histórico de Fenwick: O(log dias), inclusive com registros retroativos.
+        """
+        insumo = self._buscar_insumo(insumo)
+        return self.historico_estoque.estoque_em(self.posicao_insumo(insumo), data.toordinal(), insumo.quantidade)
+
+    def consumo_no_periodo(self, insumo, inicio, fim) -> int:
+        """Unidades consumidas do insumo entre as datas inicio e fim (inclusive) - O(log dias)"""
+        insumo = self._buscar_insumo(insumo)
+        return self.historico_estoque.consumo_no_periodo(self.posicao_insumo(insumo),
+                                                        inicio.toordinal(), fim.toordinal())
+
+    def prever_demanda(self, data_referencia=None, metodo: str = 'exponencial', **parametros):
+        """
+        Previsão de demanda, ponto de reposição e dias de cobertura para todos os insumos.
+        - data_referencia: último dia considerado fechado (padrão: hoje)
+        - parametros: repassados ao PrevisaoDemanda (janela, alfa, ...); se forem diferentes
+          dos da chamada anterior, a previsão é refeita do livro. Sem parâmetros, mantém os atuais.
+        A previsão é mantida entre chamadas e só processa as linhas novas do livro.
+        Retorna dicionário {nome_insumo: {indicador: valor}}
+        """
+        if self.previsao is not None and parametros and parametros != self._parametros_previsao:
+            self.previsao = None
+        if self.previsao is None:
+            self.previsao = PrevisaoDemanda(self.insumos, **parametros)
+            self._parametros_previsao = dict(parametros)
+
+        self._sincronizar_previsao()
+        self.previsao.fechar_ate(data_referencia or datetime.today().date())
+        resultado = self.previsao.resultado(metodo)
+
+        return {
+            insumo.nome: {indicador: valores[linha].item() for indicador, valores in resultado.items()}
+            for linha, insumo in enumerate(self.previsao.insumos)
+        }
+
+    def _sincronizar_previsao(self):
+        """Passa à previsão só as linhas do livro ainda não lidas, direto das colunas"""
+        self.previsao.sincronizar_livro(self.livro.colunas(), self.insumos)
+
+    def otimizar_compras(self, orcamento: float, horizonte: int = 30, vida_util=None,
+                        metodo: str = 'exponencial', data_referencia=None):
+        """
+        Quanto comprar de cada insumo dentro do orçamento, usando a previsão de demanda.
+        Veja algorithms/otimizacao_compras.py para os detalhes do modelo.
+        """
+        previsao = self.prever_demanda(data_referencia, metodo)
+        demanda = [previsao[insumo.nome][metodo] for insumo in self.insumos]
+        return otimizar_compras(self.insumos, demanda, orcamento, horizonte=horizonte, vida_util=vida_util)
+
+    def criar_cenario(self, nome: str = '') -> Cenario:
+        """
+        CENÁRIO "E SE?": bifurcação barata do sistema para simular e otimizar compras.
+        Não copia livro, insumos nem registros: todos os cenários do mesmo estado
+        compartilham as colunas e os arrays de estoque; cada um guarda só o que muda.
+        Veja system/cenarios.py.
+        """
+        if self._base_cenarios is None or not self._base_cenarios.vale_para(self):
+            self._base_cenarios = BaseCenarios(self)
+        return Cenario(self._base_cenarios, nome)
+
+    def _linhas_no_livro(self, registros: List[RegistroConsumo]) -> Optional[np.ndarray]:
+        """Posição de cada registro no livro; None quando são exatamente todos os registros em ordem"""
+        todos = self._registros_completos
+        if len(registros) == len(todos) and all(map(operator.is_, registros, todos)):
+            return None
+        # Caso comum da pilha limitada: só os registros mais recentes, em ordem
+        cauda = todos[len(todos) - len(registros):] if registros else []
+        if len(registros) <= len(todos) and all(map(operator.is_, registros, cauda)):
+            return np.arange(len(todos) - len(registros), len(todos), dtype=np.int64)
+        posicoes = {id(r): i for i, r in enumerate(todos)}
+        try:
+            return np.fromiter((posicoes[id(r)] for r in registros), dtype=np.int64, count=len(registros))
+        except KeyError:
+            raise ValueError("Fila/pilha contém registros que não estão em registros_completos")
+
+    def salvar_snapshot(self, caminho: str):
+        """
+        SALVAR SNAPSHOT: grava insumos, livro-razão, índices e o conteúdo de fila/pilha
+        em um único arquivo (veja system/snapshot.py para o formato).
+        """
+        if self._restauracao is not None:
+            # Nunca materializado: as posições carregadas continuam válidas
+            linhas_fila, linhas_pilha = self._restauracao
+        else:
+            if len(self.livro) != len(self._registros_completos):
+                raise ValueError("Livro-razão e registros_completos estão dessincronizados")
+            linhas_fila = self._linhas_no_livro(self._fila_consumo.registros)
+            linhas_pilha = self._linhas_no_livro(self._pilha_consulta.registros)
+
+        arrays = {f'livro.{nome}': coluna for nome, coluna in self.livro.colunas().items()}
+        ordem, inicios = self.livro.indice_por_insumo(len(self.insumos))
+        arrays['indice.insumo.ordem'] = ordem
+        arrays['indice.insumo.inicios'] = inicios
+        metadados = {'fila_completa': linhas_fila is None, 'pilha_completa': linhas_pilha is None,
+                     'proxima_sequencia_eventos': self.eventos.proxima_sequencia,
+                     'linhas_compactadas': self.linhas_compactadas, 'corte_compactado': self.corte_compactado}
+        if linhas_fila is not None:
+            arrays['fila'] = linhas_fila
+        if linhas_pilha is not None:
+            arrays['pilha'] = linhas_pilha
+        if self.entradas_estoque:
+            entradas = np.array(self.entradas_estoque, dtype=np.int64)
+            arrays['entradas.insumo'], arrays['entradas.dia'], arrays['entradas.quantidade'] = entradas.T
+        escrever_snapshot(caminho, self.insumos, arrays, metadados)
+
+    @classmethod
+    def carregar_snapshot(cls, caminho: str, **parametros) -> 'SistemaConsumo':
+        """
+        CARREGAR SNAPSHOT: devolve um sistema pronto em tempo praticamente constante.
+        As colunas ficam mapeadas em memória; os objetos RegistroConsumo só são
+        criados no primeiro acesso a registros_completos, fila_consumo ou pilha_consulta.
+        """
+        insumos, arrays, metadados = ler_snapshot(caminho)
+        sistema = cls(**parametros)
+        sistema.insumos = insumos
+        # As sequências continuam de onde pararam (os eventos em si não vão no snapshot)
+        sistema.eventos.proxima_sequencia = metadados.get('proxima_sequencia_eventos', 1)
+        sistema.linhas_compactadas = metadados.get('linhas_compactadas', 0)
+        sistema.corte_compactado = metadados.get('corte_compactado', 0)
+        sistema.livro = LivroRazao.de_colunas({nome: arrays[f'livro.{nome}'] for nome in LivroRazao.COLUNAS})
+        sistema.livro.definir_indice_por_insumo(arrays['indice.insumo.ordem'], arrays['indice.insumo.inicios'])
+        if 'entradas.dia' in arrays:
+            sistema.entradas_estoque = list(zip(arrays['entradas.insumo'].tolist(), arrays['entradas.dia'].tolist(),
+                                                arrays['entradas.quantidade'].tolist()))
+        if len(sistema.livro):
+            sistema._restauracao = (
+                None if metadados['fila_completa'] else arrays['fila'],
+                None if metadados['pilha_completa'] else arrays['pilha'],
+            )
+        return sistema
+
+    def relatorio_memoria(self, extras: Optional[Dict[str, object]] = None) -> Dict:
+        """
+        Quanto cada componente (insumos, registros, fila, pilha, livro, índices...) ocupa,
+        em bytes, e os bytes por registro. Veja system/memoria.py.
+        """
+        from system.memoria import relatorio_memoria
+        return relatorio_memoria(self, extras)
+
+    def consulta(self) -> Consulta:
+        """
+        Começa uma consulta declarativa sobre o livro-razão, por exemplo:
+        sistema.consulta().tipo('reagente').agrupar_por('semana').executar()
+        """
+        return Consulta(self)
 
     def busca_sequencial(self, nome_insumo: str):
         """Busca sequencial dentro dos registros do sistema"""
@@ -117,104 +681,126 @@ class SistemaConsumo:
         from algorithms.ordenacao import quick_sort_por_validade as quick_sort
         return quick_sort(registros)
 
-    def gerar_relatorio_completo(self):
-        """Gera um relatório completo com todos os dados"""
-        print("=" * 80)
-        print("📋 RELATÓRIO COMPLETO DO SISTEMA")
-        print("=" * 80)
-        
-        # 1. Mostra estoque atual
-        print("\n📦 ESTOQUE ATUAL:")
-        print("-" * 40)
-        for insumo in self.insumos:
-            print(f"• {insumo.nome}: {insumo.quantidade} unidades (Validade: {insumo.validade})")
-        
-        # 2. Mostra estatísticas básicas
-        print(f"\n📊 ESTATÍSTICAS:")
-        print("-" * 40)
-        print(f"• Total de insumos: {len(self.insumos)}")
-        print(f"• Total de registros: {len(self.registros_completos)}")
-        
-        if self.registros_completos:
-            consumo_total = sum(r.quantidade_consumida for r in self.registros_completos)
-            custo_total = sum(r.custo_total for r in self.registros_completos)
-            print(f"• Consumo total: {consumo_total} unidades")
-            print(f"• Custo total: R$ {custo_total:.2f}")
-        
-        # 3. Testa a fila (ordem cronológica)
-        print(f"\n⏰ PRIMEIROS REGISTROS (FILA - ORDEM CRONOLÓGICA):")
-        print("-" * 60)
-        for i, registro in enumerate(self.fila_consumo.registros[:3]):
-            print(f"{i+1}. {registro}")
-        
-        # 4. Testa a pilha (ordem inversa)
-        print(f"\n🔙 ÚLTIMOS REGISTROS (PILHA - ORDEM INVERSA):")
-        print("-" * 60)
-        ultimos = self.pilha_consulta.registros[-3:] if self.pilha_consulta.registros else []
-        for i, registro in enumerate(reversed(ultimos)):
-            print(f"{i+1}. {registro}")
-        
-        # 5. Testa busca sequencial
-        print(f"\n🔍 BUSCA SEQUENCIAL ('Reagente A'):")
-        print("-" * 40)
-        resultados = self.busca_sequencial("Reagente A")
-        for i, registro in enumerate(resultados[:2]):
-            print(f"{i+1}. {registro}")
-        if len(resultados) > 2:
-            print(f"... e mais {len(resultados) - 2} registros")
-        
-        # 6. Testa ordenação
-        if self.registros_completos:
-            print(f"\n📊 ORDENAÇÃO POR QUANTIDADE (TOP 3):")
-            print("-" * 40)
-            ordenados = self.merge_sort_por_quantidade(self.registros_completos[:3])
-            for i, registro in enumerate(ordenados):
-                print(f"{i+1}. {registro.insumo.nome}: {registro.quantidade_consumida} unidades")
-
-    def calcular_consumo_otimo(self, bloco: int = 50, modo_teste_recursivo: bool = True):
+    def ordenar_em_disco(self, destino: str, por: str = 'quantidade', memoria_maxima: Optional[int] = None,
+                         pasta: Optional[str] = None) -> Dict:
+        """
+        Ordena o livro inteiro por 'quantidade' ou 'validade' com memória fixa
+        (corridas em arquivos temporários + intercalação em k vias) e grava em `destino` (.npy).
+        Não materializa registros. Veja algorithms/ordenacao_externa.py.
+        """
+        from algorithms.ordenacao_externa import MEMORIA_PADRAO, ordenar_livro_em_disco
+        return ordenar_livro_em_disco(self.livro, self.insumos, destino, por,
+                                      memoria_maxima or MEMORIA_PADRAO, pasta)
+
+    def classificar_validades(self, hoje: Optional[date] = None, dias_limite: int = 30) -> Dict[str, List[Insumo]]:
+        """
+        Insumos por situação da validade: 'vencido', 'vencendo' (até dias_limite dias) e 'dentro'.
+        Todas as validades são classificadas em uma única expressão NumPy sobre os dias ordinais.
+        """
+        hoje = (hoje or datetime.today().date()).toordinal()
+        _, situacao = classificar_validades(dias_validade(self.insumos), hoje, dias_limite)
+        return {nome: [self.insumos[p] for p in np.flatnonzero(situacao == codigo).tolist()]
+                for codigo, nome in enumerate(SITUACOES)}
+
+    def primeiros_da_fila(self, quantidade: int) -> List[str]:
+        """Os primeiros registros da fila já formatados (sem materializar um snapshot)"""
+        if self._restauracao is not None:
+            linhas_fila = self._restauracao[0]
+            linhas = range(min(quantidade, len(self.livro))) if linhas_fila is None else linhas_fila[:quantidade].tolist()
+            return [formatar_linha_livro(self, linha) for linha in linhas]
+        return [str(r) for r in self.fila_consumo.primeiros(quantidade)]
+
+    def ultimos_da_pilha(self, quantidade: int) -> List[str]:
+        """Os registros do topo da pilha já formatados (sem materializar um snapshot)"""
+        if self._restauracao is not None:
+            linhas_pilha = self._restauracao[1]
+            total = len(self.livro) if linhas_pilha is None else len(linhas_pilha)
+            if self.profundidade_pilha is not None:
+                quantidade = min(quantidade, self.profundidade_pilha)
+            posicoes = range(total - 1, max(-1, total - 1 - quantidade), -1)
+            linhas = posicoes if linhas_pilha is None else [int(linhas_pilha[p]) for p in posicoes]
+            return [formatar_linha_livro(self, linha) for linha in linhas]
+        registros, _ = self.pilha_consulta.pagina(quantidade)
+        return [str(r) for r in registros]
+
+    def gerar_relatorio_completo(self, destino=None, formato: str = 'texto'):
+        """
+        Gera um relatório completo com todos os dados.
+        - destino: None (tela), caminho de arquivo ou objeto de arquivo
+        - formato: 'texto', 'markdown', 'html' ou 'csv'
+        As seções são geradores sobre dados já calculados (veja system/relatorio.py).
+        """
+        escrever_relatorio(secoes_relatorio_completo(self), destino, formato)
+
+    def calcular_consumo_otimo(self, bloco: int = 50, modo_teste_recursivo: bool = True,
+                            usar_cache: bool = True, orcamento=None, esperar_todos: bool = False):
         """
         Calcula consumo ótimo usando as três versões (recursiva, memorização e iterativa).
+        As versões rodam ao mesmo tempo em processos separados (correr_solvers), cada uma
+        com um tempo máximo; quem estoura o tempo é cancelada em vez de travar o sistema.
         - bloco: discretização usada por memo e iterativa (maior -> mais rápido, menos preciso)
-        - modo_teste_recursivo: se True, roda também a recursiva em estoques pequenos
-        Retorna tupla: (rec, memo, iterativo)
+        - modo_teste_recursivo: se True, roda também a recursiva
+        - usar_cache: reaproveita resultados de chamadas anteriores (self.cache_pd)
+        - orcamento: segundos por versão (número ou dicionário; padrão ORCAMENTO_PADRAO)
+        - esperar_todos: por padrão devolve com o primeiro resultado verificado e cancela as demais;
+          True espera todas (dentro do orçamento) para a verificação de consistência
+        A corrida (vencedor, tempos e situação de cada versão) fica em self.ultima_corrida_pd.
+        Retorna tupla: (rec, memo, iterativo) — None para versões canceladas ou sem tempo
         """
         estoques = [i.quantidade for i in self.insumos]
         print("📦 Estoques detectados:", estoques)
         print(f"🧠 Parâmetros: bloco={bloco}, modo_teste_recursivo={modo_teste_recursivo}")
 
-        rec_res = None
-        # Só roda recursiva se a lista for pequena para não travar
-        if modo_teste_recursivo:
-            if len(estoques) <= 10 and max(estoques, default=0) <= 100:
-                print("▶️ Rodando versão recursiva...")
-                rec_res = consumo_otimo_rec(estoques, bloco=bloco)
-                print("   ✅ Resultado recursiva:", rec_res)
-            else:
-                print("⚠️ Pulando recursiva: estoques muito grandes para rodar recursivo puro.")
+        solvers = (['recursiva'] if modo_teste_recursivo else []) + ['memorizacao', 'iterativa']
+        conhecidos = {}
+        if usar_cache:
+            for solver in solvers:
+                valor = self.cache_pd.obter(self.cache_pd.chave(estoques, bloco, solver))
+                if valor is not None:
+                    conhecidos[solver] = valor
 
-        print("▶️ Rodando versão com memorização...")
-        memo_res = consumo_otimo_memo(estoques, bloco=bloco)
-        print("   ✅ Resultado memorização:", memo_res)
+        print(f"▶️ Rodando em paralelo: {', '.join(solvers)}...")
+        corrida = correr_solvers(estoques, bloco, solvers, orcamento=orcamento,
+                                 esperar_todos=esperar_todos, conhecidos=conhecidos)
+        self.ultima_corrida_pd = corrida
+        for solver in solvers:
+            situacao = corrida['situacao'][solver]
+            print(f"   {'✅' if situacao in ('ok', 'cache') else '⚠️'} {solver}: "
+                  f"{corrida['resultados'][solver]} ({situacao}, {corrida['tempos'][solver]:.3f}s)")
+            if usar_cache and situacao == 'ok':
+                self.cache_pd.guardar(self.cache_pd.chave(estoques, bloco, solver), corrida['resultados'][solver])
 
-        print("▶️ Rodando versão iterativa (bottom-up)...")
-        iter_res = consumo_otimo_iterativo(estoques, bloco=bloco)
-        print("   ✅ Resultado iterativa:", iter_res)
+        rec_res = corrida['resultados'].get('recursiva')
+        memo_res = corrida['resultados']['memorizacao']
+        iter_res = corrida['resultados']['iterativa']
 
-        # Verificação de consistência
-        if rec_res is not None:
-            consistent = (rec_res == memo_res == iter_res)
+        # Verificação de consistência (só entre as versões que terminaram)
+        print("🧩 Verificando consistência dos resultados...")
+        disponiveis = [r for r in (rec_res, memo_res, iter_res) if r is not None]
+        if len(disponiveis) < 2:
+            consistent = None
+        elif rec_res is not None:
+            consistent = len(set(disponiveis)) == 1
         else:
             # Se recursiva não rodou, verificamos memo vs iterativa com tolerância
             tol = max(1, int(0.05 * sum(estoques) / bloco))  # heurística
             consistent = (abs(memo_res - iter_res) <= tol)
 
-        print("🧩 Verificando consistência dos resultados...")
-        if not consistent:
+        if consistent is None:
+            print("⚠️ Consistência não verificada: menos de duas versões terminaram")
+        elif not consistent:
             print(f"⚠️ Resultados PD diferentes: rec={rec_res}, memo={memo_res}, iterativo={iter_res}")
         else:
             print("✅ Resultados PD consistentes")
 
-        print(f"📊 Desperdício (memo): {memo_res}  |  (iterativo): {iter_res}")
+        print(f"📊 Desperdício (memo): {memo_res}  |  (iterativo): {iter_res}  "
+              f"|  vencedor: {corrida['vencedor']}")
+        if usar_cache:
+            estatisticas = self.cache_pd.estatisticas()
+            print(f"🗃️ Cache PD: {estatisticas['acertos']} acertos, {estatisticas['falhas']} falhas, "
+                f"{estatisticas['entradas']} entradas")
+            if self.cache_pd.caminho:
+                self.cache_pd.salvar()
         print("🏁 Cálculo de consumo ótimo finalizado com sucesso.")
         return rec_res, memo_res, iter_res
 
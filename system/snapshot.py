@@ -0,0 +1,124 @@
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.insumo import Insumo
+
+# Formato do arquivo (um único arquivo):
+#   MAGICO (8 bytes) | tamanho do cabeçalho (uint64) | cabeçalho JSON | arrays binários
+# Cada array começa alinhado em ALINHAMENTO bytes e é gravado cru (C-contíguo),
+# então pode ser mapeado em memória com np.memmap sem nenhuma conversão.
+MAGICO = b'GCISNAP1'
+ALINHAMENTO = 64
+VERSAO_FORMATO = 3  # 2: dinheiro em centavos inteiros; 3: coluna 'registros' no livro
+
+
+def _alinhar(posicao: int) -> int:
+    return (posicao + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def _catalogo(insumos: List[Insumo]) -> Dict[str, list]:
+    return {
+        'id': [i.id for i in insumos],
+        'nome': [i.nome for i in insumos],
+        'quantidade': [i.quantidade for i in insumos],
+        'validade': [i.validade_dia for i in insumos],
+        'tipo': [i.tipo for i in insumos],
+        'custo_centavos': [i.custo_centavos for i in insumos],
+    }
+
+
+def _montar_cabecalho(insumos: List[Insumo], formatos: Dict[str, Tuple[np.dtype, int]],
+                    metadados: Optional[Dict]) -> Tuple[bytes, Dict[str, Dict], int]:
+    """Cabeçalho JSON + descrição (com deslocamentos) de cada array + tamanho total do arquivo"""
+    descricao = {nome: {'dtype': np.dtype(dtype).str, 'tamanho': int(tamanho)}
+                for nome, (dtype, tamanho) in formatos.items()}
+    cabecalho = {'versao': VERSAO_FORMATO, 'insumos': _catalogo(insumos), 'arrays': descricao,
+                'metadados': metadados or {}}
+    # Os deslocamentos dependem do tamanho do cabeçalho (e vice-versa): repete até estabilizar
+    while True:
+        bruto = json.dumps(cabecalho).encode('utf-8')
+        posicao = _alinhar(len(MAGICO) + 8 + len(bruto))
+        deslocamentos_ok = True
+        for nome, d in descricao.items():
+            if d.get('deslocamento') != posicao:
+                d['deslocamento'] = posicao
+                deslocamentos_ok = False
+            posicao = _alinhar(posicao + d['tamanho'] * np.dtype(d['dtype']).itemsize)
+        if deslocamentos_ok:
+            return bruto, descricao, posicao
+
+
+def escrever_snapshot(caminho: str, insumos: List[Insumo], arrays: Dict[str, np.ndarray],
+                    metadados: Optional[Dict] = None):
+    """
+    GRAVAR SNAPSHOT: catálogo de insumos em JSON + arrays em layout binário alinhado.
+    - arrays: colunas do livro, índices e posições de fila/pilha (qualquer array NumPy 1-D)
+    """
+    formatos = {nome: (a.dtype, a.size) for nome, a in arrays.items()}
+    bruto, descricao, tamanho_total = _montar_cabecalho(insumos, formatos, metadados)
+
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(MAGICO)
+        arquivo.write(struct.pack('<Q', len(bruto)))
+        arquivo.write(bruto)
+        for nome, a in arrays.items():
+            arquivo.seek(descricao[nome]['deslocamento'])
+            np.ascontiguousarray(a).tofile(arquivo)
+        arquivo.truncate(tamanho_total)
+
+
+def criar_snapshot(caminho: str, insumos: List[Insumo], formatos: Dict[str, Tuple[np.dtype, int]],
+                metadados: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    CRIAR SNAPSHOT PARA PREENCHER: grava o cabeçalho, reserva o espaço dos arrays
+    (formatos: nome → (dtype, tamanho)) e devolve cada array mapeado para escrita.
+    Serve para montar arquivos maiores que a memória, bloco a bloco.
+    """
+    bruto, descricao, tamanho_total = _montar_cabecalho(insumos, formatos, metadados)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(MAGICO)
+        arquivo.write(struct.pack('<Q', len(bruto)))
+        arquivo.write(bruto)
+        arquivo.truncate(tamanho_total)
+
+    arrays = {}
+    for nome, d in descricao.items():
+        dtype = np.dtype(d['dtype'])
+        arrays[nome] = (np.zeros(0, dtype=dtype) if d['tamanho'] == 0 else
+                        np.memmap(caminho, dtype=dtype, mode='r+', offset=d['deslocamento'], shape=(d['tamanho'],)))
+    return arrays
+
+
+def ler_snapshot(caminho: str) -> Tuple[List[Insumo], Dict[str, np.ndarray], Dict]:
+    """
+    LER SNAPSHOT: recria o catálogo e MAPEIA os arrays em memória (modo cópia-na-escrita).
+    Nada dos arrays é lido do disco agora — o sistema operacional carrega as páginas
+    quando forem acessadas, por isso o tempo de carga não depende do número de registros.
+    """
+    with open(caminho, 'rb') as arquivo:
+        if arquivo.read(len(MAGICO)) != MAGICO:
+            raise ValueError(f"Arquivo não é um snapshot do sistema: {caminho}")
+        (tamanho,) = struct.unpack('<Q', arquivo.read(8))
+        cabecalho = json.loads(arquivo.read(tamanho).decode('utf-8'))
+
+    if cabecalho['versao'] != VERSAO_FORMATO:
+        raise ValueError(f"Versão de snapshot não suportada: {cabecalho['versao']}")
+
+    c = cabecalho['insumos']
+    insumos = [
+        Insumo(id_, nome, qtd, None, tipo, None, custo_centavos=custo, validade_dia=val)
+        for id_, nome, qtd, val, tipo, custo in zip(
+            c['id'], c['nome'], c['quantidade'], c['validade'], c['tipo'], c['custo_centavos'])
+    ]
+
+    arrays = {}
+    for nome, d in cabecalho['arrays'].items():
+        if d['tamanho'] == 0:
+            arrays[nome] = np.zeros(0, dtype=np.dtype(d['dtype']))
+        else:
+            arrays[nome] = np.memmap(caminho, dtype=np.dtype(d['dtype']), mode='c',
+                                    offset=d['deslocamento'], shape=(d['tamanho'],))
+    return insumos, arrays, cabecalho['metadados']
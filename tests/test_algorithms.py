@@ -8,6 +8,14 @@ from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
 from algorithms.busca import busca_sequencial, busca_binaria_por_data
 from algorithms.ordenacao import merge_sort_por_quantidade, quick_sort_por_validade
+from algorithms.previsao_demanda import PrevisaoDemanda
+from algorithms.otimizacao_compras import otimizar_compras
+from algorithms.cache_pd import CacheResultadosPD
+from algorithms.corrida_pd import correr_solvers
+from algorithms.ordenacao_externa import ordenar_externo, ordenar_livro_em_disco
+from system.dados_sinteticos import gerar_eventos, gerar_insumos
+from structures.livro_razao import LivroRazao
+import numpy as np
 
 class TestAlgorithms:
     """Testes para os algoritmos de busca e ordenação"""
@@ -82,4 +90,280 @@ class TestAlgorithms:
         # Primeiro deve ser o que vence primeiro (2024-11-30)
         assert ordenados[0].insumo.validade == datetime.date(2024, 11, 30)
         # Último deve ser o que vence por último (2025-06-30)
-        assert ordenados[-1].insumo.validade == datetime.date(2025, 6, 30)
\ No newline at end of file
+        assert ordenados[-1].insumo.validade == datetime.date(2025, 6, 30)
+
+class TestPrevisaoDemanda:
+    """Testes para a previsão de demanda vetorizada"""
+
+    @pytest.fixture
+    def insumos(self):
+        return [
+            Insumo(1, "Reagente A", 1000, datetime.date(2025, 12, 31), "reagente", 15.50),
+            Insumo(2, "Luvas", 1000, datetime.date(2025, 6, 30), "descartavel", 2.10),
+        ]
+
+    def _registros(self, insumos, consumos_a, consumos_b):
+        """Cria registros diários a partir de 01/01/2024 para os dois insumos"""
+        inicio = datetime.date(2024, 1, 1)
+        registros = []
+        for dia, (qa, qb) in enumerate(zip(consumos_a, consumos_b)):
+            data = inicio + datetime.timedelta(days=dia)
+            if qa:
+                registros.append(RegistroConsumo(insumos[0], data, qa))
+            if qb:
+                registros.append(RegistroConsumo(insumos[1], data, qb))
+        return registros
+
+    def test_media_movel_e_sazonal(self, insumos):
+        """Testa média móvel e sazonal ingênua calculadas para todos os insumos"""
+        registros = self._registros(insumos, [1, 2, 3, 4, 5, 6, 7, 8], [10] * 8)
+        previsao = PrevisaoDemanda(insumos, janela=3, periodo_sazonal=7)
+        previsao.sincronizar(registros)
+        previsao.fechar_ate(datetime.date(2024, 1, 8))
+
+        resultado = previsao.resultado('media_movel')
+        assert resultado['media_movel'][0] == pytest.approx(7.0)  # (6 + 7 + 8) / 3
+        assert resultado['media_movel'][1] == pytest.approx(10.0)
+        assert resultado['sazonal'][0] == pytest.approx(2.0)  # 7 dias atrás
+
+    def test_incremental_igual_ao_recalculo(self, insumos):
+        """Fechar dia a dia deve dar o mesmo resultado que processar tudo de uma vez"""
+        registros = self._registros(insumos, [3, 0, 5, 1, 4, 2, 6], [1, 2, 0, 7, 3, 3, 1])
+
+        incremental = PrevisaoDemanda(insumos, alfa=0.4)
+        for dia in range(7):
+            data = datetime.date(2024, 1, 1) + datetime.timedelta(days=dia)
+            incremental.sincronizar([r for r in registros if r.data <= data])
+            incremental.fechar_ate(data)
+
+        completo = PrevisaoDemanda(insumos, alfa=0.4)
+        completo.sincronizar(registros)
+        completo.fechar_ate(datetime.date(2024, 1, 7))
+
+        assert incremental.resultado()['exponencial'] == pytest.approx(completo.resultado()['exponencial'])
+
+    def test_registrar_colunas(self, insumos):
+        """Colunas (linha, dia, quantidade) dão o mesmo resultado que os registros, em qualquer ordem"""
+        registros = self._registros(insumos, [3, 0, 5, 1, 4], [1, 2, 0, 7, 3])
+        por_registro = PrevisaoDemanda(insumos)
+        por_registro.sincronizar(registros)
+        por_registro.fechar_ate(datetime.date(2024, 1, 5))
+
+        por_colunas = PrevisaoDemanda(insumos)
+        registros.reverse()
+        por_colunas.registrar_colunas(np.array([insumos.index(r.insumo) for r in registros]),
+                                      np.array([r.dia for r in registros]),
+                                      np.array([r.quantidade_consumida for r in registros]))
+        por_colunas.fechar_ate(datetime.date(2024, 1, 5))
+        assert por_colunas.resultado()['exponencial'] == pytest.approx(por_registro.resultado()['exponencial'])
+
+    def test_registro_retroativo(self, insumos):
+        """Um registro em dia já fechado deve atualizar a previsão"""
+        registros = self._registros(insumos, [2, 2, 2], [1, 1, 1])
+        previsao = PrevisaoDemanda(insumos, janela=3)
+        previsao.sincronizar(registros)
+        previsao.fechar_ate(datetime.date(2024, 1, 3))
+        assert previsao.resultado('media_movel')['media_movel'][0] == pytest.approx(2.0)
+
+        registros.append(RegistroConsumo(insumos[0], datetime.date(2024, 1, 2), 3))
+        previsao.sincronizar(registros)
+        assert previsao.resultado('media_movel')['media_movel'][0] == pytest.approx(3.0)
+
+    def test_ponto_reposicao_e_cobertura(self, insumos):
+        """Testa ponto de reposição e dias de cobertura"""
+        registros = self._registros(insumos, [5] * 5, [0] * 5)
+        previsao = PrevisaoDemanda(insumos, janela=5, tempo_reposicao=2)
+        previsao.sincronizar(registros)
+        previsao.fechar_ate(datetime.date(2024, 1, 5))
+
+        resultado = previsao.resultado('media_movel')
+        assert resultado['ponto_reposicao'][0] == pytest.approx(10.0)  # 5/dia × 2 dias, sem variação
+        assert resultado['dias_cobertura'][0] == pytest.approx(insumos[0].quantidade / 5)
+        assert resultado['dias_cobertura'][1] == float('inf')  # sem consumo
+
+
+class TestOtimizacaoCompras:
+    """Testes para o otimizador de compras com orçamento"""
+
+    @pytest.fixture
+    def insumos(self):
+        return [
+            Insumo(1, "Reagente A", 0, datetime.date(2025, 12, 31), "reagente", 3.00),
+            Insumo(2, "Reagente B", 0, datetime.date(2025, 12, 31), "reagente", 5.00),
+            Insumo(3, "Luvas", 0, datetime.date(2025, 12, 31), "descartavel", 4.00),
+        ]
+
+    def _forca_bruta(self, custos, valores, limites, orcamento):
+        """Melhor valor testando todas as combinações de quantidades"""
+        import itertools
+        melhor = 0
+        for qs in itertools.product(*[range(l + 1) for l in limites]):
+            if sum(q * c for q, c in zip(qs, custos)) <= orcamento:
+                melhor = max(melhor, sum(q * v for q, v in zip(qs, valores)))
+        return melhor
+
+    def test_respeita_orcamento_e_necessidade(self, insumos):
+        """Nunca gasta mais que o orçamento nem compra além da demanda útil"""
+        resultado = otimizar_compras(insumos, [1, 1, 1], orcamento=40, horizonte=5)
+
+        assert resultado['modo'] == 'exato'
+        assert resultado['custo_total'] <= 40
+        assert all(q <= 5 for q in resultado['quantidades'].values())
+
+    def test_igual_forca_bruta(self, insumos):
+        """A PD com vetor rolante encontra o ótimo"""
+        pesos = [2.0, 7.0, 5.0]
+        resultado = otimizar_compras(insumos, [1, 1, 1], orcamento=31, horizonte=4, pesos=pesos)
+
+        esperado = self._forca_bruta([3, 5, 4], pesos, [4, 4, 4], 31)
+        assert resultado['valor_total'] == pytest.approx(esperado)
+
+    def test_vida_util_limita_compra(self, insumos):
+        """Não compra mais do que dá para usar antes de vencer"""
+        resultado = otimizar_compras(insumos, [2, 2, 2], orcamento=1000, horizonte=30, vida_util=[3, 30, 30])
+        assert resultado['quantidades']['Reagente A'] == 6  # 2/dia × 3 dias de vida útil
+
+    def test_modo_aproximado(self, insumos):
+        """Orçamentos grandes usam escala maior e continuam viáveis"""
+        resultado = otimizar_compras(insumos, [50, 50, 50], orcamento=5000, horizonte=30, max_celulas=100)
+        assert resultado['modo'] == 'aproximado'
+        assert resultado['custo_total'] <= 5000
+
+    def test_modo_aproximado_gasta_a_folga(self):
+        """Com demanda sobrando, a folga dos custos arredondados é gasta com os custos exatos"""
+        insumos = [Insumo(i + 1, f"Item {i}", 0, datetime.date(2025, 12, 31), "reagente", custo)
+                   for i, custo in enumerate([3.01, 5.03, 4.07])]
+        resultado = otimizar_compras(insumos, [50, 50, 50], orcamento=5000, horizonte=30, max_celulas=100)
+        assert resultado['modo'] == 'aproximado'
+        assert 5000 - 3.01 < resultado['custo_total'] <= 5000
+        assert all(q <= 1500 for q in resultado['quantidades'].values())
+
+
+class TestCacheResultadosPD:
+    """Testes para o cache de resultados da programação dinâmica"""
+
+    def test_acerto_com_chave_canonica(self):
+        """Estoques que normalizam para o mesmo vetor reaproveitam o resultado"""
+        cache = CacheResultadosPD()
+        chamadas = []
+
+        def calcular():
+            chamadas.append(1)
+            return 0
+
+        cache.obter_ou_calcular([100, 60], 50, 'iterativa', calcular)
+        cache.obter_ou_calcular([90, 51], 50, 'iterativa', calcular)  # também vira (2, 2)
+        cache.obter_ou_calcular([90, 51], 50, 'memorizacao', calcular)  # outro solver
+
+        assert len(chamadas) == 2
+        estatisticas = cache.estatisticas()
+        assert (estatisticas['acertos'], estatisticas['falhas']) == (1, 2)
+
+    def test_remove_menos_usado(self):
+        """Ao passar do limite de memória, sai a entrada usada há mais tempo"""
+        chave_a = CacheResultadosPD.chave([1], 1, 'a')
+        limite = 2 * (sys.getsizeof(chave_a) + 600)
+        cache = CacheResultadosPD(memoria_maxima=limite)
+        cache.guardar(chave_a, 0)
+        cache.guardar(CacheResultadosPD.chave([2], 1, 'a'), 0)
+        cache.obter(chave_a)  # "a" volta a ser a mais recente
+        for q in range(3, 40):
+            cache.guardar(CacheResultadosPD.chave([q], 1, 'a'), 0)
+            cache.obter(chave_a)
+
+        assert cache.bytes_usados <= limite
+        assert chave_a in cache
+        assert CacheResultadosPD.chave([2], 1, 'a') not in cache
+        assert cache.estatisticas()['removidas'] > 0
+
+    def test_persistencia_em_disco(self, tmp_path):
+        """O cache salvo em arquivo é recarregado em uma nova instância"""
+        caminho = str(tmp_path / "cache_pd.pkl")
+        cache = CacheResultadosPD(caminho=caminho)
+        cache.obter_ou_calcular([10, 20], 1, 'iterativa', lambda: 7)
+        cache.salvar()
+
+        novo = CacheResultadosPD(caminho=caminho)
+        assert novo.obter_ou_calcular([10, 20], 1, 'iterativa', lambda: -1) == 7
+        assert novo.estatisticas()['acertos'] == 1
+
+
+class TestCorridaSolvers:
+    """Testes para a corrida das versões da PD em processos"""
+
+    def test_todos_terminam_com_tempos(self):
+        """Estoques pequenos: as três versões terminam e concordam"""
+        corrida = correr_solvers([3, 2, 4], bloco=1)
+
+        assert set(corrida['situacao'].values()) == {'ok'}
+        assert len(set(corrida['resultados'].values())) == 1
+        assert corrida['vencedor'] in corrida['resultados']
+        assert all(t >= 0 for t in corrida['tempos'].values())
+
+    def test_orcamento_cancela_versao_lenta(self):
+        """A recursiva em estoques grandes é encerrada ao fim do orçamento"""
+        corrida = correr_solvers([100] * 10, bloco=1, solvers=('recursiva', 'iterativa'),
+                                 orcamento={'recursiva': 0.2})
+
+        assert corrida['situacao']['recursiva'] == 'tempo_esgotado'
+        assert corrida['tempos']['recursiva'] >= 0.2
+        assert corrida['vencedor'] == 'iterativa'
+        assert corrida['resultado'] == corrida['resultados']['iterativa']
+
+    def test_primeiro_resultado_cancela_demais(self):
+        """Sem esperar todos, a corrida termina no primeiro resultado verificado"""
+        corrida = correr_solvers([100] * 10, bloco=1, esperar_todos=False)
+
+        assert corrida['vencedor'] is not None
+        assert 'cancelado' in corrida['situacao'].values()
+        assert sum(corrida['tempos'].values()) < 2.0
+
+    def test_resultado_conhecido_nao_roda(self):
+        """Resultados do cache contam como concluídos"""
+        corrida = correr_solvers([10, 20], bloco=1, solvers=('iterativa',), conhecidos={'iterativa': 0})
+        assert corrida['situacao'] == {'iterativa': 'cache'}
+
+    def test_solver_desconhecido(self):
+        with pytest.raises(ValueError):
+            correr_solvers([1], solvers=('magica',))
+
+
+class TestOrdenacaoExterna:
+    """Testes para a ordenação externa (corridas em disco + intercalação em k vias)"""
+
+    @pytest.fixture
+    def livro_e_insumos(self):
+        insumos = gerar_insumos(50, semente=3)
+        colunas = next(gerar_eventos(insumos, 30_000, semente=3))
+        return LivroRazao.de_colunas(colunas), insumos
+
+    @pytest.mark.parametrize("por", ['quantidade', 'validade'])
+    def test_igual_a_ordenacao_estavel(self, livro_e_insumos, tmp_path, por):
+        """Orçamento pequeno força várias corridas e passadas; o resultado é o argsort estável"""
+        livro, insumos = livro_e_insumos
+        destino = str(tmp_path / "ordenado.npy")
+        info = ordenar_livro_em_disco(livro, insumos, destino, por=por, memoria_maxima=1 << 20,
+                                      pasta=str(tmp_path))
+        assert info['linhas'] == len(livro) and info['corridas'] > 2 and info['passadas'] > 1
+
+        ordenado = np.load(destino, mmap_mode='r')
+        validades = np.array([i.validade_dia for i in insumos])
+        chave = livro.coluna('quantidade') if por == 'quantidade' else validades[livro.coluna('insumo')]
+        esperado = np.argsort(chave, kind='stable')
+        assert np.array_equal(ordenado['linha'], esperado)
+        assert np.array_equal(ordenado['custo'], livro.coluna('custo')[esperado])
+        assert list(tmp_path.iterdir()) == [tmp_path / "ordenado.npy"]  # temporários apagados
+
+    def test_blocos_genericos(self):
+        rng = np.random.default_rng(0)
+        blocos = []
+        for inicio in range(0, 20_000, 3_000):
+            bloco = np.zeros(min(3_000, 20_000 - inicio), dtype=[('chave', np.int64), ('linha', np.int64)])
+            bloco['chave'] = rng.integers(0, 50, len(bloco))
+            bloco['linha'] = np.arange(inicio, inicio + len(bloco))
+            blocos.append(bloco)
+        saida = np.concatenate(list(ordenar_externo(iter(blocos), memoria_maxima=200_000)))
+        todas = np.concatenate(blocos)
+        assert np.array_equal(saida['linha'], np.argsort(todas['chave'], kind='stable'))
+        assert list(ordenar_externo(iter([]))) == []
+
@@ -6,6 +6,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
+from models.dinheiro import formatar_reais, para_centavos
 
 class TestModels:
     """Testes para as classes de modelo (Insumo e RegistroConsumo)"""
@@ -61,4 +62,15 @@ class TestModels:
         registro = RegistroConsumo(insumo, datetime.date(2024, 1, 15), 5)
         
         expected_str = "2024-01-15: Reagente A - 5 unidades - R$ 77.50"
-        assert str(registro) == expected_str
\ No newline at end of file
+        assert str(registro) == expected_str
+
+    def test_dinheiro_em_centavos(self):
+        """Preços viram centavos inteiros; o texto em reais só aparece na exibição"""
+        assert para_centavos(0.29) == 29
+        assert para_centavos(15.5) == 1550
+        assert formatar_reais(1550) == "R$ 15.50"
+        assert formatar_reais(-5) == "R$ -0.05"
+        insumo = Insumo(1, "Gaze", 1000, datetime.date(2024, 12, 31), "descartavel", 0.10)
+        assert insumo.custo_centavos == 10
+        registros = [RegistroConsumo(insumo, datetime.date(2024, 1, 1), 1) for _ in range(10)]
+        assert sum(r.custo_centavos for r in registros) == 100  # 10 × 0.10 é exatamente R$ 1.00
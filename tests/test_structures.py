@@ -1,5 +1,6 @@
 import pytest
 import datetime
+import numpy as np
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -8,6 +9,14 @@ from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
 from structures.fila_consumo import FilaConsumo
 from structures.pilha_consulta import PilhaConsulta
+from structures.arvore_fenwick import ArvoreFenwick, HistoricoEstoque
+from structures.janela_consumo import EstatisticasJanela
+from structures.indice_trigramas import IndiceTrigramas, normalizar
+from structures.log_eventos import LogEventos
+from structures.detector_anomalias import DetectorAnomalias
+from structures.livro_compartilhado import LivroCompartilhado, LeitorLivroCompartilhado
+from structures.livro_razao import LivroRazao
+from structures.cubo_consumo import CuboConsumo
 
 class TestStructures:
     """Testes para as estruturas de dados (Fila e Pilha)"""
@@ -104,4 +113,455 @@ class TestStructures:
         
         # Remove na ordem inversa: primeiro registro2 (último), depois registro1
         assert pilha.desempilhar() == registro2  # Último a entrar, primeiro a sair
-        assert pilha.desempilhar() == registro1  # Primeiro a entrar, último a sair
\ No newline at end of file
+        assert pilha.desempilhar() == registro1  # Primeiro a entrar, último a sair
+
+class TestArvoreFenwick:
+    """Testes para a árvore de Fenwick e o histórico de estoque"""
+
+    def test_prefixo_e_intervalo(self):
+        """Somas de prefixo e de intervalo batem com a soma direta"""
+        valores = [3, 0, 5, 1, 4, 2, 6, 7, 1]
+        arvore = ArvoreFenwick(valores)
+        for i in range(len(valores)):
+            assert arvore.prefixo(i) == sum(valores[:i + 1])
+        assert arvore.intervalo(2, 5) == sum(valores[2:6])
+        assert arvore.prefixo(-1) == 0
+
+    def test_adicionar(self):
+        """Atualizar uma posição altera só os prefixos que a incluem"""
+        arvore = ArvoreFenwick(tamanho=8)
+        arvore.adicionar(3, 10)
+        arvore.adicionar(6, 2)
+        assert arvore.prefixo(2) == 0
+        assert arvore.prefixo(3) == 10
+        assert arvore.prefixo(7) == 12
+        with pytest.raises(IndexError):
+            arvore.adicionar(8, 1)
+
+    def test_historico_retroativo(self):
+        """Registros fora de ordem (antes e depois do intervalo) são aceitos"""
+        historico = HistoricoEstoque()
+        historico.registrar(0, 100, 5)
+        historico.registrar(0, 110, 3)
+        historico.registrar(0, 90, 2)   # antes da origem
+        historico.registrar(1, 105, 7)  # outro insumo
+
+        assert historico.consumo_no_periodo(0, 90, 110) == 10
+        assert historico.consumo_no_periodo(0, 95, 105) == 5
+        assert historico.consumo_depois(0, 100) == 3
+        assert historico.consumo_no_periodo(1, 0, 1000) == 7
+
+    def test_entradas_no_historico(self):
+        """Entradas só contam para o estoque dos dias anteriores a elas, mesmo fora da faixa de dias"""
+        historico = HistoricoEstoque()
+        historico.registrar(0, 100, 5)
+        historico.registrar_entrada(0, 120, 50)  # depois da faixa: amplia
+        historico.registrar(0, 110, 3)
+        assert historico.entradas_depois(0, 110) == 50
+        assert historico.entradas_depois(0, 120) == 0
+        # estoque atual 142 = 100 - 5 - 3 + 50
+        assert historico.estoque_em(0, 100, 142) == 95
+        assert historico.estoque_em(0, 119, 142) == 92
+        assert historico.estoque_em(0, 120, 142) == 142
+
+    def test_de_colunas_igual_incremental(self):
+        """Montar pelas colunas do livro dá o mesmo que registrar um a um"""
+        insumos = np.array([0, 1, 0, 0], dtype=np.int32)
+        dias = np.array([10, 11, 12, 10], dtype=np.int32)
+        quantidades = np.array([1, 2, 3, 4])
+        montado = HistoricoEstoque.de_colunas(insumos, dias, quantidades)
+        incremental = HistoricoEstoque()
+        for i, d, q in zip(insumos.tolist(), dias.tolist(), quantidades.tolist()):
+            incremental.registrar(i, d, q)
+        for dia in range(9, 14):
+            assert montado.consumo_depois(0, dia) == incremental.consumo_depois(0, dia)
+
+
+class TestEstatisticasJanela:
+    """Testes para as estatísticas em janela deslizante"""
+
+    def _forca_bruta(self, eventos, janela, referencia):
+        """Soma, pico e mínimo diário calculados percorrendo tudo"""
+        por_dia = {}
+        for dia, qtd in eventos:
+            if referencia - janela < dia <= referencia:
+                por_dia[dia] = por_dia.get(dia, 0) + qtd
+        diarios = [por_dia.get(d, 0) for d in range(referencia - janela + 1, referencia + 1)]
+        return sum(diarios), max(diarios), min(diarios)
+
+    def test_igual_forca_bruta(self):
+        """Soma, máximo e mínimo batem com o cálculo direto em todo evento"""
+        import random
+        rng = random.Random(7)
+        estatisticas = EstatisticasJanela(janelas=(3, 7))
+        eventos = []
+        for dia in range(40):
+            for _ in range(rng.randint(0, 3)):
+                qtd = rng.randint(1, 9)
+                eventos.append((dia, qtd))
+                estatisticas.registrar(0, dia, qtd)
+                for janela in (3, 7):
+                    r = estatisticas.consultar(0, janela)
+                    assert (r['soma'], r['maximo'], r['minimo']) == self._forca_bruta(eventos, janela, dia)
+
+    def test_retroativo_e_avanco(self):
+        """Eventos atrasados dentro da janela contam; fora dela, não"""
+        estatisticas = EstatisticasJanela(janelas=(7,))
+        estatisticas.registrar(0, 10, 5)
+        estatisticas.registrar(0, 12, 1)
+        estatisticas.registrar(0, 11, 8)  # retroativo dentro da janela
+        estatisticas.registrar(0, 1, 50)  # antigo demais
+        resultado = estatisticas.consultar(0, 7)
+        assert resultado['soma'] == 14
+        assert resultado['maximo'] == 8
+
+        # Sem eventos novos, a janela anda com o dia de referência
+        assert estatisticas.consultar(0, 7, dia_referencia=17)['soma'] == 9
+        with pytest.raises(ValueError):
+            estatisticas.consultar(0, 30)
+
+    def test_consulta_adiante_nao_move_a_janela(self):
+        """Consultar um dia futuro é só leitura: a consulta padrão e os retroativos seguem iguais"""
+        estatisticas = EstatisticasJanela(janelas=(7,))
+        for dia, qtd in ((10, 5), (11, 8), (12, 1)):
+            estatisticas.registrar(0, dia, qtd)
+        adiante = estatisticas.consultar(0, 7, dia_referencia=17)
+        assert (adiante['soma'], adiante['maximo'], adiante['minimo']) == (9, 8, 0)
+        resultado = estatisticas.consultar(0, 7)
+        assert (resultado['soma'], resultado['maximo']) == (14, 8)
+        estatisticas.registrar(0, 10, 100)  # retroativo ainda dentro da janela do dia 12
+        assert estatisticas.consultar(0, 7)['soma'] == 114
+        assert estatisticas.consultar(0, 7)['maximo'] == 105
+
+
+class TestPilhaLimitada:
+    """Testes para a pilha com profundidade limitada e paginação"""
+
+    @pytest.fixture
+    def registros(self):
+        insumo = Insumo(1, "Reagente A", 1000, datetime.date(2024, 12, 31), "reagente", 15.50)
+        return [RegistroConsumo(insumo, datetime.date(2024, 1, 1) + datetime.timedelta(days=i), 1)
+                for i in range(10)]
+
+    def test_descarta_mais_antigo(self, registros):
+        """Ao encher, o registro mais antigo sai e a pilha fica no limite"""
+        pilha = PilhaConsulta(profundidade_maxima=4)
+        for registro in registros:
+            pilha.empilhar(registro)
+
+        assert pilha.tamanho() == 4
+        assert pilha.descartados == 6
+        assert pilha.topo() == registros[-1]
+        assert pilha.registros == registros[-4:]
+
+    def test_paginacao_por_cursor(self, registros):
+        """Cada página continua de onde a anterior parou, do mais recente ao mais antigo"""
+        pilha = PilhaConsulta(profundidade_maxima=7)
+        for registro in registros:
+            pilha.empilhar(registro)
+
+        pagina1, cursor = pilha.pagina(3)
+        pagina2, cursor = pilha.pagina(3, antes_de=cursor)
+        pagina3, cursor = pilha.pagina(3, antes_de=cursor)
+
+        assert pagina1 == registros[9:6:-1]
+        assert pagina2 == registros[6:3:-1]
+        assert pagina3 == [registros[3]]
+        assert cursor is None
+
+    def test_desempilhar_e_ilimitada(self, registros):
+        """Desempilhar continua LIFO; sem limite a pilha guarda tudo"""
+        pilha = PilhaConsulta(profundidade_maxima=None)
+        for registro in registros:
+            pilha.empilhar(registro)
+        assert pilha.tamanho() == 10
+        assert pilha.desempilhar() == registros[-1]
+        assert pilha.pagina(2)[0] == [registros[8], registros[7]]
+        with pytest.raises(ValueError):
+            PilhaConsulta(profundidade_maxima=0)
+
+
+class TestIndiceTrigramas:
+    """Testes para o índice de trigramas (busca aproximada de nomes)"""
+
+    NOMES = ['Reagente A', 'Reagente B', 'Luvas', 'Máscaras', 'Tubos', 'Agulhas']
+
+    def test_normalizar_remove_acentos(self):
+        assert normalizar('  Máscaras  N95!') == 'mascaras n95'
+        assert normalizar('ÁLCOOL 70%') == 'alcool 70'
+
+    def test_busca_ignora_acento(self):
+        """'Mascaras' encontra 'Máscaras' com similaridade máxima"""
+        indice = IndiceTrigramas(self.NOMES)
+        posicao, similaridade = indice.buscar('Mascaras')[0]
+        assert indice.nomes[posicao] == 'Máscaras'
+        assert similaridade == 1.0
+
+    def test_busca_tolera_erro_de_digitacao(self):
+        indice = IndiceTrigramas(self.NOMES)
+        resultados = indice.buscar('agulas', limite=3)
+        assert indice.nomes[resultados[0][0]] == 'Agulhas'
+        assert len(resultados) <= 3
+        assert [s for _, s in resultados] == sorted((s for _, s in resultados), reverse=True)
+
+    def test_sem_trigramas_em_comum(self):
+        indice = IndiceTrigramas(self.NOMES)
+        assert indice.buscar('xyz') == []
+
+    def test_autocompletar(self):
+        """Prefixo sem acento, resultados em ordem alfabética, inclusive nomes novos"""
+        indice = IndiceTrigramas(self.NOMES)
+        assert [indice.nomes[p] for p in indice.autocompletar('reag')] == ['Reagente A', 'Reagente B']
+        indice.adicionar('Máscara N95')
+        assert [indice.nomes[p] for p in indice.autocompletar('MASC')] == ['Máscara N95', 'Máscaras']
+        assert indice.autocompletar('reag', limite=1) == [0]
+
+    def test_posicao_exata(self):
+        indice = IndiceTrigramas(self.NOMES)
+        assert indice.posicao_exata('MASCARAS') == 3
+        assert indice.posicao_exata('Mascara') is None
+
+
+class TestLogEventos:
+    """Testes para o log de eventos (CDC) e as assinaturas"""
+
+    def test_lotes_em_ordem_e_filtrados(self):
+        log = LogEventos()
+        assinatura = log.assinar(tipos=['consumo'])
+        for i in range(5):
+            log.publicar('consumo', quantidade=i)
+            log.publicar('estoque', quantidade=-i)
+        lote = assinatura.receber(maximo=3)
+        assert [e['quantidade'] for e in lote] == [0, 1, 2]
+        resto = assinatura.receber()
+        sequencias = [e['sequencia'] for e in lote + resto]
+        assert sequencias == sorted(sequencias) and len(sequencias) == 5
+        assert all(e['tipo'] == 'consumo' for e in resto)
+        assert assinatura.receber() == []
+
+    def test_retomar_de_uma_posicao(self):
+        """Quem guardou a posição recebe exatamente o que perdeu"""
+        log = LogEventos()
+        primeira = log.assinar()
+        log.publicar('consumo', quantidade=1)
+        primeira.receber()
+        posicao = primeira.posicao
+        primeira.cancelar()
+        log.publicar('consumo', quantidade=2)
+        log.publicar('insumo', acao='alterado')
+        retomada = log.assinar(desde=posicao)
+        assert [e['sequencia'] for e in retomada.receber()] == [2, 3]
+
+    def test_assinante_lento_isolado(self):
+        """Buffer cheio não trava quem publica nem os outros; o atrasado lê do log depois"""
+        log = LogEventos(retencao=100)
+        lenta = log.assinar(capacidade=2)
+        rapida = log.assinar(capacidade=100)
+        for i in range(10):
+            log.publicar('consumo', quantidade=i)
+        assert lenta.pendentes == 2 and lenta.atrasada
+        assert len(rapida.receber()) == 10
+        recebidos = []
+        while True:
+            lote = lenta.receber()
+            if not lote:
+                break
+            assert len(lote) <= 2
+            recebidos += lote
+        assert [e['quantidade'] for e in recebidos] == list(range(10))
+        assert not lenta.atrasada
+        log.publicar('consumo', quantidade=10)
+        assert lenta.receber()[0]['quantidade'] == 10
+
+    def test_posicao_acompanha_eventos_de_outros_tipos(self):
+        """Assinante filtrado e em dia retoma sem LookupError mesmo após muitos eventos de outro tipo"""
+        log = LogEventos(retencao=10)
+        assinatura = log.assinar(['insumo'])
+        log.publicar('insumo', acao='adicionado')
+        assert len(assinatura.receber()) == 1
+        for i in range(30):
+            log.publicar('consumo', quantidade=i)
+        retomada = log.assinar(['insumo'], desde=assinatura.posicao)
+        assert retomada.receber() == []
+        log.publicar('consumo', quantidade=30)
+        log.publicar('insumo', acao='alterado')
+        assert assinatura.posicao == 33  # evento pendente no buffer
+        assinatura.cancelar()
+        log.publicar('insumo', acao='alterado')
+        assert assinatura.posicao == 33  # cancelada: não avança sozinha
+        assert [e['sequencia'] for e in log.assinar(['insumo'], desde=assinatura.posicao).receber()] == [33, 34]
+
+        # Lendo do log depois de atrasar: termina em dia, também sem posição velha
+        lenta = log.assinar(['insumo'], capacidade=1)
+        log.publicar('insumo', acao='alterado')
+        log.publicar('insumo', acao='alterado')
+        assert lenta.atrasada
+        while lenta.receber():
+            pass
+        for i in range(20):
+            log.publicar('consumo', quantidade=i)
+        log.assinar(['insumo'], desde=lenta.posicao)
+
+    def test_posicao_fora_da_retencao(self):
+        log = LogEventos(retencao=3)
+        for i in range(5):
+            log.publicar('consumo', quantidade=i)
+        assert log.primeira_sequencia == 3
+        with pytest.raises(LookupError):
+            log.assinar(desde=1)
+        with pytest.raises(ValueError):
+            log.assinar(desde=10)
+        with pytest.raises(ValueError):
+            log.publicar('desconhecido')
+
+
+
+class TestDetectorAnomalias:
+    """Testes para o detector de picos de consumo em fluxo"""
+
+    def test_pico_de_evento_e_de_dia(self):
+        detector = DetectorAnomalias(aquecimento=5)
+        for dia in range(20):
+            assert detector.registrar(0, 100 + dia, 4 + dia % 2) == []  # consumo estável: 4 ou 5
+        alertas = detector.registrar(0, 120, 40)
+        assert [a['tipo'] for a in alertas] == ['evento', 'dia']
+        assert alertas[0]['valor'] == 40 and alertas[0]['escore'] > detector.limiar
+        assert detector.registrar(0, 120, 40)[0]['tipo'] == 'evento'  # o dia só é avisado uma vez
+        assert len(detector.alertas) == 3
+
+    def test_dia_com_muitos_consumos_pequenos(self):
+        """Nenhum consumo é estranho sozinho, mas o total do dia é"""
+        detector = DetectorAnomalias(aquecimento=5)
+        for dia in range(20):
+            detector.registrar(3, dia, 5)
+        tipos = [a['tipo'] for q in range(10) for a in detector.registrar(3, 20, 5)]
+        assert tipos == ['dia']
+
+    def test_aquecimento_e_pico_nao_contamina(self):
+        detector = DetectorAnomalias(aquecimento=10)
+        assert detector.registrar(2, 0, 5) == []
+        assert detector.registrar(2, 1, 1000) == []  # ainda aquecendo: nada a comparar
+        for dia in range(30):
+            detector.registrar(1, dia, 5)
+        assert detector.registrar(1, 30, 500)
+        estado = detector.estado(1)
+        assert estado['eventos'] == 31 and estado['media_evento'] < 10
+        assert detector.registrar(1, 31, 500)  # o segundo pico continua sendo pico
+
+
+class TestLivroCompartilhado:
+    """Testes para o livro-razão em memória compartilhada"""
+
+    def _livro(self, linhas):
+        livro = LivroRazao()
+        for i in range(linhas):
+            livro.adicionar(i % 3, 738886 + i, i + 1, 100 * (i + 1))
+        return livro
+
+    def test_instantaneo_consistente_enquanto_escritor_acrescenta(self):
+        livro = self._livro(10)
+        with LivroCompartilhado(livro, capacidade_minima=32) as escritor:
+            with LeitorLivroCompartilhado(escritor.nome) as leitor:
+                retrato = leitor.instantaneo()
+                assert len(retrato['dia']) == 10 and not leitor.mudou
+                assert not retrato['quantidade'].flags.writeable
+                livro.adicionar(0, 738900, 50, 5000)
+                escritor.publicar()
+                assert len(retrato['dia']) == 10 and leitor.mudou  # o retrato antigo não muda
+                novo = leitor.livro()
+                assert len(novo) == 11 and int(novo.coluna('quantidade').sum()) == 55 + 50
+                assert novo.versao == livro.versao
+        # Leitor fechado e segmentos apagados: as visões entregues continuam válidas
+        import gc
+        gc.collect()
+        assert retrato['quantidade'].sum() == 55 and novo.coluna('dia')[-1] == 738900
+
+    def test_nova_epoca_ao_crescer_ou_trocar_de_livro(self):
+        livro = self._livro(4)
+        with LivroCompartilhado(livro, capacidade_minima=4) as escritor:
+            with LeitorLivroCompartilhado(escritor.nome) as leitor:
+                antigo = leitor.instantaneo()
+                for i in range(20):
+                    livro.adicionar(1, 738900 + i, 1, 1)
+                    escritor.publicar()
+                assert escritor.epoca > 1 and escritor.capacidade >= 24
+                assert leitor.instantaneo()['quantidade'].sum() == 10 + 20
+                assert antigo['quantidade'].tolist() == [1, 2, 3, 4]  # época antiga ainda mapeada
+                escritor.publicar(self._livro(2))
+                assert leitor.instantaneo()['quantidade'].tolist() == [1, 2]
+                del antigo
+
+    def test_leitor_em_outro_interpretador_nao_apaga_o_segmento(self):
+        """Um leitor com resource_tracker próprio sai sem apagar (nem avisar sobre) os segmentos"""
+        import subprocess
+        raiz = os.path.join(os.path.dirname(__file__), '..')
+        with LivroCompartilhado(self._livro(5)) as escritor:
+            codigo = ("from structures.livro_compartilhado import LeitorLivroCompartilhado\n"
+                      f"with LeitorLivroCompartilhado({escritor.nome!r}) as leitor:\n"
+                      "    print(int(leitor.instantaneo()['quantidade'].sum()))\n")
+            saida = subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True)
+            assert saida.returncode == 0 and saida.stdout.strip() == '15'
+            assert 'leaked' not in saida.stderr
+            with LeitorLivroCompartilhado(escritor.nome) as leitor:
+                assert int(leitor.instantaneo()['quantidade'].sum()) == 15
+
+    def test_escritor_fechado(self):
+        escritor = LivroCompartilhado(self._livro(3))
+        leitor = LeitorLivroCompartilhado(escritor.nome)
+        escritor.fechar()
+        with pytest.raises(ValueError):
+            leitor.instantaneo()
+        with pytest.raises(ValueError):
+            escritor.publicar()
+        leitor.fechar()
+
+
+class TestCuboConsumo:
+    """Testes para o cubo de consumo insumo × dia × tipo"""
+
+    TIPOS = ['reagente', 'descartavel', 'reagente']
+
+    def _colunas(self):
+        rng = np.random.default_rng(7)
+        insumos = rng.integers(0, 3, 500).astype(np.int32)
+        dias = (738886 + rng.integers(0, 60, 500)).astype(np.int32)  # 01/01/2024 em diante
+        return insumos, dias, rng.integers(1, 10, 500)
+
+    def test_bincount_igual_ao_incremental(self):
+        insumos, dias, quantidades = self._colunas()
+        montado = CuboConsumo.de_colunas(insumos, dias, quantidades, self.TIPOS)
+        incremental = CuboConsumo(capacidade_insumos=1, capacidade_dias=1)
+        for posicao, tipo in enumerate(self.TIPOS):
+            incremental.definir_tipo(posicao, tipo)
+        for i in np.argsort(-dias, kind='stable'):  # do fim para o começo: cresce para trás
+            incremental.registrar(int(insumos[i]), int(dias[i]), int(quantidades[i]))
+        for por in ('insumo', 'tipo', 'total'):
+            a, b = montado.fatiar(por=por, periodo='semana'), incremental.fatiar(por=por, periodo='semana')
+            assert np.array_equal(a['valores'], b['valores']) and a['colunas'].tolist() == b['colunas'].tolist()
+
+    def test_fatias_e_rollups(self):
+        insumos, dias, quantidades = self._colunas()
+        cubo = CuboConsumo.de_colunas(insumos, dias, quantidades, self.TIPOS)
+        fatia = cubo.fatiar(738890, 738899, insumos=[1])
+        esperado = quantidades[(insumos == 1) & (dias >= 738890) & (dias <= 738899)].sum()
+        assert fatia['valores'].shape == (1, 10) and fatia['valores'].sum() == esperado
+
+        reagentes = cubo.fatiar(tipos=['reagente'], por='tipo', periodo='mes')
+        assert reagentes['linhas'].tolist() == ['reagente']
+        assert reagentes['colunas'].tolist() == [738886, 738917]  # 01/01 e 01/02
+        assert reagentes['valores'].sum() == quantidades[insumos != 1].sum()
+
+        semanas = cubo.fatiar(por='total', periodo='semana')
+        assert all((d - 1) % 7 == 0 for d in semanas['colunas'][1:].tolist())  # segundas-feiras
+        assert semanas['valores'].sum() == quantidades.sum()
+        with pytest.raises(ValueError):
+            cubo.fatiar(periodo='ano')
+
+    def test_troca_de_tipo(self):
+        insumos, dias, quantidades = self._colunas()
+        cubo = CuboConsumo.de_colunas(insumos, dias, quantidades, self.TIPOS)
+        cubo.definir_tipo(1, 'reagente')
+        rollup = cubo.fatiar(por='tipo', periodo='total')
+        assert dict(zip(rollup['linhas'].tolist(), rollup['valores'][:, 0].tolist())) == \
+            {'reagente': int(quantidades.sum()), 'descartavel': 0}
+        assert cubo.tipo_de(1) == 'reagente'
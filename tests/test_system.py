@@ -1,10 +1,14 @@
 import pytest
 import datetime
+import io
+import numpy as np
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from system.sistema_consumo import SistemaConsumo
+from system.dados_sinteticos import gerar_dataset, gerar_insumos
+from system.memoria import MonitorMemoria, tamanho_profundo
 from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
 
@@ -57,6 +61,35 @@ class TestSistema:
         assert sistema.fila_consumo.tamanho() == len(sistema.registros_completos)
         assert sistema.pilha_consulta.tamanho() == len(sistema.registros_completos)
     
+    def test_classificar_validades(self):
+        """Vencido / vencendo / dentro a partir dos dias ordinais"""
+        sistema = SistemaConsumo()
+        hoje = datetime.date(2024, 6, 1)
+        for i, dias in enumerate([-1, 0, 30, 31]):
+            sistema.insumos.append(Insumo(i + 1, f"Item {i}", 10, hoje + datetime.timedelta(days=dias), "reagente", 1.0))
+        assert sistema.insumos[0].validade_dia == datetime.date(2024, 5, 31).toordinal()
+        situacao = sistema.classificar_validades(hoje, dias_limite=30)
+        assert [i.nome for i in situacao['vencido']] == ["Item 0"]
+        assert [i.nome for i in situacao['vencendo']] == ["Item 1", "Item 2"]
+        assert [i.nome for i in situacao['dentro']] == ["Item 3"]
+
+    def test_catalogo_rejeita_desconhecido_e_id_repetido(self):
+        """Insumo fora do catálogo ou com id de outro não ganha linha no livro"""
+        sistema = SistemaConsumo()
+        luvas = Insumo(1, "Luvas", 10, datetime.date(2030, 1, 1), "descartavel", 1.0)
+        gaze = Insumo(2, "Gaze", 10, datetime.date(2030, 1, 1), "descartavel", 1.0)
+        assert sistema.adicionar_insumo(luvas) == 0 and sistema.adicionar_insumo(luvas) == 0
+        with pytest.raises(KeyError):
+            sistema.registrar_consumo(gaze, datetime.date(2024, 1, 1), 3)
+        assert gaze.quantidade == 10 and len(sistema.livro) == 0
+
+        impostor = Insumo(1, "Máscaras", 10, datetime.date(2030, 1, 1), "descartavel", 1.0)
+        with pytest.raises(ValueError):
+            sistema.adicionar_insumo(impostor)
+        sistema.insumos.append(impostor)  # direto na lista: detectado no próximo mapeamento
+        with pytest.raises(ValueError):
+            sistema.posicao_insumo(impostor)
+
     def test_busca_sequencial_sistema(self):
         """Testa a busca sequencial integrada no sistema"""
         sistema = SistemaConsumo()
@@ -121,4 +154,839 @@ class TestSistema:
             sistema.gerar_relatorio_completo()
             assert True  # Se chegou aqui, não houve erro
         except Exception as e:
-            pytest.fail(f"gerar_relatorio_completo() falhou com erro: {e}")
\ No newline at end of file
+            pytest.fail(f"gerar_relatorio_completo() falhou com erro: {e}")
+
+    def test_busca_do_relatorio_nao_reordena_o_livro(self):
+        """Sem índice atualizado, a busca filtra a coluna em vez de ordenar o livro"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(5)
+        posicao = next(p for p, i in enumerate(sistema.insumos) if i.nome == 'Reagente A')
+        esperado = int((sistema.livro.coluna('insumo') == posicao).sum())
+
+        saida = io.StringIO()
+        sistema.gerar_relatorio_completo(destino=saida)
+        assert sistema.livro.indice_por_insumo_atual(len(sistema.insumos)) is None
+        texto = saida.getvalue()
+        if esperado > 2:
+            assert f"... e mais {esperado - 2} registros" in texto
+
+    def test_busca_do_relatorio_com_nomes_repetidos(self):
+        """Registros de insumos diferentes com o mesmo nome aparecem todos, como na busca sequencial"""
+        sistema = SistemaConsumo()
+        for i in (1, 2):
+            sistema.adicionar_insumo(Insumo(i, "Reagente A", 100, datetime.date(2030, 1, 1), "reagente", 1.0))
+        for dia in range(1, 4):
+            for insumo in sistema.insumos:
+                sistema.registrar_consumo(insumo, datetime.date(2024, 1, dia), dia)
+        esperado = len(sistema.busca_sequencial("Reagente A"))
+        for com_indice in (False, True):
+            if com_indice:
+                sistema.livro.indice_por_insumo(len(sistema.insumos))
+            saida = io.StringIO()
+            sistema.gerar_relatorio_completo(destino=saida)
+            assert f"... e mais {esperado - 2} registros" in saida.getvalue()
+
+    def test_prever_demanda(self):
+        """Testa a previsão de demanda integrada no sistema"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(10)
+        
+        previsao = sistema.prever_demanda()
+        assert set(previsao) == {insumo.nome for insumo in sistema.insumos}
+        for indicadores in previsao.values():
+            assert indicadores['exponencial'] >= 0
+            assert indicadores['ponto_reposicao'] >= 0
+        
+        # Novos registros são incorporados sem recriar a previsão
+        objeto_previsao = sistema.previsao
+        sistema.simular_consumo_diario(1)
+        sistema.prever_demanda()
+        assert sistema.previsao is objeto_previsao
+
+        # Parâmetros diferentes refazem a previsão a partir do livro
+        sistema.prever_demanda(janela=3)
+        assert sistema.previsao is not objeto_previsao and sistema.previsao.janela == 3
+        objeto_previsao = sistema.previsao
+        sistema.prever_demanda()  # sem parâmetros: mantém os atuais
+        assert sistema.previsao is objeto_previsao
+    
+    def test_otimizar_compras(self):
+        """Testa o otimizador de compras integrado ao sistema"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(10)
+        
+        resultado = sistema.otimizar_compras(orcamento=500, horizonte=15)
+        assert resultado['custo_total'] <= 500
+        assert set(resultado['quantidades']) == {insumo.nome for insumo in sistema.insumos}
+
+
+class TestRedeHospitalar:
+    """Testes para a rede de unidades (sistema particionado)"""
+
+    def _rede(self, max_processos, compartilhar_livros=True):
+        from system.rede_hospitalar import RedeHospitalar
+        rede = RedeHospitalar(max_processos=max_processos, compartilhar_livros=compartilhar_livros)
+        hoje = datetime.date.today()
+        for unidade, consumo_luvas in (("Centro", 5), ("Norte", 7)):
+            sistema = rede.adicionar_unidade(unidade)
+            luvas = Insumo(1, "Luvas", 100, hoje + datetime.timedelta(days=10), "descartavel", 2.00)
+            reagente = Insumo(2, "Reagente A", 50, hoje + datetime.timedelta(days=200), "reagente", 10.00)
+            sistema.insumos.extend([luvas, reagente])
+            rede.registrar_consumo(unidade, luvas, hoje, consumo_luvas)
+            rede.registrar_consumo(unidade, reagente, hoje, 1)
+        return rede
+
+    def test_roteia_escritas(self):
+        """Cada registro vai só para a partição da sua unidade"""
+        rede = self._rede(max_processos=1)
+        assert len(rede.unidade("Centro").registros_completos) == 2
+        assert rede.unidade("Norte").insumos[0].quantidade == 93
+        with pytest.raises(KeyError):
+            rede.unidade("Sul")
+
+    def test_agregados_da_rede(self):
+        """Totais e top insumos somam todas as unidades"""
+        rede = self._rede(max_processos=1)
+        totais = rede.totais()
+        assert totais['registros'] == 4
+        assert totais['consumo_total'] == 14
+        assert totais['custo_total'] == pytest.approx(44.0)
+        assert rede.top_insumos(1) == [("Luvas", 12)]
+
+    def test_pool_de_processos(self):
+        """O resultado em paralelo é igual ao sequencial (livros serializados para os trabalhadores)"""
+        with self._rede(max_processos=2, compartilhar_livros=False) as rede:
+            vencendo = rede.insumos_vencendo(dias_limite=30)
+            assert [(u, n) for u, n, _, _ in vencendo] == [("Centro", "Luvas"), ("Norte", "Luvas")]
+            assert rede.totais()['consumo_total'] == 14
+
+    def test_livros_em_memoria_compartilhada(self):
+        """Os trabalhadores leem o livro da memória compartilhada e veem consumos novos"""
+        with self._rede(max_processos=2) as rede:
+            assert rede.totais()['consumo_total'] == 14
+            centro = rede.unidade("Centro")
+            assert centro.livro_compartilhado is not None
+            rede.registrar_consumo("Centro", centro.insumos[0], datetime.date.today(), 6)
+            assert centro.livro_compartilhado.linhas == 3
+            assert rede.top_insumos(1) == [("Luvas", 18)]
+        assert centro.livro_compartilhado is None
+
+
+class TestEventosSistema:
+    """Testes para os eventos publicados pelo SistemaConsumo"""
+
+    def test_consumo_estoque_e_insumo(self):
+        sistema = SistemaConsumo()
+        assinatura = sistema.eventos.assinar()
+        sistema.carregar_insumos_exemplo()
+        assert [e['acao'] for e in assinatura.receber()] == ['adicionado'] * 8
+
+        insumo = sistema.insumos[0]
+        estoque = insumo.quantidade
+        sistema.registrar_consumo(insumo, datetime.date(2024, 1, 1), 3)
+        consumo, mudanca = assinatura.receber()
+        assert consumo['tipo'] == 'consumo' and consumo['quantidade'] == 3
+        assert consumo['data'] == datetime.date(2024, 1, 1)
+        assert mudanca == {'sequencia': consumo['sequencia'] + 1, 'tipo': 'estoque', 'insumo': insumo.id,
+                           'quantidade': estoque - 3, 'variacao': -3}
+
+        sistema.atualizar_insumo(insumo.nome, custo_unitario=9.99)
+        sistema.repor_estoque(insumo.nome, datetime.date(2024, 1, 2), 500)
+        alterado, estoque_novo = assinatura.receber()
+        assert alterado['campos'] == {'custo_unitario': 9.99}
+        assert estoque_novo['variacao'] == 500 and estoque_novo['quantidade'] == estoque - 3 + 500
+        assert insumo.custo_centavos == 999
+        with pytest.raises(ValueError):
+            sistema.atualizar_insumo(insumo.nome, id=99)
+        with pytest.raises(ValueError):
+            sistema.atualizar_insumo(insumo.nome, quantidade=500)
+
+    def test_sequencia_continua_depois_do_snapshot(self, tmp_path):
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(3)
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+        assert carregado.eventos.proxima_sequencia == sistema.eventos.proxima_sequencia
+
+    def test_anomalia_publicada(self):
+        sistema = SistemaConsumo()
+        luvas = Insumo(1, "Luvas", 10_000, datetime.date(2025, 1, 1), "descartavel", 0.35)
+        sistema.adicionar_insumo(luvas)
+        inicio = datetime.date(2024, 1, 1)
+        for dia in range(30):
+            sistema.registrar_consumo(luvas, inicio + datetime.timedelta(days=dia), 10 + dia % 3)
+        assert sistema.anomalias_recentes() == []
+        assinatura = sistema.eventos.assinar(tipos=['anomalia'])
+        sistema.registrar_consumo(luvas, datetime.date(2024, 1, 31), 200)
+        alertas = assinatura.receber()
+        assert [a['escopo'] for a in alertas] == ['evento', 'dia']
+        assert alertas[0]['nome'] == "Luvas" and alertas[0]['data'] == datetime.date(2024, 1, 31)
+        assert [a['escopo'] for a in sistema.anomalias_recentes(1)] == ['dia']
+
+
+class TestCuboConsumoSistema:
+    """Testes para o cubo de consumo do SistemaConsumo"""
+
+    def test_fatias_por_nome_e_tipo(self):
+        sistema = SistemaConsumo(dias_detalhe=5)
+        luvas = Insumo(1, "Luvas", 10_000, datetime.date(2025, 1, 1), "descartavel", 0.35)
+        reagente = Insumo(2, "Reagente A", 10_000, datetime.date(2025, 1, 1), "reagente", 15.50)
+        sistema.adicionar_insumo(luvas)
+        sistema.adicionar_insumo(reagente)
+        inicio = datetime.date(2024, 1, 1)  # segunda-feira
+        for dia in range(14):
+            sistema.registrar_consumo(luvas, inicio + datetime.timedelta(days=dia), 2)
+        cubo = sistema.cubo_consumo
+        for dia in range(14, 28):  # depois de montado: atualizado a cada registro
+            sistema.registrar_consumo(reagente, inicio + datetime.timedelta(days=dia), 3)
+
+        semanas = sistema.fatiar_consumo(por='tipo', periodo='semana')
+        assert semanas['linhas'] == ['descartavel', 'reagente']
+        assert semanas['colunas'][1] == datetime.date(2024, 1, 8)
+        assert semanas['valores'].tolist() == [[14, 14, 0, 0], [0, 0, 21, 21]]
+        fatia = sistema.fatiar_consumo(datetime.date(2024, 1, 10), datetime.date(2024, 1, 20), insumos=["luvas"])
+        assert fatia['linhas'] == ["Luvas"] and fatia['valores'].sum() == 10
+        # A retenção compactou o livro, mas o cubo montado do zero dá o mesmo resultado
+        sistema._cubo_consumo = None
+        assert sistema.fatiar_consumo(por='tipo', periodo='semana')['valores'].tolist() == semanas['valores'].tolist()
+        assert sistema.cubo_consumo is not cubo
+
+
+class TestCenarios:
+    """Testes para os cenários "e se?" (system/cenarios.py)"""
+
+    def _sistema(self):
+        sistema = SistemaConsumo()
+        luvas = Insumo(1, "Luvas", 100, datetime.date(2025, 6, 1), "descartavel", 0.50)
+        reagente = Insumo(2, "Reagente A", 100, datetime.date(2025, 6, 1), "reagente", 10.00)
+        sistema.adicionar_insumo(luvas)
+        sistema.adicionar_insumo(reagente)
+        inicio = datetime.date(2024, 1, 1)
+        for dia in range(20):
+            sistema.registrar_consumo(luvas, inicio + datetime.timedelta(days=dia), 2 + dia % 3)
+            if dia % 2:
+                sistema.registrar_consumo(reagente, inicio + datetime.timedelta(days=dia), 1)
+        return sistema, datetime.date(2024, 1, 20)
+
+    def test_sem_alteracoes_igual_ao_sistema(self):
+        sistema, referencia = self._sistema()
+        cenario = sistema.criar_cenario("base")
+        assert cenario.prever_demanda(referencia) == sistema.prever_demanda(referencia)
+        assert cenario.otimizar_compras(100, data_referencia=referencia) == \
+            sistema.otimizar_compras(100, data_referencia=referencia)
+        # Nada copiado: colunas do livro são visões do sistema, base única para todos os cenários
+        assert np.shares_memory(cenario.base.colunas['dia'], sistema.livro.coluna('dia'))
+        assert sistema.criar_cenario("outro").base is cenario.base
+
+    def test_alteracoes_ficam_no_cenario(self):
+        sistema, referencia = self._sistema()
+        estoques, linhas = [i.quantidade for i in sistema.insumos], len(sistema.livro)
+        cenario = sistema.criar_cenario("luvas em dobro").multiplicar_consumo("luvas", 2)
+        previsao, original = cenario.prever_demanda(referencia), sistema.prever_demanda(referencia)
+        assert previsao["Luvas"]['exponencial'] == pytest.approx(2 * original["Luvas"]['exponencial'])
+        assert previsao["Reagente A"] == original["Reagente A"]
+        assert cenario.otimizar_compras(100, data_referencia=referencia)['quantidades']["Luvas"] > \
+            sistema.otimizar_compras(100, data_referencia=referencia)['quantidades']["Luvas"]
+
+        consumido = cenario.simular_consumo_diario(10, inicio=datetime.date(2024, 1, 21), semente=1)
+        assert sum(consumido.values()) == sum(estoques) - int(cenario.estoque_atual().sum())
+        assert cenario.deltas['consumos'] == len(cenario.livro) > 0
+        assert [i.quantidade for i in sistema.insumos] == estoques and len(sistema.livro) == linhas
+
+    def test_cenario_filho(self):
+        sistema, referencia = self._sistema()
+        pai = sistema.criar_cenario("pai").definir_custo("Reagente A", 12.00)
+        pai.registrar_consumo("Reagente A", datetime.date(2024, 1, 20), 5)
+        filho = pai.criar_cenario("filho")
+        filho.definir_estoque("Luvas", 0)
+        pai.registrar_consumo("Reagente A", datetime.date(2024, 1, 20), 5)  # não chega ao filho
+
+        assert filho.estoque("Reagente A") == pai.estoque("Reagente A") + 5
+        assert filho.custo_centavos("Reagente A") == 1200 and pai.estoque("Luvas") == sistema.insumos[0].quantidade
+        assert filho.deltas == {'estoques': 2, 'custos': 1, 'fatores': 0, 'consumos': 1}
+        assert filho.prever_demanda(referencia)["Reagente A"]['exponencial'] < \
+            pai.prever_demanda(referencia)["Reagente A"]['exponencial']
+
+    def test_base_refeita_quando_sistema_muda(self):
+        sistema, referencia = self._sistema()
+        antes = sistema.criar_cenario()
+        sistema.registrar_consumo(sistema.insumos[0], referencia, 50)
+        depois = sistema.criar_cenario()
+        assert depois.base is not antes.base
+        assert antes.estoque("Luvas") == depois.estoque("Luvas") + 50
+        assert depois.prever_demanda(referencia) == sistema.prever_demanda(referencia)
+
+    def test_copiar_e_serializar_depois_de_cenario(self):
+        """deepcopy e pickle do sistema (e do cenário) continuam funcionando depois de usar cenários"""
+        import copy
+        import pickle
+        sistema, referencia = self._sistema()
+        cenario = sistema.criar_cenario().multiplicar_consumo("Luvas", 2)
+        previsao = cenario.prever_demanda(referencia)
+
+        copia = copy.deepcopy(sistema)
+        restaurado = pickle.loads(pickle.dumps(sistema))
+        for outro in (copia, restaurado):
+            assert outro._base_cenarios is None
+            assert outro.prever_demanda(referencia) == sistema.prever_demanda(referencia)
+            assert outro.criar_cenario().multiplicar_consumo("Luvas", 2).prever_demanda(referencia) == previsao
+        assert copy.deepcopy(cenario).prever_demanda(referencia) == previsao
+
+
+class TestRetencao:
+    """Testes para a retenção em camadas (detalhe recente + agregado diário)"""
+
+    def _gemeos(self, dias_detalhe):
+        """Dois sistemas com os mesmos consumos: um guarda tudo, o outro compacta"""
+        completo, compacto = SistemaConsumo(), SistemaConsumo(dias_detalhe=dias_detalhe)
+        inicio = datetime.date(2024, 1, 1)
+        for sistema in (completo, compacto):
+            for i, nome in enumerate(["Luvas", "Gaze", "Tubos"]):
+                sistema.adicionar_insumo(Insumo(i + 1, nome, 10_000, datetime.date(2025, 1, 1), "descartavel", 0.35))
+            for dia in range(30):
+                for k in range(4):
+                    sistema.registrar_consumo(sistema.insumos[(dia + k) % 3], inicio + datetime.timedelta(days=dia), k + 1)
+        return completo, compacto
+
+    def test_camadas_somam_como_o_detalhe(self):
+        completo, compacto = self._gemeos(dias_detalhe=7)
+        assert len(completo.livro) == 120
+        # 23 dias frios × até 3 insumos + 7 dias × 4 registros
+        assert len(compacto.livro) <= 23 * 3 + 28
+        assert compacto.linhas_compactadas == len(compacto.livro) - 28
+        consulta = lambda s: s.consulta().agrupar_por('dia', 'insumo').agregar(
+            total=('quantidade', 'soma'), n=('quantidade', 'contagem'), custo=('custo', 'soma')).executar()
+        assert consulta(compacto) == consulta(completo)
+        assert compacto.consumo_no_periodo("Luvas", datetime.date(2024, 1, 1), datetime.date(2024, 1, 20)) == \
+            completo.consumo_no_periodo("Luvas", datetime.date(2024, 1, 1), datetime.date(2024, 1, 20))
+        assert len(compacto.registros_completos) == len(compacto.livro)
+        assert sum(r.quantidade_consumida for r in compacto.registros_completos) == \
+            sum(r.quantidade_consumida for r in completo.registros_completos)
+        # Fila e pilha só com a camada quente
+        assert compacto.fila_consumo.tamanho() == 28
+        assert all(r.data >= datetime.date(2024, 1, 24) for r in compacto.pilha_consulta.registros)
+
+    def test_retroativo_e_snapshot(self, tmp_path):
+        completo, compacto = self._gemeos(dias_detalhe=7)
+        fim = datetime.date(2024, 1, 30)
+        compacto.prever_demanda(fim)  # previsão já montada antes das próximas compactações
+        for sistema in (completo, compacto):
+            sistema.registrar_consumo(sistema.insumos[0], datetime.date(2024, 1, 2), 50)
+        compacto.compactar(hoje=fim)
+        total = lambda s: s.consulta().agrupar_por('insumo').agregar(total=('quantidade', 'soma')).executar()
+        assert total(compacto) == total(completo)
+        previsao = completo.prever_demanda(fim)
+        for nome, indicadores in compacto.prever_demanda(fim).items():
+            assert indicadores == pytest.approx(previsao[nome])
+
+        caminho = str(tmp_path / "compacto.snap")
+        compacto.salvar_snapshot(caminho)
+        carregado = SistemaConsumo.carregar_snapshot(caminho, dias_detalhe=7)
+        assert carregado.linhas_compactadas == compacto.linhas_compactadas
+        assert total(carregado) == total(completo)
+        # Compactar ainda sem materializar: só as linhas da fila/pilha são renumeradas
+        carregado.compactar(dias_detalhe=3, hoje=datetime.date(2024, 1, 30))
+        assert carregado._restauracao is not None
+        assert carregado.fila_consumo.tamanho() == 12
+        assert total(carregado) == total(completo)
+
+
+class TestSnapshot:
+    """Testes para salvar e carregar o estado completo do sistema"""
+
+    def test_salvar_e_carregar(self, tmp_path):
+        """O sistema carregado tem os mesmos insumos, registros e estruturas"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(10)
+        sistema.fila_consumo.desenfileirar()  # fila diferente da lista completa
+
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+
+        assert [str(i) for i in carregado.insumos] == [str(i) for i in sistema.insumos]
+        assert [str(r) for r in carregado.registros_completos] == [str(r) for r in sistema.registros_completos]
+        assert [str(r) for r in carregado.fila_consumo.registros] == [str(r) for r in sistema.fila_consumo.registros]
+        assert carregado.pilha_consulta.tamanho() == sistema.pilha_consulta.tamanho()
+
+    def test_carga_preguicosa(self, tmp_path):
+        """Os objetos de registro só são criados no primeiro acesso"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(5)
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+        assert carregado._restauracao is not None
+        assert len(carregado.livro) == len(sistema.registros_completos)
+
+        # Salvar de novo sem materializar também funciona
+        carregado.salvar_snapshot(str(tmp_path / "copia.snap"))
+        assert carregado._restauracao is not None
+        # A previsão lê as colunas do livro, sem criar os registros
+        hoje = datetime.date.today()
+        assert carregado.prever_demanda(hoje) == sistema.prever_demanda(hoje)
+        assert carregado._restauracao is not None
+
+        # Estoque não é decrementado de novo ao materializar
+        estoques = [i.quantidade for i in carregado.insumos]
+        assert len(carregado.registros_completos) == len(sistema.registros_completos)
+        assert [i.quantidade for i in carregado.insumos] == estoques
+
+    def test_continua_registrando(self, tmp_path):
+        """Depois de carregar, novos consumos entram no livro normalmente"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(3)
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+        insumo = carregado.insumos[0]
+        insumo.quantidade += 10
+        carregado.registrar_consumo(insumo, datetime.date.today(), 1)
+        assert len(carregado.livro) == len(sistema.registros_completos) + 1
+        assert len(carregado.registros_completos) == len(carregado.livro)
+
+    def test_arquivo_invalido(self, tmp_path):
+        """Arquivos que não são snapshots são rejeitados"""
+        caminho = tmp_path / "outro.bin"
+        caminho.write_bytes(b"nada a ver")
+        with pytest.raises(ValueError):
+            SistemaConsumo.carregar_snapshot(str(caminho))
+
+
+class TestEstoqueHistorico:
+    """Testes para consultas de estoque em uma data passada"""
+
+    def test_estoque_em_data(self):
+        """O estoque no fim de cada dia desconta só o que foi consumido até ele"""
+        sistema = SistemaConsumo()
+        insumo = Insumo(1, "Reagente A", 100, datetime.date(2025, 12, 31), "reagente", 15.50)
+        sistema.insumos.append(insumo)
+        dia1, dia2, dia3 = (datetime.date(2024, 1, d) for d in (1, 2, 3))
+        sistema.registrar_consumo(insumo, dia1, 10)
+        sistema.registrar_consumo(insumo, dia3, 5)
+
+        assert sistema.estoque_em("Reagente A", dia1) == 90
+        assert sistema.estoque_em("reagente a", dia3) == 85
+        assert sistema.consumo_no_periodo(insumo, dia1, dia3) == 15
+
+        # Registro retroativo depois que o histórico já existe
+        sistema.registrar_consumo(insumo, dia2, 4)
+        assert sistema.estoque_em(insumo, dia1) == 90
+        assert sistema.estoque_em(insumo, dia2) == 86
+        assert insumo.quantidade == 81
+
+        with pytest.raises(KeyError):
+            sistema.estoque_em("Inexistente", dia1)
+
+    def test_reposicao_nao_reescreve_o_passado(self, tmp_path):
+        """Uma reposição datada não muda o estoque dos dias anteriores a ela (nem depois do snapshot)"""
+        sistema = SistemaConsumo()
+        insumo = Insumo(1, "Reagente A", 100, datetime.date(2025, 12, 31), "reagente", 15.50)
+        sistema.adicionar_insumo(insumo)
+        sistema.registrar_consumo(insumo, datetime.date(2024, 1, 10), 30)
+        assert sistema.estoque_em(insumo, datetime.date(2024, 1, 10)) == 70
+
+        sistema.repor_estoque(insumo, datetime.date(2024, 1, 15), 200)
+        assert insumo.quantidade == 270
+        assert sistema.estoque_em(insumo, datetime.date(2024, 1, 10)) == 70
+        assert sistema.estoque_em(insumo, datetime.date(2024, 1, 15)) == 270
+        with pytest.raises(ValueError):
+            sistema.repor_estoque(insumo, datetime.date(2024, 1, 15), 0)
+
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+        assert carregado.estoque_em("Reagente A", datetime.date(2024, 1, 10)) == 70
+        assert carregado.estoque_em("Reagente A", datetime.date(2024, 1, 20)) == 270
+
+    def test_previsao_depois_de_reposicao(self):
+        """Dias de cobertura e `repor` acompanham o estoque mesmo sem consumo novo"""
+        sistema = SistemaConsumo()
+        insumo = Insumo(1, "A", 30, datetime.date(2025, 12, 31), "reagente", 1.00)
+        sistema.adicionar_insumo(insumo)
+        for dia in range(1, 11):
+            sistema.registrar_consumo(insumo, datetime.date(2024, 1, dia), 3)
+        referencia = datetime.date(2024, 1, 10)
+        antes = sistema.prever_demanda(referencia)["A"]
+        assert insumo.quantidade == 0 and antes['dias_cobertura'] == 0.0 and antes['repor']
+
+        sistema.repor_estoque(insumo, referencia, 500)
+        depois = sistema.prever_demanda(referencia)["A"]
+        assert depois['exponencial'] == antes['exponencial']
+        assert depois['dias_cobertura'] == pytest.approx(500 / depois['exponencial'])
+        assert not depois['repor']
+
+    def test_estatisticas_consumo(self):
+        """Estatísticas de janela acompanham os registros do sistema"""
+        sistema = SistemaConsumo(janelas_estatisticas=(2, 7))
+        insumo = Insumo(1, "Luvas", 100, datetime.date(2025, 12, 31), "descartavel", 2.10)
+        sistema.insumos.append(insumo)
+        sistema.registrar_consumo(insumo, datetime.date(2024, 1, 1), 3)
+
+        assert sistema.estatisticas_consumo("Luvas", 7)['soma'] == 3
+        sistema.registrar_consumo(insumo, datetime.date(2024, 1, 5), 4)
+        assert sistema.estatisticas_consumo("Luvas", 2) == {'soma': 4, 'media': 2.0, 'maximo': 4, 'minimo': 0}
+        assert sistema.estatisticas_consumo("Luvas", 7)['maximo'] == 4
+
+
+class TestPilhaLimitadaSistema:
+    """Testes da pilha limitada dentro do sistema"""
+
+    def test_profundidade_pilha(self, tmp_path):
+        """A pilha do sistema guarda só os últimos registros, inclusive após snapshot"""
+        sistema = SistemaConsumo(profundidade_pilha=5)
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(10)
+        assert sistema.pilha_consulta.tamanho() == min(5, len(sistema.registros_completos))
+        assert sistema.pilha_consulta.topo() is sistema.registros_completos[-1]
+
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+        carregado = SistemaConsumo.carregar_snapshot(caminho, profundidade_pilha=5)
+        assert [str(r) for r in carregado.pilha_consulta.registros] == \
+            [str(r) for r in sistema.pilha_consulta.registros]
+
+
+class TestRelatorio:
+    """Testes para o relatório completo em vários formatos"""
+
+    @pytest.fixture
+    def sistema(self):
+        sistema = SistemaConsumo()
+        insumo = Insumo(1, "Reagente A", 100, datetime.date(2024, 12, 31), "reagente", 15.50)
+        luvas = Insumo(2, "Luvas <P>", 100, datetime.date(2025, 6, 30), "descartavel", 2.10)
+        sistema.insumos.extend([insumo, luvas])
+        for dia, qtd in ((1, 5), (2, 3), (3, 2)):
+            sistema.registrar_consumo(insumo, datetime.date(2024, 1, dia), qtd)
+        sistema.registrar_consumo(luvas, datetime.date(2024, 1, 4), 10)
+        return sistema
+
+    def test_texto_igual_ao_formato_original(self, sistema, capsys):
+        """Sem argumentos, o relatório continua saindo na tela no formato de texto"""
+        sistema.gerar_relatorio_completo()
+        saida = capsys.readouterr().out
+        assert "📋 RELATÓRIO COMPLETO DO SISTEMA" in saida
+        assert "• Custo total: R$ 176.00" in saida
+        assert "1. 2024-01-04: Luvas <P> - 10 unidades - R$ 21.00" in saida
+        assert "... e mais 1 registros" in saida
+
+    def test_formatos_em_arquivo(self, sistema, tmp_path):
+        """Markdown, HTML e CSV são gravados no arquivo de destino"""
+        import csv
+        caminho = tmp_path / "relatorio"
+        sistema.gerar_relatorio_completo(str(caminho) + ".md", formato='markdown')
+        sistema.gerar_relatorio_completo(str(caminho) + ".html", formato='html')
+        sistema.gerar_relatorio_completo(str(caminho) + ".csv", formato='csv')
+
+        assert "| Reagente A |" in (tmp_path / "relatorio.md").read_text(encoding='utf-8')
+        assert "Luvas &lt;P&gt;" in (tmp_path / "relatorio.html").read_text(encoding='utf-8')
+        with open(tmp_path / "relatorio.csv", encoding='utf-8') as arquivo:
+            linhas = list(csv.reader(arquivo))
+        assert ['📊 ESTATÍSTICAS:', 'Total de registros', '4'] in linhas
+
+    def test_formato_invalido(self, sistema):
+        """Formatos desconhecidos são rejeitados"""
+        with pytest.raises(ValueError):
+            sistema.gerar_relatorio_completo(formato='pdf')
+
+    def test_relatorio_de_snapshot_nao_materializa(self, sistema, tmp_path):
+        """O relatório de um snapshot recém-carregado lê só as colunas do livro"""
+        import io
+        caminho = str(tmp_path / "estado.snap")
+        sistema.salvar_snapshot(caminho)
+        carregado = SistemaConsumo.carregar_snapshot(caminho)
+
+        original, restaurado = io.StringIO(), io.StringIO()
+        sistema.gerar_relatorio_completo(original)
+        carregado.gerar_relatorio_completo(restaurado)
+        assert restaurado.getvalue() == original.getvalue()
+        assert carregado._restauracao is not None
+
+
+class TestBuscaInsumos:
+    """Testes para a busca aproximada de insumos no sistema"""
+
+    def test_busca_e_autocompletar(self):
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        insumo, similaridade = sistema.buscar_insumos("mascaras", limite=1)[0]
+        assert insumo.nome == "Máscaras"
+        assert similaridade == 1.0
+        assert [i.nome for i in sistema.autocompletar_insumo("Reag")] == \
+            ["Reagente A", "Reagente B", "Reagente C", "Reagente D"]
+
+    def test_insumo_novo_entra_no_indice(self):
+        """Insumos adicionados depois do primeiro uso também são encontrados (sem acento)"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.buscar_insumos("luvas")
+        sistema.insumos.append(Insumo(99, "Álcool 70%", 10, datetime.date(2030, 1, 1), "descartavel", 8.0))
+        assert sistema.buscar_insumos("alcool")[0][0].id == 99
+        assert sistema._buscar_insumo("ALCOOL 70").id == 99
+        with pytest.raises(KeyError):
+            sistema._buscar_insumo("Inexistente")
+
+    def test_renomeado_ou_lista_trocada(self):
+        """Nome alterado direto no objeto ou lista trocada por outra do mesmo tamanho não dão o insumo errado"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        luvas = sistema._buscar_insumo("Luvas")
+        luvas.nome = "Luvas de Nitrilo"  # fora de atualizar_insumo
+        with pytest.raises(KeyError):
+            sistema._buscar_insumo("Luvas")  # o acerto no nome antigo não vale: índice refeito
+        assert sistema._buscar_insumo("luvas de nitrilo") is luvas
+
+        # Nome que não existe: KeyError sem refazer o índice
+        indice = sistema.indice_nomes
+        with pytest.raises(KeyError):
+            sistema._buscar_insumo("Inexistente")
+        assert sistema.indice_nomes is indice
+
+        sistema.insumos = [Insumo(100 + p, f"Item {p}", 10, datetime.date(2030, 1, 1), "descartavel", 1.0)
+                           for p in range(len(sistema.insumos))]
+        assert sistema._buscar_insumo("Item 0").id == 100
+        assert sistema.buscar_insumos("item 1", limite=1)[0][0].id == 101
+
+
+class TestConsulta:
+    """Testes para a consulta declarativa sobre o livro-razão"""
+
+    @pytest.fixture
+    def sistema(self):
+        sistema = SistemaConsumo()
+        reagente = Insumo(1, "Reagente A", 1000, datetime.date(2024, 3, 1), "reagente", 10.00)
+        reagente_b = Insumo(2, "Reagente B", 1000, datetime.date(2025, 3, 1), "reagente", 5.00)
+        luvas = Insumo(3, "Luvas", 1000, datetime.date(2024, 6, 1), "descartavel", 1.00)
+        sistema.insumos.extend([reagente, reagente_b, luvas])
+        for dia in range(1, 15):  # 01/01/2024 é segunda-feira
+            data = datetime.date(2024, 1, dia)
+            sistema.registrar_consumo(reagente, data, dia % 3 + 1)
+            sistema.registrar_consumo(luvas, data, 10)
+            if dia % 2 == 0:
+                sistema.registrar_consumo(reagente_b, data, 2)
+        return sistema
+
+    def _forca_bruta(self, sistema, filtro):
+        return [r for r in sistema.registros_completos if filtro(r)]
+
+    def test_filtros_combinados(self, sistema):
+        """Tipo + período + quantidade dão o mesmo que filtrar os objetos"""
+        inicio, fim = datetime.date(2024, 1, 3), datetime.date(2024, 1, 9)
+        resultado = sistema.consulta().tipo('reagente').periodo(inicio, fim).quantidade(minimo=2) \
+            .agregar(total=('quantidade', 'soma'), n=('quantidade', 'contagem')).executar()
+
+        esperados = self._forca_bruta(sistema, lambda r: r.insumo.tipo == 'reagente'
+                                    and inicio <= r.data <= fim and r.quantidade_consumida >= 2)
+        assert resultado == [{'total': sum(r.quantidade_consumida for r in esperados), 'n': len(esperados)}]
+
+    def test_agrupar_por_semana_e_insumo(self, sistema):
+        """Agrupamento por semana (segunda-feira) e insumo"""
+        resultado = sistema.consulta().insumo('luvas').agrupar_por('semana', 'insumo') \
+            .agregar(total=('quantidade', 'soma'), pico=('quantidade', 'maximo')).executar()
+        assert resultado == [
+            {'semana': datetime.date(2024, 1, 1), 'insumo': 'Luvas', 'total': 70, 'pico': 10},
+            {'semana': datetime.date(2024, 1, 8), 'insumo': 'Luvas', 'total': 70, 'pico': 10},
+        ]
+
+    def test_agrupar_por_tipo_com_media_de_custo(self, sistema):
+        """Média de custo por tipo"""
+        resultado = {l['tipo']: l for l in sistema.consulta().agrupar_por('tipo')
+                    .agregar(media=('custo', 'media')).executar()}
+        assert resultado['descartavel']['media'] == pytest.approx(10.0)
+
+    def test_soma_de_custo_exata(self):
+        """Custos em centavos inteiros: a soma de muitos R$ 0.10 não acumula erro"""
+        sistema = SistemaConsumo()
+        gaze = Insumo(1, "Gaze", 10_000, datetime.date(2025, 1, 1), "descartavel", 0.10)
+        sistema.insumos.append(gaze)
+        for _ in range(1000):
+            sistema.registrar_consumo(gaze, datetime.date(2024, 1, 1), 1)
+        assert sistema.livro.coluna('custo').dtype == np.int64
+        assert int(sistema.livro.coluna('custo').sum()) == 10_000
+        assert sistema.consulta().agregar(total=('custo', 'soma')).executar() == [{'total': 100.0}]
+
+    def test_planejador_escolhe_indice(self, sistema):
+        """O plano usa o índice mais seletivo disponível"""
+        plano_insumo = sistema.consulta().insumo('Reagente B').explicar()
+        assert any('índice de nomes' in passo for passo in plano_insumo)
+        assert any('acesso: índice por insumo' in passo for passo in plano_insumo)
+
+        um_dia = datetime.date(2024, 1, 5)
+        plano_data = sistema.consulta().periodo(um_dia, um_dia).explicar()
+        assert any('acesso: índice por data' in passo for passo in plano_data)
+
+        plano_validade = sistema.consulta().validade(fim=datetime.date(2024, 12, 31)).explicar()
+        assert any('índice de validades: 2' in passo for passo in plano_validade)
+
+    def test_nomes_repetidos_e_acentos(self, sistema):
+        """Todos os insumos com o mesmo nome entram no filtro, ignorando acentos"""
+        outras = Insumo(4, "Luvas", 1000, datetime.date(2024, 6, 1), "descartavel", 1.00)
+        sistema.adicionar_insumo(outras)
+        antes = sistema.consulta().insumo('luvas').agregar(total=('quantidade', 'soma')).executar()[0]['total']
+        sistema.registrar_consumo(outras, datetime.date(2024, 1, 3), 7)
+        sistema.atualizar_insumo(sistema.insumos[0], nome="Reagente Ácido")
+        assert sistema.consulta().insumo('LUVAS').agregar(total=('quantidade', 'soma')).executar() == \
+            [{'total': antes + 7}]
+        assert sistema.consulta().insumo('reagente acido').agregar(n=('quantidade', 'contagem')).executar() == \
+            [{'n': 14}]
+
+    def test_indice_de_validades_em_cache(self, sistema):
+        """O catálogo ordenado por validade só é refeito quando o catálogo muda"""
+        consulta = lambda: sistema.consulta().validade(fim=datetime.date(2024, 12, 31)).agrupar_por('insumo') \
+            .agregar(n=('quantidade', 'contagem')).executar()
+        consulta()
+        ordem, _ = sistema.indice_validades
+        consulta()
+        assert sistema.indice_validades[0] is ordem
+        sistema.atualizar_insumo("Reagente B", validade=datetime.date(2024, 2, 1))
+        assert sistema.indice_validades[0] is not ordem
+        assert {l['insumo'] for l in consulta()} == {"Reagente A", "Reagente B", "Luvas"}
+
+    def test_planejar_nao_reordena_o_livro(self, sistema):
+        """Depois de um append o índice por insumo fica velho: o plano usa a contagem e não reordena"""
+        consulta = lambda: sistema.consulta().insumo('Luvas').agregar(total=('quantidade', 'soma')).executar()
+        antes = consulta()
+        sistema.livro.indice_por_insumo(len(sistema.insumos))
+        sistema.registrar_consumo(sistema.insumos[2], datetime.date(2024, 1, 20), 7)
+        assert sistema.livro.indice_por_insumo_atual(len(sistema.insumos)) is None
+        assert consulta() == [{'total': antes[0]['total'] + 7}]
+        assert sistema.livro.indice_por_insumo_atual(len(sistema.insumos)) is None  # continua sem ordenar
+        assert sistema.livro.contagem_por_insumo(3).tolist() == \
+            np.bincount(sistema.livro.coluna('insumo'), minlength=3).tolist()
+
+    def test_indice_por_data_fora_de_ordem(self, sistema):
+        """Registros retroativos continuam sendo encontrados pelo índice por data"""
+        sistema.registrar_consumo(sistema.insumos[0], datetime.date(2024, 1, 2), 100)
+        dia = datetime.date(2024, 1, 2)
+        resultado = sistema.consulta().periodo(dia, dia).insumo('Reagente A').executar()
+        assert resultado[0]['quantidade'] == 103
+
+
+class TestCalculoConsumoOtimo:
+    """Testes para o cálculo de consumo ótimo com cache"""
+
+    def test_segunda_chamada_usa_cache(self):
+        """Chamadas repetidas com o mesmo estoque não recalculam a PD"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        primeira = sistema.calcular_consumo_otimo(bloco=50, esperar_todos=True)
+        falhas = sistema.cache_pd.estatisticas()['falhas']
+
+        segunda = sistema.calcular_consumo_otimo(bloco=50, esperar_todos=True)
+        assert segunda == primeira
+        assert sistema.cache_pd.estatisticas()['falhas'] == falhas
+        assert sistema.cache_pd.estatisticas()['acertos'] >= 2
+
+    def test_corrida_registrada(self):
+        """A última corrida guarda vencedor, tempos e situação de cada versão"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        _, memo, iterativo = sistema.calcular_consumo_otimo(bloco=50, usar_cache=False)
+
+        corrida = sistema.ultima_corrida_pd
+        assert corrida['vencedor'] is not None
+        assert corrida['resultado'] in (memo, iterativo) or corrida['vencedor'] == 'recursiva'
+        assert set(corrida['tempos']) == {'recursiva', 'memorizacao', 'iterativa'}
+
+
+class TestDadosSinteticos:
+    """Testes para o gerador de dados sintéticos"""
+
+    HOJE = datetime.date(2024, 6, 30)
+
+    def test_insumos_deterministicos(self):
+        a = gerar_insumos(200, semente=7, hoje=self.HOJE)
+        b = gerar_insumos(200, semente=7, hoje=self.HOJE)
+        c = gerar_insumos(200, semente=8, hoje=self.HOJE)
+        assert [str(i) for i in a] == [str(i) for i in b]
+        assert [str(i) for i in a] != [str(i) for i in c]
+
+    def test_mistura_de_tipos(self):
+        insumos = gerar_insumos(2000, fracao_reagentes=0.25, hoje=self.HOJE)
+        reagentes = sum(i.tipo == 'reagente' for i in insumos)
+        assert 0.2 < reagentes / len(insumos) < 0.3
+        assert all(i.custo_unitario > 0 for i in insumos)
+        assert len({i.nome for i in insumos}) == len(insumos)
+
+    def test_dataset_em_blocos(self, tmp_path):
+        """Vários blocos pequenos: colunas, índice e ordem cronológica corretos ao carregar"""
+        caminho = str(tmp_path / "sintetico.snap")
+        gerar_dataset(caminho, 50, 5000, semente=3, tamanho_bloco=700, dias=30, hoje=self.HOJE)
+        sistema = SistemaConsumo.carregar_snapshot(caminho)
+
+        assert len(sistema.livro) == 5000 and len(sistema.insumos) == 50
+        dias = sistema.livro.coluna('dia')
+        assert sistema.livro.em_ordem_cronologica
+        assert dias.min() >= self.HOJE.toordinal() - 29 and dias.max() <= self.HOJE.toordinal()
+        insumo = np.asarray(sistema.livro.coluna('insumo'))
+        ordem, inicios = sistema.livro.indice_por_insumo(50)
+        assert np.array_equal(ordem, np.argsort(insumo, kind='stable'))
+        assert np.array_equal(np.diff(inicios), np.bincount(insumo, minlength=50))
+        custos = np.array([i.custo_centavos for i in sistema.insumos])
+        assert np.array_equal(sistema.livro.coluna('custo'), sistema.livro.coluna('quantidade') * custos[insumo])
+
+    def test_mesma_semente_mesmo_arquivo(self, tmp_path):
+        caminhos = [str(tmp_path / f"{n}.snap") for n in range(2)]
+        for caminho in caminhos:
+            gerar_dataset(caminho, 20, 1000, semente=5, tamanho_bloco=256, hoje=self.HOJE)
+        with open(caminhos[0], 'rb') as a, open(caminhos[1], 'rb') as b:
+            assert a.read() == b.read()
+
+
+class TestMemoria:
+    """Testes para o relatório de memória"""
+
+    def test_tamanho_profundo_conta_compartilhado_uma_vez(self):
+        texto = "x" * 10_000
+        vistos = set()
+        primeiro = tamanho_profundo([texto], vistos)
+        segundo = tamanho_profundo([texto], vistos)
+        assert primeiro > 10_000
+        assert segundo < 1_000  # só a lista: o texto já foi contado
+
+    def test_tamanho_profundo_arrays(self):
+        base = np.zeros(100_000)
+        assert tamanho_profundo(base) >= base.nbytes
+        assert tamanho_profundo(base[:10], {id(base)}) < 1_000  # visão não repete os dados
+
+    def test_relatorio_por_componente(self):
+        """Registros são contados uma vez: fila e pilha só pagam pelas próprias listas"""
+        sistema = SistemaConsumo()
+        sistema.carregar_insumos_exemplo()
+        sistema.simular_consumo_diario(30)
+        relatorio = sistema.relatorio_memoria(extras={'lista_extra': list(range(1000))})
+
+        componentes = relatorio['componentes']
+        assert componentes['registros_completos'] > componentes['fila_consumo']
+        assert componentes['registros_completos'] > componentes['pilha_consulta']
+        assert componentes['lista_extra'] > 0
+        assert relatorio['total'] == sum(componentes.values())
+        assert relatorio['bytes_por_registro'] == relatorio['total'] / len(sistema.livro)
+
+    def test_snapshot_nao_materializa(self, tmp_path):
+        caminho = str(tmp_path / "memoria.snap")
+        gerar_dataset(caminho, 10, 2000, tamanho_bloco=500)
+        sistema = SistemaConsumo.carregar_snapshot(caminho)
+        relatorio = sistema.relatorio_memoria()
+        assert relatorio['mapeado'] >= 2000 * 4
+        assert sistema._restauracao is not None
+
+    def test_monitor_historico(self):
+        with MonitorMemoria() as monitor:
+            dados = [bytearray(1000) for _ in range(1000)]
+            marca = monitor.marcar("lista criada", len(dados))
+        assert marca['bytes'] >= 1_000_000
+        assert marca['bytes_por_registro'] >= 1000
+        assert monitor.historico == [marca]
+        with pytest.raises(RuntimeError):
+            monitor.marcar("parado")
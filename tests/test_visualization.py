@@ -2,12 +2,14 @@ import pytest
 import datetime
 import sys
 import os
+import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from tkinter import TclError
 
 from visualization.visualizador_dados import VisualizadorDados
+from visualization.grafico_ao_vivo import GraficoConsumoAoVivo
 from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
 
@@ -131,4 +133,165 @@ class TestVisualization:
             VisualizadorDados.gerar_grafico_validade_proxima([])
             assert True
         except Exception as e:
-            pytest.fail(f"Gráficos falharam com lista vazia: {e}")
\ No newline at end of file
+            pytest.fail(f"Gráficos falharam com lista vazia: {e}")
+
+class TestCacheDataFrame:
+    """Testes para o DataFrame dos gráficos em cache por versão do livro"""
+
+    def _sistema(self, dias_detalhe=None):
+        from system.sistema_consumo import SistemaConsumo
+        sistema = SistemaConsumo(dias_detalhe=dias_detalhe)
+        sistema.adicionar_insumo(Insumo(1, "Luvas", 10_000, datetime.date(2030, 1, 1), "descartavel", 0.35))
+        sistema.adicionar_insumo(Insumo(2, "Reagente A", 10_000, datetime.date(2025, 6, 30), "reagente", 15.50))
+        for k in range(20):
+            sistema.registrar_consumo(sistema.insumos[k % 2], datetime.date(2024, 1, 1) + datetime.timedelta(days=k // 2), k + 1)
+        return sistema
+
+    def test_igual_ao_dataframe_dos_registros(self):
+        sistema = self._sistema()
+        do_livro = VisualizadorDados.criar_dataframe_consumo(sistema)
+        dos_registros = VisualizadorDados.criar_dataframe_consumo(sistema.registros_completos)
+        assert list(do_livro.columns) == list(dos_registros.columns)
+        for coluna in do_livro.columns:
+            assert do_livro[coluna].tolist() == dos_registros[coluna].tolist(), coluna
+
+    def test_so_linhas_novas_sao_convertidas(self):
+        sistema = self._sistema()
+        df = VisualizadorDados.criar_dataframe_consumo(sistema)
+        cache = sistema._cache_dataframe
+        assert VisualizadorDados.criar_dataframe_consumo(sistema) is df  # mesma versão: nada refeito
+        sistema.registrar_consumo(sistema.insumos[0], datetime.date(2024, 1, 11), 7)
+        df = VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert cache.linhas_convertidas == 21 and len(df) == 21
+        assert df['Quantidade'].iloc[-1] == 7 and df.index[-1] == 20
+
+    def test_atualizacao_nao_copia_linhas_antigas(self):
+        """As linhas já convertidas ficam nos mesmos buffers: o DataFrame novo só cresce no fim"""
+        sistema = self._sistema()
+        antigo = VisualizadorDados.criar_dataframe_consumo(sistema)
+        quantidades, datas = antigo['Quantidade'].to_numpy(), antigo['Data'].to_numpy()
+        sistema.registrar_consumo(sistema.insumos[1], datetime.date(2024, 1, 11), 3)
+        novo = VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert np.shares_memory(novo['Quantidade'].to_numpy(), quantidades)
+        assert np.shares_memory(novo['Data'].to_numpy(), datas)
+        assert len(antigo) == 20 and antigo['Quantidade'].tolist() == list(range(1, 21))
+        assert novo['Insumo'].iloc[-1] == "Reagente A"
+
+    def test_catalogo_nao_e_relido_a_cada_atualizacao(self):
+        """Linhas novas não reconvertem o catálogo; insumo novo só estende as arrays dele"""
+        sistema = self._sistema()
+        VisualizadorDados.criar_dataframe_consumo(sistema)
+        cache = sistema._cache_dataframe
+        nomes = cache._catalogo['nome']
+        sistema.registrar_consumo(sistema.insumos[0], datetime.date(2024, 1, 11), 2)
+        VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert cache.insumos_convertidos == 2 and cache._catalogo['nome'] is nomes
+        novo = Insumo(3, "Seringa", 500, datetime.date(2031, 3, 1), "descartavel", 1.25)
+        sistema.adicionar_insumo(novo)
+        sistema.registrar_consumo(novo, datetime.date(2024, 1, 11), 4)
+        df = VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert cache.insumos_convertidos == 3 and cache.linhas_convertidas == 22
+        assert df['Insumo'].iloc[-1] == "Seringa" and df['Custo Unitário'].iloc[-1] == 1.25
+        sistema.atualizar_insumo("Seringa", custo_unitario=2.0)  # insumo alterado: refaz tudo
+        df = VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert cache.insumos_convertidos == 6 and cache.linhas_convertidas == 44
+        assert df['Custo Unitário'].iloc[-1] == 2.0
+
+    def test_catalogo_ou_livro_novo_refaz(self):
+        sistema = self._sistema(dias_detalhe=3)
+        VisualizadorDados.criar_dataframe_consumo(sistema)
+        sistema.atualizar_insumo("Luvas", nome="Luvas Nitrílicas")
+        df = VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert "Luvas Nitrílicas" in set(df['Insumo'])
+        sistema.registrar_consumo(sistema.insumos[1], datetime.date(2024, 1, 20), 1)  # compacta: livro novo
+        df = VisualizadorDados.criar_dataframe_consumo(sistema)
+        assert len(df) == len(sistema.livro)
+        assert df['Quantidade'].sum() == sum(range(1, 21)) + 1
+
+
+class TestMapaCalor:
+    """Testes para o mapa de calor montado a partir do cubo de consumo"""
+
+    def test_mapa_de_calor(self):
+        from system.sistema_consumo import SistemaConsumo
+        sistema = SistemaConsumo()
+        vazio = SistemaConsumo()
+        VisualizadorDados.gerar_mapa_calor_consumo(vazio)  # sem dados: só avisa
+        for k in range(4):
+            sistema.adicionar_insumo(Insumo(k + 1, f"Insumo {k}", 1000, datetime.date(2030, 1, 1), "reagente", 1.0))
+        for k in range(30):
+            sistema.registrar_consumo(sistema.insumos[k % 4], datetime.date(2024, 1, 1) + datetime.timedelta(days=k),
+                                      k + 1)
+        VisualizadorDados.gerar_mapa_calor_consumo(sistema, periodo='semana', top_n=3)
+        import matplotlib.pyplot as plt
+        eixo = plt.gcf().axes[0]
+        assert len(eixo.get_yticklabels()) == 3
+        assert eixo.images[0].get_array().shape == (3, 5)  # 30 dias a partir de uma segunda-feira
+        plt.close('all')
+
+
+class TestGraficoAoVivo:
+    """Testes para o gráfico de consumo ao vivo (blitting)"""
+
+    INICIO = datetime.date(2024, 1, 1)
+
+    def _grafico(self, dias=10):
+        grafico = GraficoConsumoAoVivo(janela_dias=dias)
+        for k in range(dias):
+            grafico.registrar(self.INICIO + datetime.timedelta(days=k), 10 + k)
+        grafico.desenhar()
+        return grafico
+
+    def _pixels(self, grafico):
+        return np.asarray(grafico.fig.canvas.buffer_rgba()).copy()
+
+    def test_so_a_barra_alterada_e_redesenhada(self):
+        grafico = self._grafico()
+        assert grafico.barras_redesenhadas == 10  # primeiro quadro: tudo
+
+        grafico.registrar(self.INICIO + datetime.timedelta(days=5), 3)
+        assert grafico.desenhar() == 1
+        assert grafico.desenhar() == 0  # nada mudou
+        grafico.fechar()
+
+    def test_quadro_incremental_igual_ao_completo(self):
+        """O resultado do blitting é idêntico, pixel a pixel, a desenhar do zero"""
+        grafico = self._grafico()
+        grafico.registrar(self.INICIO + datetime.timedelta(days=5), 3)
+        grafico.registrar(self.INICIO + datetime.timedelta(days=9), 2)
+        grafico.desenhar()
+
+        novo = GraficoConsumoAoVivo(janela_dias=10)
+        novo.atualizar(grafico.totais())
+        novo.desenhar()
+        novo.ax.set_ylim(grafico.ax.get_ylim())
+        novo.fig.canvas.draw()
+        assert np.array_equal(self._pixels(grafico), self._pixels(novo))
+        grafico.fechar()
+        novo.fechar()
+
+    def test_redesenho_completo_quando_necessario(self):
+        """Estourar a escala ou começar um dia novo redesenha todas as barras"""
+        grafico = self._grafico()
+        grafico.registrar(self.INICIO, 1000)
+        assert grafico.desenhar() == 10
+        assert grafico.ax.get_ylim()[1] >= 1010
+
+        grafico.registrar(self.INICIO + datetime.timedelta(days=10), 1)
+        assert grafico.desenhar() == 10
+        assert min(grafico.totais()) == self.INICIO + datetime.timedelta(days=1)
+        grafico.fechar()
+
+    def test_de_sistema(self):
+        from system.sistema_consumo import SistemaConsumo
+        sistema = SistemaConsumo()
+        insumo = Insumo(1, "Luvas", 1000, datetime.date(2030, 1, 1), "descartavel", 1.0)
+        sistema.adicionar_insumo(insumo)
+        for k in range(40):
+            sistema.registrar_consumo(insumo, self.INICIO + datetime.timedelta(days=k), k + 1)
+
+        grafico = GraficoConsumoAoVivo.de_sistema(sistema, janela_dias=30)
+        totais = grafico.totais()
+        assert len(totais) == 30
+        assert totais[self.INICIO + datetime.timedelta(days=39)] == 40
+        grafico.fechar()
@@ -2,5 +2,6 @@
 PACOTE VISUALIZATION: Contém as ferramentas de visualização
 """
 from .visualizador_dados import VisualizadorDados
+from .grafico_ao_vivo import GraficoConsumoAoVivo
 
-__all__ = ['VisualizadorDados']
\ No newline at end of file
+__all__ = ['VisualizadorDados', 'GraficoConsumoAoVivo']
\ No newline at end of file
@@ -0,0 +1,148 @@
+import datetime
+import weakref
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from structures.livro_razao import LivroRazao
+
+COLUNAS_DATAFRAME = ['Data', 'Insumo', 'Tipo', 'Quantidade',
+                     'Custo Unitário', 'Custo Total', 'Custo Centavos', 'Validade']
+
+_ORDINAL_1970 = datetime.date(1970, 1, 1).toordinal()
+
+
+def _datas(dias: np.ndarray) -> np.ndarray:
+    """Dias ordinais → datetime.date (vetorizado, via datetime64)"""
+    return (np.asarray(dias, dtype=np.int64) - _ORDINAL_1970).astype('datetime64[D]').astype(object)
+
+
+def _arrays_do_catalogo(insumos: List) -> Dict[str, np.ndarray]:
+    """Catálogo em arrays, um valor por insumo (nome, tipo, preço em centavos, validade)"""
+    return {
+        'nome': np.array([i.nome for i in insumos], dtype=object),
+        'tipo': np.array([i.tipo for i in insumos], dtype=object),
+        'preco': np.fromiter((i.custo_centavos for i in insumos), dtype=np.int64, count=len(insumos)),
+        'validade': _datas(np.fromiter((i.validade_dia for i in insumos), dtype=np.int64, count=len(insumos))),
+    }
+
+
+def _colunas_do_livro(livro: LivroRazao, catalogo: Dict[str, np.ndarray], inicio: int, fim: int) -> Dict[str, np.ndarray]:
+    """Linhas [inicio, fim) do livro já convertidas, uma array por coluna do DataFrame"""
+    posicoes = livro.coluna('insumo')[inicio:fim]
+    custos = livro.coluna('custo')[inicio:fim]
+    # Um "take" por linha nas arrays do catálogo
+    return {
+        'Data': _datas(livro.coluna('dia')[inicio:fim]),
+        'Insumo': catalogo['nome'][posicoes],
+        'Tipo': catalogo['tipo'][posicoes],
+        'Quantidade': livro.coluna('quantidade')[inicio:fim].astype(np.int64),
+        'Custo Unitário': catalogo['preco'][posicoes] / 100,
+        'Custo Total': custos / 100,
+        'Custo Centavos': custos.astype(np.int64),  # para somar sem erro de arredondamento
+        'Validade': catalogo['validade'][posicoes],
+    }
+
+
+def _quadro(colunas: Dict[str, np.ndarray], inicio: int, fim: int) -> pd.DataFrame:
+    """DataFrame sobre as arrays, sem copiá-las (textos e datas ficam como object)"""
+    indice = pd.RangeIndex(inicio, fim)
+    return pd.DataFrame({nome: pd.Series(colunas[nome], index=indice, dtype=colunas[nome].dtype, copy=False)
+                         for nome in COLUNAS_DATAFRAME}, columns=COLUNAS_DATAFRAME, copy=False)
+
+
+def dataframe_do_livro(livro: LivroRazao, insumos: List, inicio: int = 0, fim: Optional[int] = None) -> pd.DataFrame:
+    """
+    Linhas [inicio, fim) do livro no formato de VisualizadorDados.criar_dataframe_consumo,
+    montadas direto das colunas (sem criar um RegistroConsumo por linha).
+    """
+    fim = len(livro) if fim is None else fim
+    return _quadro(_colunas_do_livro(livro, _arrays_do_catalogo(insumos), inicio, fim), inicio, fim)
+
+
+class CacheDataFrame:
+    """
+    CACHE DO DATAFRAME DOS GRÁFICOS, por versão do livro-razão e do catálogo
+
+    Cada gráfico do painel precisa do mesmo DataFrame. Em vez de refazê-lo a
+    cada chamada, o cache lembra qual livro (e qual versão dele) já converteu:
+    - mesma versão: devolve o DataFrame guardado, sem trabalho nenhum
+    - mesmo livro com linhas novas (o livro só cresce no fim): converte só as
+      novas e escreve no fim dos buffers — O(linhas novas)
+    - outro livro (snapshot carregado, retenção compactou) ou insumo alterado
+      (versao_catalogo do sistema mudou): monta tudo de novo
+
+    O catálogo também fica em arrays (nome, tipo, preço, validade por insumo):
+    insumos novos no fim da lista só estendem essas arrays, sem reler os antigos.
+    As colunas convertidas ficam em buffers NumPy que dobram de capacidade
+    (como a matriz da PrevisaoDemanda); o DataFrame devolvido é só uma visão
+    das primeiras `n` linhas, então as linhas antigas não são copiadas de novo.
+    """
+
+    _CAPACIDADE_INICIAL = 1024
+
+    def __init__(self):
+        self._livro: Optional[weakref.ref] = None
+        self._versao = -1
+        self._lista: Optional[List] = None  # lista de insumos que gerou as arrays do catálogo
+        self._versao_catalogo = -1
+        self._catalogo: Dict[str, np.ndarray] = {}
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._n = 0
+        self._dataframe: Optional[pd.DataFrame] = None
+        self.linhas_convertidas = 0  # total de linhas já convertidas (para acompanhar o custo)
+        self.insumos_convertidos = 0  # total de insumos já passados para as arrays do catálogo
+
+    def _atualizar_catalogo(self, insumos: List, versao_catalogo: int) -> bool:
+        """
+        Deixa as arrays do catálogo em dia com `insumos`. Retorna False se um
+        insumo já convertido mudou (aí as linhas convertidas também estão velhas).
+        """
+        mantido = (self._lista is insumos and self._versao_catalogo == versao_catalogo
+                   and len(self._catalogo['nome']) <= len(insumos))
+        n = len(self._catalogo['nome']) if mantido else 0
+        if n < len(insumos):
+            novos = _arrays_do_catalogo(insumos[n:])
+            self._catalogo = ({campo: np.concatenate((self._catalogo[campo], valores))
+                               for campo, valores in novos.items()} if n else novos)
+            self.insumos_convertidos += len(insumos) - n
+        self._lista, self._versao_catalogo = insumos, versao_catalogo
+        return mantido
+
+    def _anexar(self, novas: Dict[str, np.ndarray]):
+        """Escreve as linhas novas no fim dos buffers, dobrando a capacidade se preciso"""
+        total = self._n + len(novas['Data'])
+        for nome, valores in novas.items():
+            buffer = self._buffers.get(nome)
+            if buffer is None or total > len(buffer):
+                capacidade = max(total, 2 * (0 if buffer is None else len(buffer)), self._CAPACIDADE_INICIAL)
+                novo = np.empty(capacidade, dtype=valores.dtype)
+                if buffer is not None:
+                    novo[:self._n] = buffer[:self._n]
+                self._buffers[nome] = buffer = novo
+            buffer[self._n:total] = valores
+        self._n = total
+
+    def obter(self, livro: LivroRazao, insumos: List, versao_catalogo: int = 0) -> pd.DataFrame:
+        """
+        DataFrame de todas as linhas do livro (o mesmo objeto enquanto nada mudar).
+        - versao_catalogo: sobe quando um insumo já existente é alterado
+          (SistemaConsumo.versao_catalogo); insumos novos são vistos pelo tamanho da lista
+        """
+        catalogo_mantido = self._atualizar_catalogo(insumos, versao_catalogo)
+        mesmo_livro = self._livro is not None and self._livro() is livro
+        # Insumos novos no fim do catálogo não mudam as linhas já convertidas
+        if mesmo_livro and catalogo_mantido and livro.versao == self._versao:
+            return self._dataframe
+
+        if not (mesmo_livro and catalogo_mantido):
+            self._buffers, self._n = {}, 0  # buffers novos: DataFrames já entregues não mudam
+        novas = _colunas_do_livro(livro, self._catalogo, self._n, len(livro))
+        self.linhas_convertidas += len(livro) - self._n
+        self._anexar(novas)
+        self._dataframe = _quadro({nome: b[:self._n] for nome, b in self._buffers.items()}, 0, self._n)
+
+        self._livro = weakref.ref(livro)
+        self._versao = livro.versao
+        return self._dataframe
@@ -0,0 +1,175 @@
+import datetime
+from typing import Dict, Optional
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.transforms import Bbox
+
+
+class GraficoConsumoAoVivo:
+    """
+    📺 GRÁFICO AO VIVO: consumo diário dos últimos `janela_dias` dias para um painel na parede
+
+    IDEIA: A figura, as barras e os rótulos são criados UMA vez e ficam vivos.
+    Cada novo consumo só muda a altura de uma barra; na hora de desenhar usamos
+    "blitting": restauramos o fundo já pronto (eixos, grade, títulos) só na
+    faixa da barra que mudou, desenhamos essa barra e o rótulo dela e copiamos
+    só aquele pedaço para a tela.
+
+    O custo de um quadro depende do número de barras que mudaram — não do
+    tamanho do histórico. O redesenho completo só acontece quando a escala
+    precisa crescer (com folga, então é raro) ou quando um dia novo começa.
+    """
+
+    def __init__(self, janela_dias: int = 30, figsize=(12, 6), folga: float = 1.25):
+        if janela_dias < 1:
+            raise ValueError("janela_dias deve ser >= 1")
+        self.janela_dias = janela_dias
+        self.folga = folga
+        self._totais: Dict[int, int] = {}   # dia (ordinal) → total, só dos dias na janela
+        self._ultimo_dia: Optional[int] = None
+        self._sujas: set = set()            # dias cuja barra precisa ser redesenhada
+        self._precisa_tudo = True
+        self._fundo = None
+        self.quadros = 0
+        self.barras_redesenhadas = 0        # barras desenhadas no último quadro
+
+        self.fig, self.ax = plt.subplots(figsize=figsize)
+        posicoes = np.arange(janela_dias)
+        # animated=True: as barras e rótulos ficam fora do desenho normal (vão por blitting)
+        self._barras = self.ax.bar(posicoes, np.zeros(janela_dias), color='skyblue', edgecolor='black',
+                                   alpha=0.7, animated=True)
+        self._rotulos = [self.ax.text(i, 0, '', ha='center', va='bottom', fontsize=8, animated=True)
+                         for i in posicoes]
+        self.ax.set_title('CONSUMO DIÁRIO DE INSUMOS (AO VIVO)', fontsize=16, fontweight='bold', pad=20)
+        self.ax.set_xlabel('Data', fontsize=12)
+        self.ax.set_ylabel('Unidades Consumidas', fontsize=12)
+        self.ax.set_xlim(-0.5, janela_dias - 0.5)
+        self.ax.set_ylim(0, 1)
+        self.ax.grid(axis='y', alpha=0.3)
+        self.fig.canvas.mpl_connect('draw_event', self._ao_desenhar)
+
+    @classmethod
+    def de_sistema(cls, sistema, janela_dias: int = 30, **parametros) -> 'GraficoConsumoAoVivo':
+        """Começa com os totais diários já presentes no livro-razão do sistema"""
+        grafico = cls(janela_dias, **parametros)
+        dias = sistema.livro.coluna('dia')
+        if len(dias):
+            ultimo = int(dias.max())
+            na_janela = dias > ultimo - janela_dias
+            totais = np.bincount(dias[na_janela] - (ultimo - janela_dias + 1),
+                                 weights=sistema.livro.coluna('quantidade')[na_janela], minlength=janela_dias)
+            grafico.atualizar({datetime.date.fromordinal(ultimo - janela_dias + 1 + i): int(t)
+                               for i, t in enumerate(totais) if t})
+        return grafico
+
+    # ------------------------------------------------------------------
+    # Dados
+    # ------------------------------------------------------------------
+    @property
+    def primeiro_dia(self) -> Optional[int]:
+        return None if self._ultimo_dia is None else self._ultimo_dia - self.janela_dias + 1
+
+    def _avancar(self, dia: int):
+        """Um dia mais novo apareceu: a janela anda e todas as barras mudam de lugar"""
+        self._ultimo_dia = dia
+        self._totais = {d: t for d, t in self._totais.items() if d >= self.primeiro_dia}
+        self._precisa_tudo = True
+
+    def registrar(self, data: datetime.date, quantidade: int):
+        """Soma um consumo ao total do dia (consumos anteriores à janela são ignorados)"""
+        dia = data.toordinal()
+        if self._ultimo_dia is None or dia > self._ultimo_dia:
+            self._avancar(dia)
+        if dia < self.primeiro_dia:
+            return
+        self._totais[dia] = self._totais.get(dia, 0) + quantidade
+        self._sujas.add(dia)
+
+    def atualizar(self, totais: Dict[datetime.date, int]):
+        """Troca os totais de alguns dias por valores novos (ex.: vindos de uma agregação)"""
+        if not totais:
+            return
+        mais_novo = max(totais).toordinal()
+        if self._ultimo_dia is None or mais_novo > self._ultimo_dia:
+            self._avancar(mais_novo)
+        for data, total in totais.items():
+            dia = data.toordinal()
+            if dia >= self.primeiro_dia and self._totais.get(dia) != total:
+                self._totais[dia] = total
+                self._sujas.add(dia)
+
+    def totais(self) -> Dict[datetime.date, int]:
+        """Totais por dia dentro da janela"""
+        return {datetime.date.fromordinal(d): t for d, t in sorted(self._totais.items())}
+
+    # ------------------------------------------------------------------
+    # Desenho
+    # ------------------------------------------------------------------
+    def _ao_desenhar(self, evento):
+        """Depois de um desenho completo: guarda o fundo limpo e desenha as barras por cima"""
+        canvas = self.fig.canvas
+        self._fundo = canvas.copy_from_bbox(self.fig.bbox)
+        for barra, rotulo in zip(self._barras, self._rotulos):
+            self.ax.draw_artist(barra)
+            self.ax.draw_artist(rotulo)
+
+    def _ajustar_barra(self, dia: int):
+        i = dia - self.primeiro_dia
+        total = self._totais.get(dia, 0)
+        self._barras[i].set_height(total)
+        self._rotulos[i].set_position((i, total))
+        self._rotulos[i].set_text(f'{total}' if total else '')
+
+    def _faixa(self, i: int) -> Bbox:
+        """Retângulo (em pixels) da coluna da barra i, do chão ao topo dos eixos"""
+        (x0, _), (x1, _) = self.ax.transData.transform([(i - 0.5, 0), (i + 0.5, 0)])
+        return Bbox.from_extents(np.floor(x0), np.floor(self.ax.bbox.y0),
+                                 np.ceil(x1), np.ceil(self.ax.bbox.y1))
+
+    def _redesenhar_tudo(self):
+        primeiro = self.primeiro_dia
+        for dia in range(primeiro, primeiro + self.janela_dias):
+            self._ajustar_barra(dia)
+        maior = max(self._totais.values(), default=0)
+        self.ax.set_ylim(0, max(1, maior * self.folga))
+        passo = max(1, self.janela_dias // 15)
+        self.ax.set_xticks(np.arange(0, self.janela_dias, passo))
+        self.ax.set_xticklabels([datetime.date.fromordinal(primeiro + i).strftime('%d/%m')
+                                 for i in range(0, self.janela_dias, passo)], rotation=45, ha='right')
+        self.fig.canvas.draw()  # dispara _ao_desenhar: novo fundo + todas as barras
+        self.fig.canvas.blit(self.fig.bbox)
+
+    def desenhar(self) -> int:
+        """
+        Mostra as mudanças desde o último quadro. Retorna quantas barras foram redesenhadas.
+        """
+        if self._ultimo_dia is None:
+            return 0
+        maior_sujo = max((self._totais.get(d, 0) for d in self._sujas), default=0)
+        if self._precisa_tudo or self._fundo is None or maior_sujo > self.ax.get_ylim()[1]:
+            self._redesenhar_tudo()
+            redesenhadas = self.janela_dias
+        else:
+            canvas = self.fig.canvas
+            for dia in sorted(self._sujas):
+                i = dia - self.primeiro_dia
+                self._ajustar_barra(dia)
+                faixa = self._faixa(i)
+                # restore_region do Agg conta as linhas de cima para baixo (como a imagem)
+                altura = self.fig.bbox.height
+                canvas.restore_region(self._fundo, bbox=(faixa.x0, altura - faixa.y1, faixa.x1, altura - faixa.y0),
+                                      xy=(0, 0))
+                self.ax.draw_artist(self._barras[i])
+                self.ax.draw_artist(self._rotulos[i])
+                canvas.blit(faixa)
+            redesenhadas = len(self._sujas)
+        self._sujas.clear()
+        self._precisa_tudo = False
+        self.quadros += 1
+        self.barras_redesenhadas = redesenhadas
+        self.fig.canvas.flush_events()
+        return redesenhadas
+
+    def fechar(self):
+        plt.close(self.fig)
@@ -1,10 +1,19 @@
 import pandas as pd
 from tabulate import tabulate
-from typing import List
+from typing import TYPE_CHECKING, List, Union
 import matplotlib.pyplot as plt
 import numpy as np
+from models.datas import VENCENDO, classificar_validades, dias_validade
 from models.insumo import Insumo
 from models.registro_consumo import RegistroConsumo
+from visualization.grafico_ao_vivo import GraficoConsumoAoVivo
+from visualization.cache_dataframe import COLUNAS_DATAFRAME, CacheDataFrame
+
+if TYPE_CHECKING:
+    from system.sistema_consumo import SistemaConsumo
+
+# Os gráficos de consumo aceitam a lista de registros ou o sistema inteiro (DataFrame em cache)
+OrigemRegistros = Union[List[RegistroConsumo], 'SistemaConsumo']
 
 class VisualizadorDados:
     """
@@ -17,19 +26,29 @@ class VisualizadorDados:
     """
 
     @staticmethod
-    def criar_dataframe_consumo(registros: List[RegistroConsumo]) -> pd.DataFrame:
+    def criar_dataframe_consumo(registros: OrigemRegistros) -> pd.DataFrame:
         """
         📋 CRIA TABELA DE DADOS: Transforma registros em DataFrame do pandas
         
         Pega os registros brutos e organiza em uma tabela profissional
         com todas as informações importantes para os gráficos.
+
+        Também aceita o próprio SistemaConsumo: aí a tabela sai direto do
+        livro-razão e fica em cache por versão do livro (veja
+        visualization/cache_dataframe.py) — os gráficos seguintes e as
+        próximas atualizações do painel só convertem os consumos novos.
         """
+        if hasattr(registros, 'livro'):
+            sistema = registros
+            if sistema._cache_dataframe is None:
+                sistema._cache_dataframe = CacheDataFrame()
+            if len(sistema.livro):
+                return sistema._cache_dataframe.obter(sistema.livro, sistema.insumos, sistema.versao_catalogo)
+            registros = []
+
         if not registros:
         # ✅ Retorna DataFrame com colunas definidas mas vazio
-            return pd.DataFrame(columns=[
-                'Data', 'Insumo', 'Tipo', 'Quantidade', 
-                'Custo Unitário', 'Custo Total', 'Validade'
-            ])
+            return pd.DataFrame(columns=COLUNAS_DATAFRAME)
 
         data = []  # Lista onde vamos guardar cada linha da tabela
         for registro in registros:
@@ -41,6 +60,7 @@ class VisualizadorDados:
                 'Quantidade': registro.quantidade_consumida,
                 'Custo Unitário': registro.insumo.custo_unitario,
                 'Custo Total': registro.custo_total,
+                'Custo Centavos': registro.custo_centavos,  # para somar sem erro de arredondamento
                 'Validade': registro.insumo.validade
             })
         
@@ -48,14 +68,19 @@ class VisualizadorDados:
         return pd.DataFrame(data)
 
     @staticmethod
-    def gerar_grafico_consumo_diario(registros: List[RegistroConsumo]):
+    def _sem_dados(registros: OrigemRegistros) -> bool:
+        """Lista de registros vazia ou sistema sem nenhum consumo no livro"""
+        return not len(registros.livro) if hasattr(registros, 'livro') else not registros
+
+    @staticmethod
+    def gerar_grafico_consumo_diario(registros: OrigemRegistros):
         """
         📅 GRÁFICO DE CONSUMO DIÁRIO: Mostra quanto foi consumido cada dia
         
         IDEIA: Ver em quais dias o hospital mais consumiu insumos
         CORES: Azul claro → consumo normal / Azul escuro → picos de consumo
         """
-        if not registros:
+        if VisualizadorDados._sem_dados(registros):
             print("📊 Nenhum dado para gerar gráfico de consumo diário")
             return
         
@@ -81,14 +106,26 @@ class VisualizadorDados:
         plt.show()
 
     @staticmethod
-    def gerar_grafico_top_insumos(registros: List[RegistroConsumo], top_n: int = 5):
+    def gerar_grafico_consumo_ao_vivo(sistema, janela_dias: int = 30) -> GraficoConsumoAoVivo:
+        """
+        📺 CONSUMO DIÁRIO AO VIVO: mesma ideia do gráfico diário, mas a figura fica aberta.
+        Depois de cada consumo chame grafico.registrar(data, quantidade) e grafico.desenhar():
+        só a barra do dia é redesenhada (blitting).
+        """
+        grafico = GraficoConsumoAoVivo.de_sistema(sistema, janela_dias)
+        grafico.desenhar()
+        plt.show(block=False)
+        return grafico
+
+    @staticmethod
+    def gerar_grafico_top_insumos(registros: OrigemRegistros, top_n: int = 5):
         """
         🏆 TOP INSUMOS: Mostra os produtos mais consumidos
         
         IDEIA: Saber quais produtos gastamos mais
         CORES: Vermelho → mais consumidos / Laranja → menos consumidos
         """
-        if not registros:
+        if VisualizadorDados._sem_dados(registros):
             print("📊 Nenhum dado para gerar gráfico de top insumos")
             return
         
@@ -114,19 +151,56 @@ class VisualizadorDados:
         plt.show()
 
     @staticmethod
-    def gerar_grafico_custo_por_tipo(registros: List[RegistroConsumo]):
+    def gerar_mapa_calor_consumo(sistema: 'SistemaConsumo', inicio=None, fim=None, periodo: str = 'semana',
+                                 tipos=None, top_n: int = 15):
+        """
+        🌡️ MAPA DE CALOR: insumo × período, direto do cubo de consumo
+        
+        IDEIA: Ver de uma vez quais insumos são mais usados e QUANDO
+        CORES: Amarelo claro → pouco consumo / Vermelho escuro → muito consumo
+        Mostra os `top_n` insumos de maior consumo no período (sem percorrer os registros).
+        """
+        fatia = sistema.fatiar_consumo(inicio, fim, tipos=tipos, periodo=periodo)
+        valores = fatia['valores']
+        if not valores.size or not valores.any():
+            print("📊 Nenhum dado para gerar o mapa de calor de consumo")
+            return
+        
+        # Só os insumos mais consumidos, do maior para o menor
+        totais = valores.sum(axis=1)
+        linhas = np.argsort(-totais, kind='stable')[:top_n]
+        linhas = linhas[totais[linhas] > 0]
+        nomes = [fatia['linhas'][i] for i in linhas.tolist()]
+        
+        plt.figure(figsize=(14, max(4, 0.4 * len(nomes) + 2)))
+        imagem = plt.imshow(valores[linhas], aspect='auto', cmap='YlOrRd', interpolation='nearest')
+        plt.colorbar(imagem, label='Unidades Consumidas')
+        
+        plt.title(f'MAPA DE CALOR DO CONSUMO (por {periodo})', fontsize=16, fontweight='bold', pad=20)
+        plt.yticks(range(len(nomes)), nomes)
+        # No máximo ~20 rótulos de data no eixo X
+        passo = max(1, len(fatia['colunas']) // 20)
+        posicoes = range(0, len(fatia['colunas']), passo)
+        plt.xticks(posicoes, [str(fatia['colunas'][i]) for i in posicoes], rotation=45, ha='right')
+        plt.xlabel('Início do Período', fontsize=12)
+        
+        plt.tight_layout()
+        plt.show()
+
+    @staticmethod
+    def gerar_grafico_custo_por_tipo(registros: OrigemRegistros):
         """
         💰 CUSTO POR TIPO: Mostra quanto gastamos com reagentes vs descartáveis
         
         IDEIA: Saber onde está indo mais dinheiro
         CORES: Azul → reagentes / Verde → descartáveis
         """
-        if not registros:
+        if VisualizadorDados._sem_dados(registros):
             print("📊 Nenhum dado para gerar gráfico de custos")
             return
         
         df = VisualizadorDados.criar_dataframe_consumo(registros)
-        custo_por_tipo = df.groupby('Tipo')['Custo Total'].sum()
+        custo_por_tipo = df.groupby('Tipo')['Custo Centavos'].sum() / 100  # soma exata, reais só no fim
         
         plt.figure(figsize=(10, 7))
         cores = ['#FF6B6B', '#4ECDC4']  # Vermelho para reagentes, Verde para descartáveis
@@ -198,36 +272,28 @@ class VisualizadorDados:
         CORES: Vermelho → vence em 7 dias / Laranja → vence em 30 dias
         """
         from datetime import date
-        hoje = date.today()
+        hoje = date.today().toordinal()
         
-        # Filtra insumos que vencem nos próximos dias
-        insumos_proximos = []
-        for insumo in insumos:
-            if insumo.quantidade > 0:  # Só os que têm estoque
-                dias_restantes = (insumo.validade - hoje).days
-                if 0 <= dias_restantes <= dias_limite:
-                    insumos_proximos.append((insumo, dias_restantes))
+        # Classifica todas as validades de uma vez (dias inteiros, sem datas uma a uma)
+        restantes, situacao = classificar_validades(dias_validade(insumos), hoje, dias_limite)
+        estoques = np.fromiter((i.quantidade for i in insumos), dtype=np.int64, count=len(insumos))
+        proximos = np.flatnonzero((estoques > 0) & (situacao == VENCENDO))  # Só os que têm estoque
         
-        if not insumos_proximos:
+        if not len(proximos):
             print(f"✅ Nenhum insumo vence nos próximos {dias_limite} dias!")
             return
         
         # Ordena por validade mais próxima
-        insumos_proximos.sort(key=lambda x: x[1])
+        proximos = proximos[np.argsort(restantes[proximos], kind='stable')]
         
-        nomes = [f"{i[0].nome}\n({i[0].validade})" for i in insumos_proximos]
-        dias = [i[1] for i in insumos_proximos]
-        quantidades = [i[0].quantidade for i in insumos_proximos]
+        # Datas só agora, para os rótulos
+        nomes = [f"{insumos[p].nome}\n({insumos[p].validade})" for p in proximos.tolist()]
+        dias = restantes[proximos].tolist()
+        quantidades = estoques[proximos].tolist()
         
         # Cores baseadas na urgência
-        cores = []
-        for d in dias:
-            if d <= 7:
-                cores.append('red')
-            elif d <= 15:
-                cores.append('orange')
-            else:
-                cores.append('gold')
+        cores = np.where(restantes[proximos] <= 7, 'red',
+                         np.where(restantes[proximos] <= 15, 'orange', 'gold')).tolist()
         
         plt.figure(figsize=(14, 7))
         barras = plt.bar(nomes, quantidades, color=cores, edgecolor='black', alpha=0.8)
@@ -248,7 +314,7 @@ class VisualizadorDados:
         plt.show()
 
     @staticmethod
-    def gerar_dashboard_completo(registros: List[RegistroConsumo], insumos: List[Insumo], modo_teste=False):
+    def gerar_dashboard_completo(registros: OrigemRegistros, insumos: List[Insumo], modo_teste=False):
         """
         🎛️ DASHBOARD COMPLETO: Todos os gráficos importantes de uma vez!
         
@@ -275,11 +341,11 @@ class VisualizadorDados:
             print("✅ Colunas do DataFrame corretas")
             
             # Testa processamento de dados (o que os gráficos fariam)
-            if len(registros) > 0:
+            if not VisualizadorDados._sem_dados(registros):
                 try:
                     consumo_diario = df.groupby('Data')['Quantidade'].sum()
                     consumo_por_insumo = df.groupby('Insumo')['Quantidade'].sum()
-                    custo_por_tipo = df.groupby('Tipo')['Custo Total'].sum()
+                    custo_por_tipo = df.groupby('Tipo')['Custo Centavos'].sum() / 100
                     
                     print(f"✅ Dados processados: {len(consumo_diario)} dias, {len(consumo_por_insumo)} insumos")
                 except Exception as e: